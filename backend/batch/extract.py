@@ -0,0 +1,183 @@
+"""
+Headless bulk extraction driven by a manifest (see batch.manifest).
+
+Every table/year/geography unit in the manifest is fetched the way the web
+app's Parquet output does it (fan-out for tract and block-group pulls,
+response and metadata caches, typed columns) and written into the
+partitioned Parquet dataset (see census.dataset). Nothing here needs Flask
+or Postgres.
+
+Units run in a pool of worker processes, so parsing and typing large tables
+is not serialized on one interpreter; each worker still fans geography
+sub-requests out over its own threads. Census requests are made at batch
+priority and draw on the quota shared with the web workers.
+
+A checkpoint file next to the manifest records each finished unit. A rerun
+after failures or an interruption skips the units already written; once
+every unit succeeds the checkpoint is removed, so the next scheduled run
+refreshes everything. The run ends with a throughput summary and exits with
+status 1 if any unit failed.
+
+Run from the backend directory:
+
+    python -m batch.extract manifest.json [--workers 4] [--output DIR] [--fresh]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+import config
+from batch.manifest import ExtractUnit, load_manifest
+from census.dataset import write_partition
+from census.frames import build_frame
+from census.geography import FanoutCheckpoint, fetch_geography_frame
+from census.quota import PRIORITY_BATCH, priority
+from census.schema import table_metadata
+from telemetry.metrics import UPSTREAM_BYTES, UPSTREAM_SECONDS
+
+
+def extract_unit(unit: ExtractUnit, api_key: Optional[str], output: str) -> Dict[str, Any]:
+    """
+    Fetch one unit and write it into the dataset (runs in a worker process).
+
+    Returns:
+        dict: Output path, rows, Census requests made, bytes downloaded and
+            written, and seconds taken
+
+    Raises:
+        CensusAPIError: If any request for the unit fails
+        QuotaExceeded: If the Census quota would not allow the unit in time
+    """
+    start = time.perf_counter()
+    requests_before, bytes_before = UPSTREAM_SECONDS.total_count(), UPSTREAM_BYTES.total()
+    with priority(PRIORITY_BATCH):
+        frame = fetch_geography_frame(unit.year, unit.acs_type, unit.table,
+                                      list(unit.variables), unit.geography, api_key)
+        metadata = table_metadata(unit.year, unit.acs_type, unit.table)
+    frame = build_frame(frame, metadata)
+    path = write_partition(frame, unit.table, unit.year, unit.acs_type, unit.geography,
+                           metadata, output)
+    return {
+        'path': path,
+        'rows': len(frame),
+        'requests': UPSTREAM_SECONDS.total_count() - requests_before,
+        'bytes_downloaded': UPSTREAM_BYTES.total() - bytes_before,
+        'bytes_written': os.path.getsize(path),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def run_extraction(units: List[ExtractUnit], api_key: Optional[str], output: str,
+                   checkpoint: FanoutCheckpoint, workers: int) -> Dict[str, Any]:
+    """
+    Extract every unit not yet in the checkpoint across a process pool.
+
+    Returns:
+        dict: Totals over the finished units, counts of skipped units and
+            {unit: error} for failed ones
+    """
+    pending = [unit for unit in units if unit.key not in checkpoint.completed]
+    totals = {'units': len(units), 'skipped': len(units) - len(pending), 'done': 0,
+              'rows': 0, 'requests': 0, 'bytes_downloaded': 0, 'bytes_written': 0, 'failed': {}}
+    if not pending:
+        return totals
+
+    # Spawned workers start clean instead of inheriting the parent's sessions and locks
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=context) as pool:
+        futures = {pool.submit(extract_unit, unit, api_key, output): unit for unit in pending}
+        try:
+            for future in as_completed(futures):
+                unit = futures[future]
+                finished = totals['skipped'] + totals['done'] + len(totals['failed']) + 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    totals['failed'][str(unit)] = str(e)
+                    print(f"[{finished}/{len(units)}] FAILED {unit}: {e}", flush=True)
+                    continue
+                checkpoint.mark(unit.key)
+                totals['done'] += 1
+                for field in ('rows', 'requests', 'bytes_downloaded', 'bytes_written'):
+                    totals[field] += result[field]
+                print(f"[{finished}/{len(units)}] {unit}: {result['rows']:,} rows, "
+                      f"{result['requests']} requests, {result['seconds']:.1f}s -> {result['path']}",
+                      flush=True)
+        except KeyboardInterrupt:
+            # Finished units are already checkpointed; drop the queued ones
+            for future in futures:
+                future.cancel()
+            raise
+    return totals
+
+
+def _format_bytes(count: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if count < 1024:
+            return f'{count:,.1f} {unit}'
+        count /= 1024
+    return f'{count:,.1f} GB'
+
+
+def format_summary(totals: Dict[str, Any], seconds: float) -> str:
+    """Throughput summary of a run."""
+    rate = (lambda value: value / seconds) if seconds > 0 else (lambda value: 0.0)
+    lines = [
+        f"Units: {totals['done']} extracted, {totals['skipped']} skipped (checkpointed), "
+        f"{len(totals['failed'])} failed of {totals['units']}",
+        f"Elapsed: {seconds:.1f}s",
+        f"Census requests: {totals['requests']:,} ({rate(totals['requests']):.2f} requests/s)",
+        f"Rows: {totals['rows']:,} ({rate(totals['rows']):,.0f} rows/s)",
+        f"Downloaded: {_format_bytes(totals['bytes_downloaded'])} "
+        f"({_format_bytes(rate(totals['bytes_downloaded']))}/s)",
+        f"Written: {_format_bytes(totals['bytes_written'])}",
+    ]
+    for unit, error in sorted(totals['failed'].items()):
+        lines.append(f"  failed: {unit}: {error}")
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Extract Census tables listed in a manifest into the Parquet dataset.')
+    parser.add_argument('manifest', help='JSON or YAML manifest (see batch/manifest.py)')
+    parser.add_argument('--workers', type=int,
+                        help='Worker processes (default: manifest concurrency, then BATCH_MAX_WORKERS)')
+    parser.add_argument('--output', help='Dataset root (default: manifest output, then DATASET_DIR)')
+    parser.add_argument('--checkpoint', help='Checkpoint file (default: <manifest>.checkpoint)')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Ignore an existing checkpoint and extract every unit')
+    args = parser.parse_args(argv)
+
+    try:
+        manifest = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"Invalid manifest: {e}", file=sys.stderr)
+        return 2
+
+    output = args.output or manifest.output or config.DATASET_DIR
+    workers = args.workers or manifest.concurrency or config.BATCH_MAX_WORKERS
+    checkpoint = FanoutCheckpoint(args.checkpoint or f'{args.manifest}.checkpoint')
+    if args.fresh:
+        checkpoint.clear()
+        checkpoint.completed = set()
+
+    print(f"{len(manifest.units)} units, {workers} workers, writing to {output}", flush=True)
+    start = time.perf_counter()
+    totals = run_extraction(manifest.units, manifest.api_key, output, checkpoint, workers)
+    print(format_summary(totals, time.perf_counter() - start))
+
+    if totals['failed']:
+        print(f"Rerun to retry the failed units; checkpoint kept at {checkpoint.path}")
+        return 1
+    checkpoint.clear()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Extraction manifests for the batch CLI.
+
+A manifest is a JSON or YAML file listing the pulls to run. Each entry under
+"extracts" is expanded into every combination of its tables, years and
+geographies:
+
+    {
+      "acs_type": "acs5",
+      "concurrency": 4,
+      "extracts": [
+        {"tables": ["DP02", "DP03"], "years": [2021, 2022],
+         "geographies": ["state:*", "county:*"]},
+        {"tables": ["B01001"], "years": [2022], "acs_type": "acs1",
+         "geographies": ["tract:*"], "variables": ["B01001_001E", "B01001_002E"]}
+      ]
+    }
+
+Top-level acs_type, variables and api_key act as defaults for every entry.
+An empty or missing variables list pulls the whole table group. api_key may
+be omitted and supplied through the CENSUS_API_KEY environment variable
+instead; a blank key or the placeholder from the sample backend/.env means
+keyless requests, as on the web form. YAML manifests need the PyYAML package.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+ACS_TYPES = ('acs1', 'acs5')
+
+# CENSUS_API_KEY value in the sample backend/.env
+PLACEHOLDER_API_KEY = 'your-census-api-key-here'
+
+
+class ExtractUnit(NamedTuple):
+    """One table/year/geography pull; the unit of work and of checkpointing."""
+    table: str
+    year: int
+    acs_type: str
+    geography: str
+    variables: tuple
+
+    @property
+    def key(self) -> str:
+        """Single-line identifier recorded in the checkpoint."""
+        return json.dumps([self.table, self.year, self.acs_type, self.geography,
+                           list(self.variables)])
+
+    def __str__(self) -> str:
+        variables = f" ({len(self.variables)} variables)" if self.variables else ''
+        return f"{self.table} {self.year} {self.acs_type} {self.geography}{variables}"
+
+
+class Manifest(NamedTuple):
+    """Expanded manifest: units to extract plus run settings (None where not given)."""
+    units: List[ExtractUnit]
+    api_key: Optional[str]
+    concurrency: Optional[int]
+    output: Optional[str]
+
+
+def clean_api_key(value) -> Optional[str]:
+    """Return a usable API key, or None for a blank or placeholder value (keyless)."""
+    key = str(value).strip().strip('"') if value else ''
+    return key if key and key != PLACEHOLDER_API_KEY else None
+
+
+def _as_list(value, field: str) -> list:
+    if value is None:
+        return []
+    if isinstance(value, (str, int)):
+        return [value]
+    if isinstance(value, list):
+        return value
+    raise ValueError(f"Manifest field '{field}' must be a list, got {type(value).__name__}")
+
+
+def _variables(value) -> tuple:
+    if isinstance(value, str):
+        value = value.split(',')
+    return tuple(var.strip() for var in _as_list(value, 'variables') if var.strip())
+
+
+def expand_extract(entry: Dict[str, Any], defaults: Dict[str, Any]) -> List[ExtractUnit]:
+    """
+    Expand one manifest entry into its units.
+
+    Raises:
+        ValueError: If the entry is missing tables, years or geographies or
+            names an unknown survey
+    """
+    acs_type = entry.get('acs_type', defaults.get('acs_type', 'acs5'))
+    if acs_type not in ACS_TYPES:
+        raise ValueError(f"Unknown acs_type '{acs_type}' (expected one of {', '.join(ACS_TYPES)})")
+    tables = [str(table).strip().upper() for table in _as_list(entry.get('tables'), 'tables')]
+    years = [int(year) for year in _as_list(entry.get('years'), 'years')]
+    geographies = [str(geo).strip() for geo in _as_list(entry.get('geographies'), 'geographies')]
+    for field, values in (('tables', tables), ('years', years), ('geographies', geographies)):
+        if not values:
+            raise ValueError(f"Manifest entry {entry} has no {field}")
+    variables = _variables(entry.get('variables', defaults.get('variables')))
+
+    return [ExtractUnit(table, year, acs_type, geography, variables)
+            for table in tables for year in years for geography in geographies]
+
+
+def load_manifest(path: str) -> Manifest:
+    """
+    Read a manifest file and expand it into extraction units.
+
+    Units are returned in manifest order with duplicates removed.
+
+    Raises:
+        ValueError: If the manifest is malformed
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if path.endswith(('.yaml', '.yml')):
+        if yaml is None:
+            raise ValueError("YAML manifests need the PyYAML package; install it or use JSON")
+        document = yaml.safe_load(text)
+    else:
+        document = json.loads(text)
+    if not isinstance(document, dict) or not document.get('extracts'):
+        raise ValueError(f"Manifest {path} has no 'extracts' list")
+
+    units = {}
+    for entry in _as_list(document['extracts'], 'extracts'):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Manifest entry {entry!r} is not a mapping")
+        for unit in expand_extract(entry, document):
+            units.setdefault(unit.key, unit)
+
+    concurrency = document.get('concurrency')
+    return Manifest(units=list(units.values()),
+                    api_key=(clean_api_key(document.get('api_key'))
+                             or clean_api_key(os.getenv('CENSUS_API_KEY'))),
+                    concurrency=int(concurrency) if concurrency else None,
+                    output=document.get('output'))
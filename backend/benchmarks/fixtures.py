@@ -0,0 +1,209 @@
+"""
+Fixtures replayed by the benchmark stub server.
+
+Layout of a fixtures directory:
+
+    variables/{year}_{acs_type}_{detailed|profile}.json   raw variables.json response
+    data/{year}_{acs_type}_{table}_{level}.json          raw group({table}) response for
+                                                         every geography of the level
+
+Fixtures are either recorded from the live API (needs network access and
+preferably an API key) or synthesized with the same shape and sizes
+comparable to a real table, so the suite also runs offline:
+
+    python -m benchmarks.fixtures record 2022 acs5 B25003 [--key KEY]
+    python -m benchmarks.fixtures synthesize [--tracts-per-state 250]
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+from census.geography import STATE_FIPS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+LEVELS = ('state', 'county', 'tract')
+LIVE_API_BASE = 'https://api.census.gov/data'
+
+# Synthetic table: 49 estimate rows, like B01001 (sex by age)
+SYNTHETIC_TABLE = 'B01001'
+SYNTHETIC_ROWS = 49
+
+
+def _write(path: str, payload) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, separators=(',', ':'))
+
+
+def table_type_name(table: str) -> str:
+    return 'profile' if table.startswith('DP') else 'detailed'
+
+
+def data_path(fixtures_dir: str, year, acs_type: str, table: str, level: str) -> str:
+    return os.path.join(fixtures_dir, 'data', f"{year}_{acs_type}_{table}_{level.replace(' ', '_')}.json")
+
+
+def variables_path(fixtures_dir: str, year, acs_type: str, table: str) -> str:
+    return os.path.join(fixtures_dir, 'variables', f'{year}_{acs_type}_{table_type_name(table)}.json')
+
+
+def record(year, acs_type: str, table: str, levels: Iterable[str] = LEVELS,
+           api_key: Optional[str] = None, fixtures_dir: str = FIXTURES_DIR) -> Dict[str, int]:
+    """
+    Record live API responses for a table as fixtures.
+
+    Args:
+        year: Year of data
+        acs_type: ACS survey type
+        table: Table name
+        levels: Geography levels to record; tracts are requested state by state
+        api_key: Optional Census API key
+        fixtures_dir: Directory to write into
+
+    Returns:
+        dict: Geography level -> rows recorded
+    """
+    dataset = f"{LIVE_API_BASE}/{year}/acs/{acs_type}{'/profile' if table.startswith('DP') else ''}"
+    params = {'key': api_key} if api_key else {}
+
+    response = requests.get(f'{dataset}/variables.json', timeout=120)
+    response.raise_for_status()
+    _write(variables_path(fixtures_dir, year, acs_type, table), response.json())
+
+    counts = {}
+    for level in levels:
+        clauses = ([{'for': 'tract:*', 'in': f'state:{fips}'} for fips in STATE_FIPS]
+                   if level == 'tract' else [{'for': f'{level}:*'}])
+        rows: List[List[str]] = []
+        for clause in clauses:
+            response = requests.get(dataset, params={'get': f'group({table})', **clause, **params},
+                                    timeout=120)
+            response.raise_for_status()
+            body = response.json()
+            rows = rows or body[:1]
+            rows.extend(body[1:])
+            print(f"Recorded {len(body) - 1} rows for {table} {clause}")  # Debug print
+        _write(data_path(fixtures_dir, year, acs_type, table, level), rows)
+        counts[level] = len(rows) - 1
+    return counts
+
+
+def synthesize(year=2022, acs_type: str = 'acs5', counties_per_state: int = 60,
+               tracts_per_state: int = 250, seed: int = 2022,
+               fixtures_dir: str = FIXTURES_DIR) -> Dict[str, int]:
+    """
+    Generate fixtures for a synthetic detailed table.
+
+    Values are deterministic for a seed. About 1% of MOEs are jam values, so
+    the annotation and missing-value paths are exercised as well.
+
+    Args:
+        year: Year the fixtures are filed under
+        acs_type: ACS survey type the fixtures are filed under
+        counties_per_state: County rows per state
+        tracts_per_state: Tract rows per state
+        seed: Random seed
+        fixtures_dir: Directory to write into
+
+    Returns:
+        dict: Geography level -> rows generated
+    """
+    table = SYNTHETIC_TABLE
+    rng = random.Random(seed)
+    codes = [f'{table}_{i:03d}' for i in range(1, SYNTHETIC_ROWS + 1)]
+
+    variables = {
+        'NAME': {'label': 'Geographic Area Name', 'concept': '', 'predicateType': 'string', 'group': 'N/A'},
+        'GEO_ID': {'label': 'Geography', 'concept': '', 'predicateType': 'string', 'group': 'N/A'},
+    }
+    for i, code in enumerate(codes):
+        label = 'Total:' if i == 0 else f"Total:!!{'Male' if i < 25 else 'Female'}:!!Category {i}"
+        concept = 'SEX BY AGE'
+        variables[f'{code}E'] = {'label': f'Estimate!!{label}', 'concept': concept,
+                                 'predicateType': 'int', 'group': table}
+        variables[f'{code}M'] = {'label': f'Margin of Error!!{label}', 'concept': concept,
+                                 'predicateType': 'int', 'group': table}
+        variables[f'{code}EA'] = {'label': f'Annotation of Estimate!!{label}', 'concept': concept,
+                                  'predicateType': 'string', 'group': table}
+        variables[f'{code}MA'] = {'label': f'Annotation of Margin of Error!!{label}',
+                                  'concept': concept, 'predicateType': 'string', 'group': table}
+    _write(variables_path(fixtures_dir, year, acs_type, table), {'variables': variables})
+
+    header = ['GEO_ID', 'NAME'] + [f'{code}{suffix}' for code in codes
+                                   for suffix in ('E', 'EA', 'M', 'MA')]
+
+    def values(scale: int) -> List[str]:
+        out = []
+        for _ in codes:
+            estimate = rng.randint(0, scale)
+            moe = rng.randint(1, max(2, scale // 10))
+            if rng.random() < 0.01:
+                out += [str(estimate), None, '-555555555', '*****']
+            else:
+                out += [str(estimate), None, str(moe), None]
+        return out
+
+    geographies = {
+        'state': [(f'0400000US{s}', f'State {s}', [s], 500000) for s in STATE_FIPS],
+        'county': [(f'0500000US{s}{c:03d}', f'County {c:03d}, State {s}', [s, f'{c:03d}'], 50000)
+                   for s in STATE_FIPS for c in range(1, 2 * counties_per_state, 2)],
+        'tract': [(f'1400000US{s}{1 + t % counties_per_state * 2:03d}{t:06d}', f'Census Tract {t}',
+                   [s, f'{1 + t % counties_per_state * 2:03d}', f'{t:06d}'], 5000)
+                  for s in STATE_FIPS for t in range(100, 100 + tracts_per_state)],
+    }
+    geo_columns = {'state': ['state'], 'county': ['state', 'county'],
+                   'tract': ['state', 'county', 'tract']}
+
+    counts = {}
+    for level, rows in geographies.items():
+        body = [header + geo_columns[level]]
+        body += [[geo_id, name] + values(scale) + codes_ for geo_id, name, codes_, scale in rows]
+        _write(data_path(fixtures_dir, year, acs_type, table, level), body)
+        counts[level] = len(rows)
+    return counts
+
+
+def ensure_fixtures(fixtures_dir: str = FIXTURES_DIR, year=2022, acs_type: str = 'acs5') -> str:
+    """Synthesize fixtures unless the directory already has some; returns the table to benchmark."""
+    data_dir = os.path.join(fixtures_dir, 'data')
+    if os.path.isdir(data_dir):
+        for name in sorted(os.listdir(data_dir)):
+            if name.startswith(f'{year}_{acs_type}_') and name.endswith('_state.json'):
+                return name[len(f'{year}_{acs_type}_'):-len('_state.json')]
+    synthesize(year, acs_type, fixtures_dir=fixtures_dir)
+    return SYNTHETIC_TABLE
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Record or synthesize benchmark fixtures.')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Record live API responses')
+    record_parser.add_argument('year')
+    record_parser.add_argument('acs_type', choices=['acs1', 'acs5'])
+    record_parser.add_argument('table')
+    record_parser.add_argument('--levels', default=','.join(LEVELS))
+    record_parser.add_argument('--key', default=os.getenv('CENSUS_API_KEY'))
+
+    synth_parser = commands.add_parser('synthesize', help='Generate a synthetic table')
+    synth_parser.add_argument('--year', default='2022')
+    synth_parser.add_argument('--acs-type', default='acs5')
+    synth_parser.add_argument('--counties-per-state', type=int, default=60)
+    synth_parser.add_argument('--tracts-per-state', type=int, default=250)
+    synth_parser.add_argument('--seed', type=int, default=2022)
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        counts = record(args.year, args.acs_type, args.table.upper(), args.levels.split(','),
+                        args.key, args.fixtures)
+    else:
+        counts = synthesize(args.year, args.acs_type, args.counties_per_state,
+                            args.tracts_per_state, args.seed, args.fixtures)
+    for level, rows in counts.items():
+        print(f"{level}: {rows} rows")
@@ -0,0 +1,130 @@
+"""
+Micro-benchmark of result-frame construction on a wide group(DP02)-shaped table.
+
+Compares the previous pipeline (a DataFrame built from the row lists, typed
+with apply_schema, then one df.rename per variable) with build_frame, which
+types and labels the columns in a single pass. Reports the median wall time
+and peak traced allocation of each. No network or stub server is needed.
+
+Run from the backend directory:
+
+    python -m benchmarks.frame_builder [--rows 3222] [--variables 154] [--repeat 5]
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from census.frames import build_frame
+from census.schema import typed_columns
+
+TABLE = 'DP02'
+# DP02 publishes estimate, MOE, percent and percent MOE, each with an annotation
+SUFFIXES = ('E', 'EA', 'M', 'MA', 'PE', 'PEA', 'PM', 'PMA')
+
+
+def apply_schema(frame: pd.DataFrame, metadata: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    Convert a raw Census result frame to typed columns (the pre-build_frame
+    typing step, kept here as the benchmark's reference).
+
+    Args:
+        frame: Result frame with string values, as returned by the API
+        metadata: Variable code -> metadata dict with a 'predicateType' entry
+            (see VariableMetadataCache.get); columns without one are left as is
+
+    Returns:
+        pd.DataFrame: Frame with numeric variables cast to int32/int64 (nullable
+            where jam values were found) or float32/float64, an annotation
+            column after each variable that had jam values, and categorical
+            geography columns
+    """
+    columns = dict(typed_columns(frame.items(), metadata, set(frame.columns)))
+    typed = pd.DataFrame(columns, index=frame.index)
+    typed.attrs = frame.attrs
+    return typed
+
+
+def synthetic_table(rows: int, variables: int, seed: int = 2) -> Tuple[List[List], Dict[str, Dict]]:
+    """API rows and metadata for a DP02-like table at county level."""
+    rng = random.Random(seed)
+    codes = [f'{TABLE}_{i:04d}' for i in range(1, variables + 1)]
+    metadata = {}
+    for code in codes:
+        for suffix in SUFFIXES:
+            kind = 'string' if suffix.endswith('A') else ('float' if 'P' in suffix else 'int')
+            metadata[f'{code}{suffix}'] = {'title': f'Estimate_{code}_{suffix}', 'predicateType': kind}
+
+    header = ['GEO_ID', 'NAME'] + [f'{code}{suffix}' for code in codes for suffix in SUFFIXES]
+    header += ['state', 'county']
+    body = []
+    for i in range(rows):
+        row = [f'0500000US{i:05d}', f'County {i}']
+        for _ in codes:
+            estimate = rng.randint(0, 50000)
+            row += [str(estimate), None, str(rng.randint(1, 900)), None,
+                    f'{rng.uniform(0, 100):.1f}', None,
+                    '-888888888' if rng.random() < 0.02 else f'{rng.uniform(0, 5):.1f}', None]
+        row += [f'{i // 60:02d}', f'{i % 60:03d}']
+        body.append(row)
+    return [header] + body, metadata
+
+
+def legacy_pipeline(rows: List[List], metadata: Dict[str, Dict]) -> pd.DataFrame:
+    """Construction as the routes did it before build_frame."""
+    df = pd.DataFrame(rows[1:], columns=rows[0])
+    df = apply_schema(df, metadata)
+    titles = {code: entry['title'] for code, entry in metadata.items()}
+    for code in [col for col in df.columns if col != 'NAME' and not col.startswith('GEO_ID')]:
+        if code in titles:
+            df = df.rename(columns={code: f"{code}: {titles[code]}"})
+    return df
+
+
+def single_pass(rows: List[List], metadata: Dict[str, Dict]) -> pd.DataFrame:
+    return build_frame(rows, metadata, labels=True)
+
+
+def measure(build: Callable, rows, metadata, repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(rows, metadata)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        frame = build(rows, metadata)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': statistics.median(timings), 'peak_mb': peak / 1024 ** 2,
+            'columns': frame.shape[1]}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Benchmark result-frame construction.')
+    parser.add_argument('--rows', type=int, default=3222, help='Geographies (3222 = all counties)')
+    parser.add_argument('--variables', type=int, default=154, help='Variables in the table')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rows, metadata = synthetic_table(args.rows, args.variables)
+    print(f"{TABLE}-shaped table: {len(rows) - 1} rows x {len(rows[0])} columns")
+    results = {'legacy': measure(legacy_pipeline, rows, metadata, args.repeat),
+               'build_frame': measure(single_pass, rows, metadata, args.repeat)}
+    for name, result in results.items():
+        print(f"{name:<12} {result['seconds']:>8.3f}s {result['peak_mb']:>9.1f} MB peak "
+              f"({result['columns']} columns)")
+    legacy, current = results['legacy'], results['build_frame']
+    print(f"speedup {legacy['seconds'] / current['seconds']:.1f}x, "
+          f"peak allocation {(1 - current['peak_mb'] / legacy['peak_mb']) * 100:.0f}% lower")
+
+
+if __name__ == '__main__':
+    main()
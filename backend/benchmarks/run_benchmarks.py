@@ -0,0 +1,276 @@
+"""
+End-to-end benchmarks against the local Census API stub.
+
+Each scenario pulls a whole table at one geography level:
+
+    small    state:*    one request
+    medium   county:*   one request, ~60x the rows
+    large    tract:*    one request per state (fan-out), ~250x the rows
+
+and measures these paths:
+
+    metadata      get_variable_names with an empty metadata cache
+    fetch_cold    fetch_and_save_data with empty metadata and response caches
+    fetch_warm    fetch_and_save_data answered from the caches
+    render        POST /process_data (fetch from cache, type, label, render HTML)
+
+For each one the runner records the median wall time over the repeats, the
+throughput in rows and stub requests per second, and the peak traced Python
+heap (tracemalloc, measured in a separate run so it does not skew timings).
+
+Results are compared with benchmarks/baseline.json. Any time or memory figure
+more than --threshold above its baseline counts as a regression and makes
+the exit status 1. Record a new baseline with --save-baseline. Baselines are
+only comparable on the same machine with the same stub settings.
+
+Run from the backend directory:
+
+    python -m benchmarks.run_benchmarks [--scenarios small,medium] [--latency 0.02] [--save-baseline]
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from benchmarks.stub_server import CensusStub
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+YEAR = '2022'
+ACS_TYPE = 'acs5'
+
+SCENARIOS = {
+    'small': 'state:*',
+    'medium': 'county:*',
+    'large': 'tract:*',
+}
+
+# Lower is better for these; a rise beyond the threshold is a regression
+COMPARED_METRICS = ('seconds', 'peak_mb')
+
+
+def _configure_environment(stub_url: str, work_dir: str) -> None:
+    """Point the app at the stub and at scratch cache directories; must run before app imports."""
+    os.environ['CENSUS_API_BASE'] = stub_url
+    os.environ['OUTPUT_FORMAT'] = 'csv'
+    os.environ['STREAMING_OUTPUT'] = 'false'
+    os.environ.pop('LOCAL_STORE_URL', None)
+    # The stub has no quota; the keyless daily budget would throttle the runs
+    os.environ['CENSUS_QUOTA_ENABLED'] = 'false'
+    for name, sub_dir in (('METADATA_CACHE_DIR', 'metadata'), ('RESPONSE_CACHE_DIR', 'responses'),
+                          ('VARIABLE_INDEX_DIR', 'variable_index'), ('CROSSWALK_DIR', 'crosswalk'),
+                          ('DATASET_DIR', 'dataset')):
+        os.environ[name] = os.path.join(work_dir, 'cache', sub_dir)
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+
+def _measure(run: Callable[[], int], stub: CensusStub, repeat: int,
+             before: Callable[[], None] = lambda: None) -> Dict[str, Any]:
+    """
+    Time run() over several repeats, then trace its peak memory once.
+
+    Args:
+        run: Benchmarked call; returns the number of rows it produced
+        stub: Stub server, for request counts
+        repeat: Timed repetitions
+        before: Reset called (untimed) before every repetition
+
+    Returns:
+        dict: seconds (median), rows, requests, rows_per_second, requests_per_second, peak_mb
+    """
+    timings = []
+    for _ in range(repeat):
+        before()
+        stub.reset_stats()
+        start = time.perf_counter()
+        rows = run()
+        timings.append(time.perf_counter() - start)
+    requests_made = stub.stats['requests']
+
+    before()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = statistics.median(timings)
+    return {
+        'seconds': round(seconds, 4),
+        'rows': rows,
+        'requests': requests_made,
+        'rows_per_second': round(rows / seconds, 1) if seconds else None,
+        'requests_per_second': round(requests_made / seconds, 1) if seconds else None,
+        'peak_mb': round(peak / 1024 ** 2, 2),
+    }
+
+
+def run_scenarios(scenarios, stub: CensusStub, table: str, repeat: int) -> Dict[str, Dict]:
+    """Run every benchmark for each scenario and return the results keyed by scenario and path."""
+    import app as webapp
+    from census.metadata_cache import metadata_cache
+    from census.query import get_table_type
+    from census.response_cache import response_cache
+
+    table_type = get_table_type(table)
+    csv_path = os.path.join('census_data', f'{table}_{YEAR}_{ACS_TYPE}.csv')
+
+    def clear_metadata():
+        metadata_cache.invalidate(YEAR, ACS_TYPE, table_type)
+
+    def clear_all():
+        clear_metadata()
+        shutil.rmtree(response_cache.cache_dir, ignore_errors=True)
+
+    client = webapp.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+
+    results = {}
+    for name in scenarios:
+        geography = SCENARIOS[name]
+
+        def metadata():
+            webapp.get_variable_names(YEAR, None, [], ACS_TYPE, table_type)
+            return len(metadata_cache.get(YEAR, ACS_TYPE, table_type))
+
+        def fetch():
+            result = webapp.fetch_and_save_data(YEAR, table, ACS_TYPE, False, '', geography, None)
+            if 'error' in result:
+                raise RuntimeError(result['error'])
+            with open(csv_path, newline='') as f:
+                return sum(1 for _ in csv.reader(f)) - 2
+
+        def render():
+            response = client.post('/process_data', json={
+                'year_select': YEAR, 'acs_type': ACS_TYPE, 'table_select': table,
+                'data_option': 'entire_table', 'selected_variables': '', 'geography': geography})
+            body = response.get_data(as_text=True)
+            if response.status_code != 200 or 'Error processing data' in body:
+                raise RuntimeError(f'render failed with status {response.status_code}')
+            return body.count('<tr>')
+
+        print(f"Running {name} ({geography})...")  # Debug print
+        results[name] = {
+            'metadata': _measure(metadata, stub, repeat, before=clear_metadata),
+            'fetch_cold': _measure(fetch, stub, repeat, before=clear_all),
+            'fetch_warm': _measure(fetch, stub, repeat),
+            'render': _measure(render, stub, repeat),
+        }
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float):
+    """List (scenario, path, metric, baseline, current) for figures above baseline * (1 + threshold)."""
+    regressions = []
+    for scenario, paths in results.items():
+        for path, metrics in paths.items():
+            reference = baseline.get(scenario, {}).get(path)
+            if not reference:
+                continue
+            for metric in COMPARED_METRICS:
+                old, new = reference.get(metric), metrics.get(metric)
+                if old and new is not None and new > old * (1 + threshold):
+                    regressions.append((scenario, path, metric, old, new))
+    return regressions
+
+
+def print_table(results: Dict[str, Dict], baseline: Dict[str, Dict]) -> None:
+    print(f"{'scenario':<8} {'path':<11} {'seconds':>9} {'vs base':>8} {'rows/s':>11} "
+          f"{'req/s':>8} {'peak MB':>8} {'vs base':>8}")
+    for scenario, paths in results.items():
+        for path, m in paths.items():
+            reference = baseline.get(scenario, {}).get(path, {})
+
+            def change(metric):
+                old = reference.get(metric)
+                return f'{(m[metric] / old - 1) * 100:+.0f}%' if old else '-'
+
+            print(f"{scenario:<8} {path:<11} {m['seconds']:>9.4f} {change('seconds'):>8} "
+                  f"{m['rows_per_second'] or 0:>11.0f} {m['requests_per_second'] or 0:>8.1f} "
+                  f"{m['peak_mb']:>8.2f} {change('peak_mb'):>8}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the data paths against a local Census API stub.')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every stub response')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of data requests answered 503')
+    parser.add_argument('--payload-scale', type=int, default=1, help='Repeat each fixture row this many times')
+    parser.add_argument('--fixtures', default=os.path.join(BENCHMARK_DIR, 'fixtures'))
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed relative increase over the baseline')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--output', help='Also write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    fixtures_dir = os.path.abspath(args.fixtures)
+    baseline_path = os.path.abspath(args.baseline)
+    output_path = os.path.abspath(args.output) if args.output else None
+    settings = {'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+                'payload_scale': args.payload_scale, 'repeat': args.repeat}
+
+    stub = CensusStub(fixtures_dir, args.latency, args.jitter, args.error_rate,
+                      args.payload_scale, seed=0).start()
+    work_dir = tempfile.mkdtemp(prefix='acs-bench-')
+    cwd = os.getcwd()
+    try:
+        _configure_environment(stub.url, work_dir)
+        from benchmarks.fixtures import ensure_fixtures
+        table = ensure_fixtures(fixtures_dir, YEAR, ACS_TYPE)
+        os.chdir(work_dir)
+        results = run_scenarios(scenarios, stub, table, args.repeat)
+    finally:
+        os.chdir(cwd)
+        stub.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {'table': table, 'settings': settings, 'python': platform.python_version(),
+              'machine': platform.machine(), 'results': results}
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            saved = json.load(f)
+        if saved.get('settings') != settings or saved.get('table') != table:
+            print("Baseline was recorded with different settings; comparison skipped")
+        else:
+            baseline = saved['results']
+
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for scenario, path, metric, old, new in regressions:
+        print(f"REGRESSION {scenario}/{path} {metric}: {old} -> {new}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
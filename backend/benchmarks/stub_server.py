@@ -0,0 +1,208 @@
+"""
+Local stand-in for the Census API used by the benchmark suite.
+
+Replays recorded variables.json and data responses from a fixtures
+directory (see benchmarks/fixtures.py for the layout), with configurable
+latency, error rate and payload size. Point the app at it with
+CENSUS_API_BASE=http://127.0.0.1:<port>.
+
+Run standalone with:
+
+    python -m benchmarks.stub_server --fixtures benchmarks/fixtures --port 8765 --latency 0.05
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+@lru_cache(maxsize=None)
+def _load(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class CensusStub:
+    """Threaded HTTP server replaying fixture responses."""
+
+    def __init__(self, fixtures_dir: str, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, payload_scale: int = 1, port: int = 0,
+                 seed: Optional[int] = None):
+        """
+        Initialize the stub.
+
+        Args:
+            fixtures_dir: Directory holding variables/ and data/ fixtures
+            latency: Seconds added to every response
+            jitter: Extra random latency, uniform in [0, jitter) seconds
+            error_rate: Fraction of data requests answered with 503
+            payload_scale: Repeat each data row this many times (with distinct
+                geography codes) to grow response size
+            port: Port to listen on (0 picks a free one)
+            seed: Seed for the latency and error randomness
+        """
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.payload_scale = payload_scale
+        self.port = port
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'errors': 0, 'bytes': 0}
+        self._stats_lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def start(self) -> 'CensusStub':
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.stats = {'requests': 0, 'errors': 0, 'bytes': 0}
+
+    def _find(self, kind: str, name: str) -> Optional[str]:
+        """Fixture path for name, falling back to the same fixture from another year."""
+        path = os.path.join(self.fixtures_dir, kind, f'{name}.json')
+        if os.path.exists(path):
+            return path
+        _, rest = name.split('_', 1)
+        matches = sorted(glob.glob(os.path.join(self.fixtures_dir, kind, f'*_{rest}.json')))
+        return matches[-1] if matches else None
+
+    def _respond(self, handler, status: int, body: bytes) -> None:
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        # Counted before writing so a client that has its response sees it in stats
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += len(body)
+            if status != 200:
+                self.stats['errors'] += 1
+        handler.wfile.write(body)
+
+    def _handle(self, handler) -> None:
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        url = urlparse(handler.path)
+        parts = [part for part in url.path.split('/') if part]
+        # /{year}/acs/{acs_type}[/profile]/variables.json or /{year}/acs/{acs_type}[/profile]
+        if len(parts) < 3 or parts[1] != 'acs':
+            return self._respond(handler, 404, b'"unknown endpoint"')
+        year, acs_type = parts[0], parts[2]
+        table_type = 'profile' if 'profile' in parts[3:] else 'detailed'
+
+        if parts[-1] == 'variables.json':
+            path = self._find('variables', f'{year}_{acs_type}_{table_type}')
+            if path is None:
+                return self._respond(handler, 404, b'"no variables fixture"')
+            return self._respond(handler, 200, json.dumps(_load(path)).encode('utf-8'))
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self._respond(handler, 503, b'"simulated outage"')
+        query = parse_qs(url.query)
+        try:
+            body = self._data(year, acs_type, query)
+        except LookupError as e:
+            return self._respond(handler, 400, json.dumps(str(e)).encode('utf-8'))
+        self._respond(handler, 200, body)
+
+    def _data(self, year: str, acs_type: str, query: Dict[str, List[str]]) -> bytes:
+        fields = query['get'][0].split(',')
+        level, _, code = query['for'][0].partition(':')
+        parents = {}
+        for clause in query.get('in', []):
+            for constraint in clause.split():
+                parent, _, parent_code = constraint.partition(':')
+                parents[parent] = parent_code
+
+        table = next((f[6:-1] for f in fields if f.startswith('group(')), None)
+        if table is None:
+            table = next(f for f in fields if f not in ('NAME', 'GEO_ID')).split('_')[0]
+        state = parents.get('state')
+        name = f"{year}_{acs_type}_{table}_{level.replace(' ', '_')}"
+        path = (self._find('data', f'{name}_{state}') if state and state != '*' else None) \
+            or self._find('data', name)
+        if path is None:
+            raise LookupError(f"no data fixture for {name}")
+
+        rows = _load(path)
+        header, data = rows[0], rows[1:]
+        if table and any(f.startswith('group(') for f in fields):
+            wanted = [col for col in header if col not in ('state', 'county', 'tract', 'block group')]
+        else:
+            wanted = fields
+        missing = [col for col in wanted if col not in header]
+        if missing:
+            raise LookupError(f"unknown variables: {','.join(missing)}")
+
+        geo_columns = [col for col in header if col in ('state', 'county', 'tract', 'block group',
+                                                         'place', 'us')]
+        for parent, parent_code in parents.items():
+            if parent in header and parent_code != '*':
+                index = header.index(parent)
+                data = [row for row in data if row[index] in parent_code.split(',')]
+        if code and code != '*' and level in header:
+            index = header.index(level)
+            data = [row for row in data if row[index] in code.split(',')]
+
+        indexes = [header.index(col) for col in wanted + geo_columns]
+        out = [wanted + geo_columns]
+        last = len(indexes) - 1
+        for copy in range(self.payload_scale):
+            for row in data:
+                values = [row[i] for i in indexes]
+                if copy:
+                    values[last] = f'{values[last]}{copy}'
+                out.append(values)
+        return json.dumps(out, separators=(',', ':')).encode('utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve recorded Census API fixtures.')
+    parser.add_argument('--fixtures', default=os.path.join(os.path.dirname(__file__), 'fixtures'))
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--payload-scale', type=int, default=1)
+    args = parser.parse_args()
+    stub = CensusStub(args.fixtures, args.latency, args.jitter, args.error_rate,
+                      args.payload_scale, args.port).start()
+    print(f"Census stub listening on {stub.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,138 @@
+"""
+Shared HTTP client for Census API calls.
+
+All outbound requests go through a single pooled requests.Session so
+connections to api.census.gov are kept alive and reused across requests.
+Each call gets connect/read timeouts, and 429/5xx responses or connection
+failures are retried a bounded number of times with jittered exponential
+backoff. Every attempt's latency and downloaded bytes are recorded in
+the /metrics registry.
+
+With a quota manager attached, each attempt first takes a token from the
+bucket of the request's API key (or the shared keyless bucket), queueing
+when the budget is spent, and a 429 empties that bucket for Retry-After.
+"""
+
+import random
+import time
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from census.quota import census_quota
+from telemetry.metrics import UPSTREAM_BYTES, UPSTREAM_SECONDS
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CensusClient:
+    """Pooled, keep-alive HTTP client with timeouts and retries."""
+
+    def __init__(self, max_connections_per_host: int = 10, host_pools: int = 4,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0, quota=None):
+        """
+        Initialize the client.
+
+        Args:
+            max_connections_per_host: Upper bound on open connections to a single host;
+                callers beyond it wait for a free connection
+            host_pools: Number of per-host connection pools to keep
+            connect_timeout: Seconds to wait for a TCP/TLS connection
+            read_timeout: Seconds to wait between bytes of the response
+            max_retries: Retries after the first attempt on 429/5xx or connection errors
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Cap on a single backoff delay in seconds
+            quota: Optional QuotaManager every attempt must take a token from
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.quota = quota
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=host_pools,
+                              pool_maxsize=max_connections_per_host,
+                              pool_block=True,
+                              max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Delay before the next attempt, honouring Retry-After when present."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, url: str, params: Optional[dict] = None,
+            timeout: Optional[tuple] = None, stream: bool = False) -> requests.Response:
+        """
+        Send a GET request with retries.
+
+        Args:
+            url: URL to fetch
+            params: Optional query parameters
+            timeout: Optional (connect, read) timeout overriding the client default
+            stream: Whether to defer downloading the response body
+
+        Returns:
+            requests.Response: The final response (possibly a non-200 once retries run out)
+
+        Raises:
+            requests.RequestException: If the request still fails to connect after all retries
+            QuotaExceeded: If the API key's quota would not allow the request in time
+        """
+        api_key = (params or {}).get('key') or parse_qs(urlparse(url).query).get('key', [None])[0]
+        attempt = 0
+        while True:
+            if self.quota is not None:
+                self.quota.acquire(api_key)
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params,
+                                            timeout=timeout or self.timeout,
+                                            stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                UPSTREAM_SECONDS.observe(time.perf_counter() - start, status='error')
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            # Streamed bodies are only counted when the server sends their length
+            UPSTREAM_SECONDS.observe(time.perf_counter() - start, status=response.status_code)
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit():
+                UPSTREAM_BYTES.inc(int(length))
+            elif not stream:
+                UPSTREAM_BYTES.inc(len(response.content))
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._backoff(attempt, response)
+                if response.status_code == 429 and self.quota is not None:
+                    self.quota.penalize(api_key, delay)
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+            return response
+
+
+census_client = CensusClient(
+    max_connections_per_host=config.CENSUS_MAX_CONNECTIONS_PER_HOST,
+    connect_timeout=config.CENSUS_CONNECT_TIMEOUT,
+    read_timeout=config.CENSUS_READ_TIMEOUT,
+    max_retries=config.CENSUS_MAX_RETRIES,
+    backoff_base=config.CENSUS_BACKOFF_BASE,
+    quota=census_quota,
+)
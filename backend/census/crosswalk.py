@@ -0,0 +1,241 @@
+"""
+Cross-year crosswalk of ACS variable codes.
+
+Variable codes and labels drift between vintages: data profile rows are
+renumbered, and detailed-table labels gain or lose punctuation. The crosswalk
+is built once per (acs_type, table type) from the cached variables.json of
+every year in CROSSWALK_FIRST_YEAR..CROSSWALK_LAST_YEAR. Each variable gets a
+comparability key (its group plus a normalized label). Two codes in different
+years are equivalent when they share a key. If a code reappears under a
+different key, the series breaks.
+
+The result is stored as one Parquet lookup table (year, code, key, label), so
+multi-year requests resolve codes for every year locally instead of loading
+each year's metadata.
+
+Building one takes a metadata fetch per year, too slow for a web request: a
+request for a crosswalk that has not been built starts the build on a
+background thread and gets CrosswalkNotReady until it is on disk. If the
+build fails, requests get CrosswalkUnavailable until a retry is due, so
+callers can fall back instead of waiting on a build that cannot finish.
+Build ahead of time with:
+
+    python -m census.crosswalk acs5 [acs1]
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+import config
+from census.metadata_cache import metadata_cache, sanitize_label
+from census.quota import PRIORITY_BACKGROUND, priority
+
+CROSSWALK_FORMAT_VERSION = 1
+TABLE_TYPES = ('', '/profile')
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class CrosswalkNotReady(Exception):
+    """Raised while a requested crosswalk is still being built in the background."""
+
+
+class CrosswalkUnavailable(Exception):
+    """Raised when the last build of a crosswalk failed and its retry is not yet due."""
+
+
+def normalize_label(label: str) -> str:
+    """Reduce a variable label to the parts that matter for comparability."""
+    parts = [_WHITESPACE.sub(' ', part).strip().rstrip(':').strip().lower()
+             for part in label.split('!!')]
+    return '|'.join(part for part in parts if part)
+
+
+def build_crosswalk(acs_type: str, table_type: str, years: Iterable) -> pd.DataFrame:
+    """
+    Build the lookup table from the metadata cache.
+
+    Years whose metadata cannot be loaded (e.g. the 2020 1-year release,
+    which was never published) are left out of the table.
+
+    Args:
+        acs_type: ACS survey type
+        table_type: '/profile' for data profile tables, '' for detailed tables
+        years: Years to include
+
+    Returns:
+        pd.DataFrame: Columns year, group, code, key and label
+    """
+    keys = {}
+    columns = {'year': [], 'group': [], 'code': [], 'key': [], 'label': []}
+    for year in years:
+        try:
+            entries = metadata_cache.get(year, acs_type, table_type)
+        except Exception as e:
+            print(f"Skipping {year} {acs_type}{table_type} in crosswalk: {str(e)}")  # Debug print
+            continue
+        for code, info in entries.items():
+            group, label = info.get('group', ''), info.get('label', '')
+            if not group or group == 'N/A' or label.startswith('Annotation of'):
+                continue
+            key = keys.setdefault(f'{group}|{normalize_label(label)}', len(keys))
+            columns['year'].append(str(year))
+            columns['group'].append(group)
+            columns['code'].append(code)
+            columns['key'].append(key)
+            columns['label'].append(label)
+
+    frame = pd.DataFrame(columns)
+    frame['key'] = frame['key'].astype('int32')
+    for column in ('year', 'group'):
+        frame[column] = frame[column].astype('category')
+    return frame
+
+
+class Crosswalk:
+    """Lookup over one (acs_type, table type) crosswalk table."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.years = set(frame['year'].astype(str).unique())
+
+    def resolve(self, table: str, variables: Optional[List[str]], base_year,
+                years: Iterable) -> Dict[str, Optional[Dict[str, Optional[str]]]]:
+        """
+        Find each base-year variable's equivalent code in other years.
+
+        Args:
+            table: Table (group) name
+            variables: Base-year codes; empty or None means every variable in the table
+            base_year: Year the codes are taken from
+            years: Years to resolve them for
+
+        Returns:
+            dict: year -> {base code: equivalent code, or None if the series
+                breaks or the variable does not exist that year}. A year
+                missing from the crosswalk maps to None. Codes the crosswalk
+                does not know for the base year map to themselves.
+        """
+        base_year = str(base_year)
+        frame = self.frame
+        base = frame[(frame['year'] == base_year) & (frame['group'] == table)]
+        if variables:
+            base = base[base['code'].isin(variables)]
+        base_codes = dict(zip(base['key'], base['code']))
+        known = set(base_codes.values())
+        unknown = [var for var in variables or [] if var not in known]
+
+        matches = frame[frame['key'].isin(base_codes) & frame['year'].isin(list(map(str, years)))]
+        by_year = {year: dict(zip(group['key'], group['code']))
+                   for year, group in matches.groupby('year', observed=True)}
+
+        resolved = {}
+        for year in map(str, years):
+            if base_year not in self.years or year not in self.years:
+                resolved[year] = None
+                continue
+            codes = by_year.get(year, {})
+            mapping = {code: codes.get(key) for key, code in base_codes.items()}
+            mapping.update({var: var for var in unknown})
+            resolved[year] = mapping
+        return resolved
+
+    def titles(self, year, codes: Iterable[str]) -> Dict[str, str]:
+        """Sanitized titles for codes as labelled in the given year."""
+        rows = self.frame[(self.frame['year'] == str(year)) & self.frame['code'].isin(list(codes))]
+        return {code: sanitize_label(label) for code, label in zip(rows['code'], rows['label'])}
+
+
+class CrosswalkStore:
+    """Persists, keeps loaded and builds in the background the per-survey crosswalks."""
+
+    def __init__(self, cache_dir: str, years: Iterable,
+                 retry_seconds: float = config.CROSSWALK_RETRY_SECONDS):
+        self.cache_dir = os.path.join(cache_dir, f'v{CROSSWALK_FORMAT_VERSION}')
+        self.years = [str(year) for year in years]
+        self.retry_seconds = retry_seconds
+        self._loaded = {}
+        self._building = set()
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    def path(self, acs_type: str, table_type: str) -> str:
+        return os.path.join(self.cache_dir, f"{acs_type}_{table_type.strip('/') or 'detailed'}.parquet")
+
+    def build(self, acs_type: str, table_type: str) -> Crosswalk:
+        """(Re)build a crosswalk from the metadata cache and persist it."""
+        frame = build_crosswalk(acs_type, table_type, self.years)
+        if frame.empty:
+            raise ValueError(f"No variable metadata available for {acs_type}{table_type}")
+        path = self.path(acs_type, table_type)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        frame.to_parquet(tmp_path, index=False, compression='zstd')
+        os.replace(tmp_path, path)
+        crosswalk = Crosswalk(frame)
+        with self._lock:
+            self._loaded[(acs_type, table_type)] = crosswalk
+        return crosswalk
+
+    def _build_in_background(self, acs_type: str, table_type: str) -> None:
+        try:
+            with priority(PRIORITY_BACKGROUND):
+                self.build(acs_type, table_type)
+        except Exception as e:
+            print(f"Crosswalk build for {acs_type}{table_type} failed: {str(e)}")  # Debug print
+            with self._lock:
+                self._failed[(acs_type, table_type)] = (time.time(), str(e))
+        finally:
+            with self._lock:
+                self._building.discard((acs_type, table_type))
+
+    def get(self, acs_type: str, table_type: str) -> Crosswalk:
+        """
+        Return a built crosswalk.
+
+        Raises:
+            CrosswalkNotReady: If it has not been built yet; its build is
+                started in the background (once per process)
+            CrosswalkUnavailable: If the last build failed less than
+                retry_seconds ago
+        """
+        key = (acs_type, table_type)
+        with self._lock:
+            crosswalk = self._loaded.get(key)
+            if crosswalk is not None:
+                return crosswalk
+            path = self.path(acs_type, table_type)
+            if os.path.exists(path):
+                crosswalk = self._loaded[key] = Crosswalk(pd.read_parquet(path))
+                return crosswalk
+            failed = self._failed.get(key)
+            if failed is not None and time.time() - failed[0] < self.retry_seconds:
+                raise CrosswalkUnavailable(f"The {acs_type} cross-year crosswalk could not be "
+                                           f"built: {failed[1]}")
+            if key not in self._building:
+                self._failed.pop(key, None)
+                self._building.add(key)
+                threading.Thread(target=self._build_in_background, args=key, daemon=True,
+                                 name=f'acs-crosswalk-{acs_type}').start()
+        raise CrosswalkNotReady(f"The {acs_type} cross-year crosswalk is still being built; "
+                                f"try again in a few minutes")
+
+
+crosswalks = CrosswalkStore(config.CROSSWALK_DIR,
+                            range(config.CROSSWALK_FIRST_YEAR, config.CROSSWALK_LAST_YEAR + 1))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('usage: python -m census.crosswalk ACS_TYPE [ACS_TYPE ...]')
+    for acs_type in sys.argv[1:]:
+        for table_type in TABLE_TYPES:
+            crosswalk = crosswalks.build(acs_type, table_type)
+            print(f"Built {acs_type}{table_type or ' detailed'} crosswalk: "
+                  f"{len(crosswalk.frame)} codes across {len(crosswalk.years)} years")
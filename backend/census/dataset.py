@@ -0,0 +1,152 @@
+"""
+Partitioned Parquet dataset of saved Census results.
+
+Results are written under a Hive-style layout:
+
+    {DATASET_DIR}/table=DP02/year=2022/acs_type=acs5/geography_level=county/{geography}.parquet
+
+Each file holds one geography pull. Pulling the same geography again replaces
+its file, and different pulls at the same level sit side by side. Variable
+labels, concepts and predicate types are stored as Arrow field metadata
+rather than as a title row, so any columnar reader can open the files.
+Reads prune partitions from the directory names and push column and row
+filters down to the Parquet scan.
+"""
+
+import hashlib
+import io
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import config
+from census.geography import parse_geography
+from census.response_cache import normalize_geography
+
+PARTITION_KEYS = ('year', 'acs_type', 'geography_level')
+
+# Partition directory values are read back as strings
+PARTITIONING = ds.partitioning(
+    pa.schema([(key, pa.string()) for key in PARTITION_KEYS]), flavor='hive')
+
+# Metadata entries copied onto each column's Arrow field
+FIELD_METADATA = ('label', 'title', 'concept', 'predicateType')
+
+
+def _partition_value(value) -> str:
+    return str(value).strip().replace(' ', '_')
+
+
+def table_path(table: str, root: Optional[str] = None) -> str:
+    """Directory holding every partition of a table."""
+    return os.path.join(root or config.DATASET_DIR, f'table={_partition_value(table)}')
+
+
+def partition_path(table: str, year, acs_type: str, geography: str,
+                   root: Optional[str] = None) -> str:
+    """Directory for one table/year/acs_type/geography level partition."""
+    level = parse_geography(geography)[0]
+    values = (year, acs_type, level)
+    return os.path.join(table_path(table, root),
+                        *(f'{key}={_partition_value(value)}'
+                          for key, value in zip(PARTITION_KEYS, values)))
+
+
+def to_arrow(frame: pd.DataFrame, metadata: Dict[str, Dict]) -> pa.Table:
+    """
+    Convert a result frame to an Arrow table with variable labels as field metadata.
+
+    Args:
+        frame: Result frame with variable codes as column names
+        metadata: Variable code -> metadata dict (see VariableMetadataCache.get)
+
+    Returns:
+        pa.Table: Table whose fields carry label, title, concept and predicateType
+    """
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    fields = []
+    for field in table.schema:
+        info = metadata.get(field.name) or {}
+        field_metadata = {key: str(info[key]) for key in FIELD_METADATA if info.get(key)}
+        fields.append(field.with_metadata(field_metadata) if field_metadata else field)
+    return pa.Table.from_arrays(table.columns,
+                                schema=pa.schema(fields, metadata=table.schema.metadata))
+
+
+def to_parquet_bytes(table: pa.Table) -> bytes:
+    """Serialize an Arrow table to an in-memory Parquet file."""
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression='zstd')
+    return buffer.getvalue()
+
+
+def write_partition(frame: pd.DataFrame, table: str, year, acs_type: str, geography: str,
+                    metadata: Dict[str, Dict], root: Optional[str] = None) -> str:
+    """
+    Write one geography pull into the dataset, replacing any earlier pull of it.
+
+    Args:
+        frame: Typed result frame (see census.frames.build_frame)
+        table: Table name (e.g. 'DP02')
+        year: Year of data
+        acs_type: ACS survey type
+        geography: Geography clause the frame was fetched with
+        metadata: Variable code -> metadata dict stored as field metadata
+        root: Dataset root (defaults to config.DATASET_DIR)
+
+    Returns:
+        str: Path of the written file
+    """
+    directory = partition_path(table, year, acs_type, geography, root)
+    os.makedirs(directory, exist_ok=True)
+    name = hashlib.sha256(normalize_geography(geography).encode('utf-8')).hexdigest()[:16]
+    path = os.path.join(directory, f'{name}.parquet')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    pq.write_table(to_arrow(frame, metadata), tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+    return path
+
+
+def scan_table(table: str, year=None, acs_type: Optional[str] = None,
+               geography_level: Optional[str] = None, columns: Optional[List[str]] = None,
+               root: Optional[str] = None) -> pa.Table:
+    """
+    Read a table from the dataset, touching only the matching partitions and columns.
+
+    Args:
+        table: Table name
+        year: Only this year, if given
+        acs_type: Only this survey type, if given
+        geography_level: Only this geography level (e.g. 'county'), if given
+        columns: Columns to read (partition keys may be included); all if None
+        root: Dataset root (defaults to config.DATASET_DIR)
+
+    Returns:
+        pa.Table: Matching rows, with year, acs_type and geography_level columns
+
+    Raises:
+        FileNotFoundError: If nothing has been saved for the table
+    """
+    path = table_path(table, root)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No dataset saved for table {table}")
+
+    expression = None
+    for key, value in zip(PARTITION_KEYS, (year, acs_type, geography_level)):
+        if value is not None:
+            clause = ds.field(key) == _partition_value(value)
+            expression = clause if expression is None else expression & clause
+
+    dataset = ds.dataset(path, format='parquet', partitioning=PARTITIONING,
+                         exclude_invalid_files=True)
+    # Pulls with different variable selections have different columns
+    fragments = list(dataset.get_fragments(filter=expression))
+    if fragments:
+        schema = pa.unify_schemas([fragment.physical_schema for fragment in fragments]
+                                  + [PARTITIONING.schema], promote_options='permissive')
+        dataset = ds.FileSystemDataset(fragments, schema, dataset.format, dataset.filesystem)
+    return dataset.to_table(columns=columns, filter=expression)
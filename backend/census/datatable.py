@@ -0,0 +1,142 @@
+"""
+Server-side processing for the DataTables results view.
+
+Implements the DataTables server-side protocol (paging, ordering, global
+and per-column search) against DataFrames held in an in-process LRU keyed
+by search, so the browser only receives the rows it is displaying.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Mapping
+
+import pandas as pd
+
+import config
+
+
+class SearchFrame:
+    """A cached result frame plus the lowercase text used for searching."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame.reset_index(drop=True)
+        self._text = None
+        self._lock = threading.Lock()
+
+    @property
+    def text(self) -> pd.DataFrame:
+        """Lowercase string copy of the frame, built on first search."""
+        with self._lock:
+            if self._text is None:
+                self._text = self.frame.apply(
+                    lambda col: col.astype('string').fillna('').str.lower())
+            return self._text
+
+
+class FrameCache:
+    """Small LRU of SearchFrames for the server-side table endpoint."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], pd.DataFrame]) -> SearchFrame:
+        """Return the cached frame for key, calling loader on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = SearchFrame(loader())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+def _sort_key(column: pd.Series) -> pd.Series:
+    """Sort numerically when every non-empty value parses as a number."""
+    numeric = pd.to_numeric(column, errors='coerce')
+    if numeric.notna().sum() == column.notna().sum():
+        return numeric
+    return column.astype(str).str.lower()
+
+
+def _to_cell(value: Any) -> Any:
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value is pd.NA:
+        return None
+    return str(value)
+
+
+def query_page(entry: SearchFrame, params: Mapping[str, str]) -> Dict[str, Any]:
+    """
+    Answer one DataTables server-side request.
+
+    Args:
+        entry: Cached frame to page through
+        params: Request arguments sent by DataTables (draw, start, length,
+            search[value], order[i][column], order[i][dir], columns[i][search][value], ...)
+
+    Returns:
+        dict: DataTables response with draw, recordsTotal, recordsFiltered and data
+    """
+    frame = entry.frame
+    columns = list(frame.columns)
+    mask = pd.Series(True, index=frame.index)
+
+    # Global search across searchable columns
+    term = (params.get('search[value]') or '').strip().lower()
+    searchable = [i for i in range(len(columns))
+                  if params.get(f'columns[{i}][searchable]', 'true') != 'false']
+    if term:
+        text = entry.text
+        hits = pd.Series(False, index=frame.index)
+        for i in searchable:
+            hits |= text.iloc[:, i].str.contains(term, regex=False)
+        mask &= hits
+
+    # Per-column search
+    for i in range(len(columns)):
+        column_term = (params.get(f'columns[{i}][search][value]') or '').strip().lower()
+        if column_term:
+            mask &= entry.text.iloc[:, i].str.contains(column_term, regex=False)
+
+    filtered = frame[mask] if not mask.all() else frame
+
+    # Ordering (multi-column, applied last to first so the first column wins)
+    order: List[tuple] = []
+    i = 0
+    while f'order[{i}][column]' in params:
+        column_index = int(params[f'order[{i}][column]'])
+        if 0 <= column_index < len(columns):
+            order.append((columns[column_index], params.get(f'order[{i}][dir]', 'asc') != 'desc'))
+        i += 1
+    for column, ascending in reversed(order):
+        filtered = filtered.sort_values(column, ascending=ascending, kind='stable',
+                                        key=_sort_key)
+
+    start = max(int(params.get('start', 0) or 0), 0)
+    length = int(params.get('length', config.DATATABLE_DEFAULT_PAGE_LENGTH) or 0)
+    if length < 0:
+        length = config.DATATABLE_MAX_PAGE_LENGTH
+    length = min(length, config.DATATABLE_MAX_PAGE_LENGTH)
+    page = filtered.iloc[start:start + length]
+
+    return {
+        'draw': int(params.get('draw', 0) or 0),
+        'recordsTotal': len(frame),
+        'recordsFiltered': len(filtered),
+        'data': [[_to_cell(value) for value in row]
+                 for row in page.itertuples(index=False, name=None)],
+    }
+
+
+frame_cache = FrameCache(config.DATATABLE_CACHE_ENTRIES)
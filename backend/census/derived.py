@@ -0,0 +1,184 @@
+"""
+Derived estimates with margin-of-error propagation.
+
+Derived variables combine estimate columns of a result frame. Each one
+produces an estimate column and a '<name>_MOE' column. Margins of error use
+the approximation formulas from the Census Bureau's ACS handbook
+("Understanding and Using ACS Data", chapter 8):
+
+    sum / difference   MOE = sqrt(sum of MOE_i^2); among terms whose estimate is
+                       zero, only the largest MOE is included
+    proportion p=X/Y   MOE = sqrt(MOE_X^2 - p^2 * MOE_Y^2) / Y, falling back to
+                       the ratio formula when the value under the root is negative
+    ratio R=X/Y        MOE = sqrt(MOE_X^2 + R^2 * MOE_Y^2) / Y
+    percent            proportion * 100
+    product P=A*B      MOE = sqrt(A^2 * MOE_B^2 + B^2 * MOE_A^2)
+
+Every formula runs on whole columns at once. A missing estimate (jam value)
+makes the derived value missing. A controlled estimate ('*****'
+annotation) has no sampling error, so its MOE counts as zero.
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+OPERATIONS = ('sum', 'difference', 'proportion', 'percent', 'ratio', 'product')
+
+_NAME = re.compile(r'^[A-Za-z][A-Za-z0-9_]{0,62}$')
+
+
+def moe_code(code: str) -> str:
+    """MOE variable code for an estimate code (B01001_002E -> B01001_002M)."""
+    return code[:-1] + 'M' if code.endswith('E') else f'{code}_MOE'
+
+
+def validate_definition(definition: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check and normalize a derived-variable definition.
+
+    Args:
+        definition: dict with name, op and either terms (sum, difference, product) or
+            numerator and denominator (proportion, percent, ratio); each of
+            terms, numerator and denominator is a code or a list of codes
+            (a list is summed first)
+
+    Returns:
+        dict: Normalized definition
+
+    Raises:
+        ValueError: If the definition is incomplete or malformed
+    """
+    def codes(value) -> List[str]:
+        if isinstance(value, str):
+            value = value.split(',')
+        return [code.strip() for code in value or [] if code.strip()]
+
+    name = str(definition.get('name', '')).strip()
+    op = definition.get('op')
+    if not _NAME.match(name):
+        raise ValueError("Derived variable names must start with a letter and use letters, digits or _")
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown operation {op!r}; expected one of {', '.join(OPERATIONS)}")
+
+    if op in ('sum', 'difference'):
+        terms = codes(definition.get('terms'))
+        if len(terms) < 2:
+            raise ValueError(f"A {op} needs at least two terms")
+        return {'name': name, 'op': op, 'terms': terms}
+    if op == 'product':
+        terms = codes(definition.get('terms'))
+        if len(terms) != 2:
+            raise ValueError("A product needs exactly two terms")
+        return {'name': name, 'op': op, 'terms': terms}
+
+    numerator, denominator = codes(definition.get('numerator')), codes(definition.get('denominator'))
+    if not numerator or not denominator:
+        raise ValueError(f"A {op} needs a numerator and a denominator")
+    return {'name': name, 'op': op, 'numerator': numerator, 'denominator': denominator}
+
+
+def _numeric(frame: pd.DataFrame, column: str) -> np.ndarray:
+    return pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _columns(frame: pd.DataFrame, codes: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack estimate and MOE columns for codes into (rows x codes) arrays."""
+    missing = [code for code in codes + [moe_code(c) for c in codes] if code not in frame.columns]
+    if missing:
+        raise ValueError(f"Columns not in this result: {', '.join(missing)}")
+    estimates = np.column_stack([_numeric(frame, code) for code in codes])
+    moes = np.column_stack([_numeric(frame, moe_code(code)) for code in codes])
+
+    # Controlled estimates carry no sampling error
+    for i, code in enumerate(codes):
+        annotation = f'{moe_code(code)}A'
+        if annotation in frame.columns:
+            controlled = (frame[annotation].astype('string') == '*****').to_numpy(dtype=bool, na_value=False)
+            moes[controlled, i] = 0.0
+    return estimates, np.abs(moes)
+
+
+def _aggregate(estimates: np.ndarray, moes: np.ndarray, signs: np.ndarray):
+    """Signed sum of estimates with the sum/difference MOE approximation."""
+    estimate = estimates @ signs
+    squared = moes ** 2
+    zero = estimates == 0
+    moe = np.sqrt(np.where(zero, 0.0, squared).sum(axis=1)
+                  + np.where(zero, squared, 0.0).max(axis=1))
+    return estimate, np.where(np.isnan(estimate), np.nan, moe)
+
+
+def _combine(frame: pd.DataFrame, codes: List[str], signs=None):
+    estimates, moes = _columns(frame, codes)
+    signs = np.ones(len(codes)) if signs is None else signs
+    return _aggregate(estimates, moes, signs)
+
+
+def compute(frame: pd.DataFrame, definition: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute one derived variable over every row of a frame.
+
+    Args:
+        frame: Result frame with estimate and MOE columns named by variable code
+        definition: Normalized definition (see validate_definition)
+
+    Returns:
+        tuple: (estimate array, MOE array)
+
+    Raises:
+        ValueError: If a referenced column is missing from the frame
+    """
+    op = definition['op']
+    if op in ('sum', 'difference'):
+        terms = definition['terms']
+        signs = np.ones(len(terms))
+        if op == 'difference':
+            signs[1:] = -1
+        return _combine(frame, terms, signs)
+    if op == 'product':
+        a, moe_a = _combine(frame, definition['terms'][:1])
+        b, moe_b = _combine(frame, definition['terms'][1:])
+        return a * b, np.sqrt(a ** 2 * moe_b ** 2 + b ** 2 * moe_a ** 2)
+
+    x, moe_x = _combine(frame, definition['numerator'])
+    y, moe_y = _combine(frame, definition['denominator'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.where(y == 0, np.nan, y)
+        value = x / y
+        if op == 'ratio':
+            moe = np.sqrt(moe_x ** 2 + value ** 2 * moe_y ** 2) / y
+        else:
+            under = moe_x ** 2 - value ** 2 * moe_y ** 2
+            under = np.where(under < 0, moe_x ** 2 + value ** 2 * moe_y ** 2, under)
+            moe = np.sqrt(under) / y
+    if op == 'percent':
+        value, moe = value * 100, moe * 100
+    return value, moe
+
+
+def apply_derived(frame: pd.DataFrame, definitions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Add derived estimate and MOE columns to a frame.
+
+    Definitions are computed in order, so later ones may use earlier derived
+    variables as inputs.
+
+    Args:
+        frame: Result frame with columns named by variable code
+        definitions: Derived-variable definitions
+
+    Returns:
+        pd.DataFrame: Copy of the frame with '<name>' and '<name>_MOE' columns added
+
+    Raises:
+        ValueError: If a definition is malformed or references missing columns
+    """
+    for definition in definitions or []:
+        definition = validate_definition(definition)
+        estimate, moe = compute(frame, definition)
+        frame = frame.assign(**{definition['name']: estimate,
+                                f"{definition['name']}_MOE": moe})
+    return frame
@@ -0,0 +1,10 @@
+"""
+Exceptions shared across the census package.
+
+Kept free of imports so low-level modules (the quota manager, the HTTP
+client) can raise them without importing census.query.
+"""
+
+
+class CensusAPIError(Exception):
+    """Raised when the Census API returns an error or no usable data."""
@@ -0,0 +1,162 @@
+"""
+Single-pass construction of result frames.
+
+Every route turns a Census result into the same thing: typed columns
+(see census.schema), optionally renamed to "code: title" labels and with
+constant columns such as Year appended. build_frame does all of it while
+walking the columns once and builds the DataFrame with a single
+constructor call, so no step copies the whole frame. Its source is either
+the raw API rows (header row first) or an already-parsed frame, such as
+one read back from the response cache.
+
+Use label_frame to relabel a frame that is already typed; it shares the
+column data instead of copying it.
+
+Typing adds an annotation column only where jam values turn up, so pieces
+of one result (fan-out units, streamed batches) can type to different
+columns. Outputs written piece by piece, and every CSV so the files match
+however they were fetched, reindex to output_columns, which does not depend
+on the values.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from census.schema import GEOGRAPHY_COLUMNS, NUMERIC_PREDICATE_TYPES, typed_columns
+
+# Identifier columns never renamed when labeling from metadata
+UNLABELED_COLUMNS = frozenset(('NAME', 'GEO_ID') + GEOGRAPHY_COLUMNS)
+
+
+def _row_columns(rows: List[List[Any]]):
+    """(name, object array) pairs for API rows, transposed without an intermediate 2-D array."""
+    header, body = rows[0], rows[1:]
+    columns = zip(*body) if body else [()] * len(header)
+    for name, values in zip(header, columns):
+        yield name, np.array(values, dtype=object)
+
+
+def frame_from_rows(rows: List[List[Any]]) -> pd.DataFrame:
+    """
+    Build an untyped frame from API rows.
+
+    Args:
+        rows: Parsed API response, header row first
+
+    Returns:
+        pd.DataFrame: One string column per header entry
+    """
+    return pd.DataFrame(dict(_row_columns(rows)))
+
+
+class _MetadataTitles(Mapping):
+    """Read-only code -> title view of a metadata index, skipping identifier columns."""
+
+    def __init__(self, metadata: Dict[str, Dict]):
+        self._metadata = metadata
+
+    def __getitem__(self, code: str) -> str:
+        if code in UNLABELED_COLUMNS:
+            raise KeyError(code)
+        return self._metadata[code]['title']
+
+    def __contains__(self, code) -> bool:
+        return code not in UNLABELED_COLUMNS and code in self._metadata
+
+    def __iter__(self):
+        return (code for code in self._metadata if code not in UNLABELED_COLUMNS)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def column_label(code: str, title: str) -> str:
+    """Display name of a variable column."""
+    return f"{code}: {title}"
+
+
+def build_frame(source: Union[pd.DataFrame, List[List[Any]]],
+                metadata: Optional[Dict[str, Dict]] = None,
+                labels: Union[bool, Mapping[str, str], None] = None,
+                constants: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Build the final result frame in one pass.
+
+    Args:
+        source: Raw API rows (header first) or an untyped result frame
+        metadata: Variable metadata for typing (see census.schema.typed_columns);
+            None leaves values as text
+        labels: Variable code -> title; matching columns are named "code: title".
+            True labels every variable column with its title from metadata
+        constants: Columns holding one value for every row, appended last
+            (e.g. {'Year': year})
+
+    Returns:
+        pd.DataFrame: Typed, labeled frame; attrs of a source frame are kept
+    """
+    if isinstance(source, pd.DataFrame):
+        columns, existing, index = source.items(), set(source.columns), source.index
+        length = len(source)
+    else:
+        columns, existing, index = _row_columns(source), set(source[0]), None
+        length = len(source) - 1
+
+    if metadata:
+        columns = typed_columns(columns, metadata, existing)
+    if labels is True:
+        labels = _MetadataTitles(metadata or {})
+    elif labels is None:
+        labels = {}
+
+    built = {}
+    for name, values in columns:
+        built[column_label(name, labels[name]) if name in labels else name] = values
+    for name, value in (constants or {}).items():
+        built[name] = np.full(length, value, dtype=object if isinstance(value, str) else None)
+
+    frame = pd.DataFrame(built, index=index)
+    if isinstance(source, pd.DataFrame):
+        frame.attrs = source.attrs
+    return frame
+
+
+def output_columns(columns: List[str], metadata: Optional[Dict[str, Dict]]) -> List[str]:
+    """
+    Every column build_frame can produce from these source columns.
+
+    Args:
+        columns: Source column names (API header)
+        metadata: Variable metadata build_frame types with
+
+    Returns:
+        list: The columns in order, each numeric variable followed by its
+            annotation column unless the source already has one
+    """
+    existing = set(columns)
+    layout = []
+    for name in columns:
+        layout.append(name)
+        predicate_type = (metadata or {}).get(name, {}).get('predicateType')
+        if (name not in GEOGRAPHY_COLUMNS and predicate_type in NUMERIC_PREDICATE_TYPES
+                and f'{name}A' not in existing):
+            layout.append(f'{name}A')
+    return layout
+
+
+def label_frame(frame: pd.DataFrame, labels: Dict[str, str]) -> pd.DataFrame:
+    """
+    Rename variable columns to "code: title" without copying their data.
+
+    Args:
+        frame: Typed result frame
+        labels: Variable code -> title
+
+    Returns:
+        pd.DataFrame: Frame sharing frame's data, with relabeled columns
+    """
+    labeled = frame.copy(deep=False)
+    labeled.columns = [column_label(name, labels[name]) if name in labels else name
+                       for name in frame.columns]
+    return labeled
@@ -0,0 +1,297 @@
+"""
+Geography planning and fan-out for large Census pulls.
+
+The API needs an in=state:XX clause for tract-level queries and an
+in=state:XX&in=county:YYY clause for block groups, so a national pull cannot
+be made in one request. plan_units expands such a request into per-state or
+per-county sub-requests. fetch_fanout_to_csv runs them with bounded
+concurrency and appends each result to the output file as it arrives. A
+checkpoint file records finished units, so a rerun only fetches the units
+that failed or never ran. The checkpoint starts with the query it belongs to
+(fingerprint, variables and units); a rerun of a different query discards
+it and starts the file over instead of appending mismatched rows.
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+import pandas as pd
+
+import config
+from census.frames import build_frame, output_columns
+from census.query import CensusAPIError, fetch_uncached, fetch_frame, lookup_frame
+from census.quota import with_current_priority
+from census.response_cache import query_fingerprint, response_cache
+
+# FIPS codes of the 50 states, the District of Columbia and Puerto Rico
+STATE_FIPS = (
+    '01', '02', '04', '05', '06', '08', '09', '10', '11', '12', '13', '15', '16',
+    '17', '18', '19', '20', '21', '22', '23', '24', '25', '26', '27', '28', '29',
+    '30', '31', '32', '33', '34', '35', '36', '37', '38', '39', '40', '41', '42',
+    '44', '45', '46', '47', '48', '49', '50', '51', '53', '54', '55', '56', '72',
+)
+
+# Geography levels that need a state (and county) in= clause
+STATE_SCOPED_LEVELS = ('tract',)
+COUNTY_SCOPED_LEVELS = ('block group',)
+
+
+def parse_geography(geography: str) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Split a geography clause into its level, code and in= constraints.
+
+    Args:
+        geography: Clause as passed to for=, optionally followed by &in=... parts
+            (e.g. 'tract:*&in=state:06')
+
+    Returns:
+        tuple: (level, code, {parent level: code}), e.g. ('tract', '*', {'state': '06'})
+    """
+    parts = [unquote(part).strip() for part in geography.split('&') if part.strip()]
+    level, _, code = parts[0].partition(':')
+    parents = {}
+    for part in parts[1:]:
+        clause = part[3:] if part.startswith('in=') else part
+        for constraint in clause.split():
+            parent, _, parent_code = constraint.partition(':')
+            parents[parent] = parent_code
+    return level.strip().lower(), code.strip(), parents
+
+
+def _county_units(year, acs_type: str, table: str, states: List[str],
+                  api_key: Optional[str]) -> List[str]:
+    """
+    List block-group sub-requests, one per county in the given states.
+
+    The county list is fetched like any query (GEO_ID at county level), so
+    repeats come from the response cache and concurrent lookups share one
+    request.
+    """
+    counties = fetch_frame(year, acs_type, table, ['GEO_ID'], 'county:*', api_key)
+    counties = counties[counties['state'].isin(states)].sort_values(['state', 'county'])
+    return [f'block group:*&in=state:{state}&in=county:{county}'
+            for state, county in zip(counties['state'], counties['county'])]
+
+
+def plan_units(year, acs_type: str, table: str, geography: str,
+               api_key: Optional[str] = None) -> List[str]:
+    """
+    Expand a geography clause into the sub-requests needed to cover it.
+
+    Tract requests without a single specific state become one request per state.
+    Block-group requests without a specific county become one request per
+    county. Any other geography is returned unchanged as a single unit.
+
+    Args:
+        year: Year of data
+        acs_type: ACS survey type
+        table: Table name (used to pick the dataset for county lookups)
+        geography: Geography clause as entered by the user
+        api_key: Optional Census API key
+
+    Returns:
+        list: Geography clauses, one per sub-request
+    """
+    level, code, parents = parse_geography(geography)
+    state = parents.get('state', '*')
+    states = list(STATE_FIPS) if state == '*' else state.split(',')
+
+    if level in STATE_SCOPED_LEVELS and (state == '*' or len(states) > 1):
+        return [f'{level}:{code}&in=state:{fips}' for fips in states]
+
+    if level in COUNTY_SCOPED_LEVELS and parents.get('county', '*') == '*':
+        return _county_units(year, acs_type, table, states, api_key)
+
+    return [geography]
+
+
+class FanoutCheckpoint:
+    """
+    Append-only record of completed fan-out units.
+
+    With a signature, the file's first line records it, and a checkpoint
+    written under a different signature is treated as absent.
+    """
+
+    def __init__(self, path: str, signature: Optional[Dict] = None):
+        self.path = path
+        self.header = None if signature is None else '# ' + json.dumps(signature, sort_keys=True)
+        self.stale = False
+        self.completed = set()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = [line.rstrip('\n') for line in f if line.strip()]
+            if self.header is not None:
+                if not lines or lines[0] != self.header:
+                    self.stale = True
+                    lines = []
+                else:
+                    lines = lines[1:]
+            self.completed = set(lines)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and not self.stale
+
+    def mark(self, unit: str) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            if self.header is not None and f.tell() == 0:
+                f.write(self.header + '\n')
+            f.write(unit + '\n')
+        self.completed.add(unit)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def stream_units(units: List[str], fetch_unit: Callable[[str], pd.DataFrame],
+                 max_workers: int) -> Iterator[Tuple[str, Optional[pd.DataFrame], Optional[str]]]:
+    """
+    Fetch units concurrently and yield each result as soon as it completes.
+
+    Yields:
+        tuple: (unit, frame, None) on success or (unit, None, error message) on failure
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        fetch_unit = with_current_priority(fetch_unit)
+        futures = {pool.submit(fetch_unit, unit): unit for unit in units}
+        try:
+            for future in as_completed(list(futures)):
+                unit = futures.pop(future)
+                try:
+                    yield unit, future.result(), None
+                except Exception as e:
+                    yield unit, None, str(e)
+        finally:
+            # Consumer stopped early (error or cancellation): drop queued units
+            for future in futures:
+                future.cancel()
+
+
+def fetch_geography_frame(year, acs_type: str, table: str, variables: List[str],
+                          geography: str, api_key: Optional[str] = None,
+                          max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Fetch a query into one DataFrame, fanning out geographies that need it.
+
+    The whole query is looked up in the local store and the response cache
+    before planning, so a query held by either needs no API call at all. A
+    fanned-out result is also cached whole under the query's own
+    fingerprint, so a repeat loads one file and the query has a single
+    response-cache entry (and fetch time) like an unfanned one.
+
+    Raises:
+        CensusAPIError: If any sub-request fails
+    """
+    frame = lookup_frame(year, acs_type, table, variables, geography)
+    if frame is not None:
+        return frame
+
+    units = plan_units(year, acs_type, table, geography, api_key)
+    if units == [geography]:
+        return fetch_uncached(year, acs_type, table, variables, geography, api_key)
+    if len(units) == 1:
+        return fetch_frame(year, acs_type, table, variables, units[0], api_key)
+
+    fingerprint = query_fingerprint(year, acs_type, table, variables, geography)
+
+    frames = {}
+    for unit, frame, error in stream_units(
+            units, lambda unit: fetch_frame(year, acs_type, table, variables, unit, api_key),
+            max_workers or config.GEOGRAPHY_MAX_WORKERS):
+        if error is not None:
+            raise CensusAPIError(f"Geography request {unit} failed: {error}")
+        frames[unit] = frame
+    frame = pd.concat([frames[unit] for unit in units], ignore_index=True)
+    response_cache.put(fingerprint, frame)
+    return frame
+
+
+def fetch_fanout_to_csv(year, acs_type: str, table: str, variables: List[str],
+                        units: List[str], csv_filename: str,
+                        title_row_for: Callable[[List[str]], List[str]],
+                        api_key: Optional[str] = None,
+                        max_workers: Optional[int] = None,
+                        on_unit: Optional[Callable[[int, int], None]] = None,
+                        metadata: Optional[Dict[str, Dict]] = None) -> Dict:
+    """
+    Fetch every unit and stream the rows into a single CSV file.
+
+    The file has the usual layout: header row, title row, then data rows,
+    with a Year column appended. Each unit is typed with the same frame
+    builder and column layout (see census.frames) as a CSV written from a
+    single request, so the file does not depend on how the query was split.
+
+    If a checkpoint from an earlier run of the same query (year, survey,
+    table, variables and units) exists, completed units are skipped and new
+    rows are appended; otherwise the file is rewritten from scratch.
+
+    Args:
+        year: Year of data
+        acs_type: ACS survey type
+        table: Table name
+        variables: Variable codes; empty requests the whole table group
+        units: Geography clauses from plan_units
+        csv_filename: Output CSV path
+        title_row_for: Callable building the title row from the data columns
+        api_key: Optional Census API key
+        max_workers: Concurrent sub-requests (defaults to config.GEOGRAPHY_MAX_WORKERS)
+        on_unit: Optional callback receiving (units finished, total units) after each unit
+        metadata: Variable metadata for typing; None leaves values as text
+
+    Returns:
+        dict: Unit counts, rows written and {unit: error} for failed units
+    """
+    signature = {'query': query_fingerprint(year, acs_type, table, variables, ''),
+                 'variables': sorted(variables), 'units': list(units)}
+    checkpoint = FanoutCheckpoint(f'{csv_filename}.checkpoint', signature)
+    resuming = checkpoint.exists() and os.path.exists(csv_filename)
+    if not resuming:
+        checkpoint.clear()
+        checkpoint.stale = False
+        checkpoint.completed = set()
+    pending = [unit for unit in units if unit not in checkpoint.completed]
+
+    def fetch_unit(unit):
+        return fetch_frame(year, acs_type, table, variables, unit, api_key)
+
+    columns = None
+    if resuming:
+        with open(csv_filename, 'r', newline='') as csv_file:
+            columns = next(csv.reader(csv_file), None)
+
+    rows_written = 0
+    finished = len(units) - len(pending)
+    failed = {}
+    with open(csv_filename, 'a' if resuming else 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        for unit, frame, error in stream_units(pending, fetch_unit,
+                                               max_workers or config.GEOGRAPHY_MAX_WORKERS):
+            finished += 1
+            if on_unit is not None:
+                on_unit(finished, len(units))
+            if error is not None:
+                print(f"Geography unit {unit} failed: {error}")  # Debug print
+                failed[unit] = error
+                continue
+
+            if columns is None:
+                columns = output_columns(list(frame.columns), metadata) + ['Year']
+                writer.writerow(columns)
+                writer.writerow(title_row_for(columns[:-1]) + ['Year'])
+
+            build_frame(frame, metadata, constants={'Year': year}).reindex(columns=columns).to_csv(
+                csv_file, header=False, index=False)
+            csv_file.flush()
+            checkpoint.mark(unit)
+            rows_written += len(frame)
+
+    if not failed:
+        checkpoint.clear()
+
+    return {'units': len(units), 'skipped': len(units) - len(pending),
+            'rows': rows_written, 'failed': failed}
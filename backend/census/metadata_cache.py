@@ -0,0 +1,178 @@
+"""
+Persistent cache for Census variables.json metadata.
+
+variables.json only changes when the Census Bureau publishes a new vintage,
+so it is downloaded once per (year, acs_type, table type) and stored on disk
+as a compact index with the sanitized labels already computed. An in-process
+LRU layer sits in front of the disk files so repeat lookups stay in memory.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+from census.client import census_client
+from census.singleflight import SingleFlight
+
+# Bump when the on-disk index layout changes; old files are simply ignored.
+CACHE_FORMAT_VERSION = 1
+
+# Field order of each entry in the on-disk index
+FIELDS = ('label', 'title', 'concept', 'group', 'predicateType')
+
+
+def sanitize_label(label: str) -> str:
+    """Clean up a variable label so it can be used as a column title."""
+    return (label.replace(' ', '_').replace('!!', '_')
+            .replace(',', '').replace('$', '').replace('(', '')
+            .replace(')', '').replace("'", '').replace("-", '').replace("/", '_'))
+
+
+def get_table_type(table: str) -> str:
+    """Return the dataset suffix for a table ('/profile' for DP tables, '' otherwise)."""
+    return '/profile' if table.startswith('DP') else ''
+
+
+def variables_url(year, acs_type: str, table_type: str) -> str:
+    """Build the variables.json URL for a year, survey and table type."""
+    return f'{config.CENSUS_API_BASE}/{year}/acs/{acs_type}{table_type}/variables.json'
+
+
+def _download_variables(url: str) -> Dict[str, Dict]:
+    """Download variables.json and return its 'variables' mapping."""
+    response = census_client.get(url)
+    response.raise_for_status()
+    return response.json()['variables']
+
+
+class VariableMetadataCache:
+    """Two-level (memory LRU + disk) cache of variable metadata."""
+
+    def __init__(self, cache_dir: str, max_entries: int = 16,
+                 fetcher: Optional[Callable[[str], Dict[str, Dict]]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the on-disk index files
+            max_entries: Number of (year, acs_type, table type) indexes kept in memory
+            fetcher: Callable taking a variables.json URL and returning its 'variables' dict
+        """
+        self.cache_dir = os.path.join(cache_dir, f'v{CACHE_FORMAT_VERSION}')
+        self.max_entries = max_entries
+        self.fetcher = fetcher or _download_variables
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'downloads': 0}
+
+    @staticmethod
+    def _key(year, acs_type: str, table_type: str) -> Tuple[str, str, str]:
+        return (str(year), acs_type, table_type.strip('/') or 'detailed')
+
+    def _index_path(self, key: Tuple[str, str, str]) -> str:
+        return os.path.join(self.cache_dir, '_'.join(key) + '.json')
+
+    def _remember(self, key, entries: Dict[str, Dict]) -> None:
+        with self._lock:
+            self._memory[key] = entries
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _read_index(self, key) -> Optional[Dict[str, Dict]]:
+        """Load an index file from disk, or None if missing or unreadable."""
+        try:
+            with open(self._index_path(key), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get('version') != CACHE_FORMAT_VERSION:
+            return None
+        fields = index['fields']
+        return {var_id: dict(zip(fields, values))
+                for var_id, values in index['variables'].items()}
+
+    def _write_index(self, key, raw_variables: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Build the compact index from raw variables.json entries and persist it."""
+        rows = {}
+        for var_id, info in raw_variables.items():
+            label = info.get('label', '')
+            rows[var_id] = [label, sanitize_label(label), info.get('concept', ''),
+                            info.get('group', ''), info.get('predicateType', '')]
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._index_path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_FORMAT_VERSION, 'year': key[0],
+                       'acs_type': key[1], 'table_type': key[2],
+                       'fetched_at': int(time.time()), 'fields': list(FIELDS),
+                       'variables': rows}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        return {var_id: dict(zip(FIELDS, values)) for var_id, values in rows.items()}
+
+    def get(self, year, acs_type: str, table_type: str) -> Dict[str, Dict]:
+        """
+        Return the metadata index for a year, survey and table type.
+
+        Args:
+            year: Year of data
+            acs_type: ACS survey type ('acs1' or 'acs5')
+            table_type: '/profile' for data profile tables, '' for detailed tables
+
+        Returns:
+            dict: Variable code -> dict of label, title, concept, group and predicateType
+        """
+        key = self._key(year, acs_type, table_type)
+        with self._lock:
+            entries = self._memory.get(key)
+            if entries is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entries
+
+        # Concurrent misses for the same vintage share one disk read or download
+        return self._flights.do(key, lambda: self._load(key, year, acs_type, table_type))
+
+    def _load(self, key, year, acs_type: str, table_type: str) -> Dict[str, Dict]:
+        entries = self._read_index(key)
+        if entries is not None:
+            self.stats['disk_hits'] += 1
+        else:
+            raw = self.fetcher(variables_url(year, acs_type, table_type))
+            self.stats['downloads'] += 1
+            entries = self._write_index(key, raw)
+
+        self._remember(key, entries)
+        return entries
+
+    @property
+    def coalesced_requests(self) -> int:
+        """Number of lookups that waited on another thread's load instead of their own."""
+        return self._flights.stats['coalesced']
+
+    def titles(self, year, acs_type: str, table_type: str,
+               variables_needed: List[str]) -> Dict[str, str]:
+        """Return sanitized titles for the requested variable codes."""
+        entries = self.get(year, acs_type, table_type)
+        return {var_id: entries[var_id]['title']
+                for var_id in variables_needed if var_id in entries}
+
+    def invalidate(self, year, acs_type: str, table_type: str) -> None:
+        """Drop a cached index from memory and disk so it is downloaded again."""
+        key = self._key(year, acs_type, table_type)
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            os.remove(self._index_path(key))
+        except FileNotFoundError:
+            pass
+
+
+metadata_cache = VariableMetadataCache(config.METADATA_CACHE_DIR,
+                                       config.METADATA_CACHE_MEMORY_ENTRIES)
@@ -0,0 +1,343 @@
+"""
+Census data query helpers.
+
+Builds API URLs for ACS tables and fetches query results as DataFrames,
+going through the response cache before calling the API.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+import config
+from census.client import census_client
+from census.crosswalk import CrosswalkNotReady, crosswalks
+from census.errors import CensusAPIError
+from census.frames import frame_from_rows
+from census.metadata_cache import get_table_type, metadata_cache
+from census.quota import with_current_priority
+from census.response_cache import query_fingerprint, response_cache
+from census.schema import GEOGRAPHY_COLUMNS
+from census.singleflight import SingleFlight
+
+
+# The API rejects calls requesting more than 50 fields (group() counts as one)
+MAX_VARIABLES_PER_CALL = 50
+
+# Coalesces concurrent cache misses for the same query fingerprint
+data_flights = SingleFlight()
+
+# Local store of bulk-loaded data consulted before the API (see database.local_store)
+local_store = None
+
+
+def use_local_store(store) -> None:
+    """Answer queries from a local data store when it covers them."""
+    global local_store
+    local_store = store
+
+
+def build_api_url(year, acs_type: str, table: str, variables: List[str],
+                  geography: str, api_key: Optional[str] = None,
+                  include_name: bool = True) -> str:
+    """
+    Construct the Census API URL for a query.
+
+    Args:
+        year: Year of data
+        acs_type: ACS survey type ('acs1' or 'acs5')
+        table: Table name (e.g. 'DP02')
+        variables: Variable codes to request; empty requests the whole table group
+        geography: Geography clause passed to for=
+        api_key: Optional Census API key
+        include_name: Whether to prepend NAME to the requested variables
+
+    Returns:
+        str: API URL
+    """
+    base_url = f'{config.CENSUS_API_BASE}/{year}/acs/{acs_type}{get_table_type(table)}'
+    if variables:
+        fields = (['NAME'] if include_name else []) + list(variables)
+        api_url = f'{base_url}?get={",".join(fields)}&for={geography}'
+    else:
+        api_url = f'{base_url}?get=group({table})&for={geography}'
+    if api_key:
+        api_url += f'&key={api_key}'
+    return api_url
+
+
+def chunk_variables(variables: List[str],
+                    limit: int = MAX_VARIABLES_PER_CALL) -> List[List[str]]:
+    """
+    Split variable codes into chunks that fit the API's per-call limit.
+
+    NAME is only requested with the first chunk, so that chunk holds one
+    variable fewer than the rest.
+
+    Args:
+        variables: Variable codes (NAME and duplicates are dropped)
+        limit: Maximum number of fields per call
+
+    Returns:
+        list: Variable chunks; a single empty chunk for whole-table group requests
+    """
+    codes = list(dict.fromkeys(v.strip() for v in variables if v.strip() and v.strip() != 'NAME'))
+    if not codes:
+        return [[]]
+    chunks = [codes[:limit - 1]]
+    for start in range(limit - 1, len(codes), limit):
+        chunks.append(codes[start:start + limit])
+    return chunks
+
+
+def build_api_urls(year, acs_type: str, table: str, variables: List[str],
+                   geography: str, api_key: Optional[str] = None) -> List[str]:
+    """Construct one API URL per variable chunk (see chunk_variables)."""
+    return [build_api_url(year, acs_type, table, chunk, geography, api_key,
+                          include_name=(i == 0))
+            for i, chunk in enumerate(chunk_variables(variables))]
+
+
+def _request_frame(api_url: str) -> pd.DataFrame:
+    """Send a single API request and return the result as a DataFrame."""
+    print(f"Requesting URL: {api_url}")  # Debug print
+    response = census_client.get(api_url)
+    if response.status_code != 200:
+        raise CensusAPIError(f"API request failed with status code {response.status_code}. "
+                             f"Response: {response.text}")
+
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise CensusAPIError(f"Failed to parse API response: {str(e)}")
+
+    if not data or len(data) <= 1:
+        raise CensusAPIError("No data received from the API")
+
+    return frame_from_rows(data)
+
+
+def _timed_request(api_url: str) -> Tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    frame = _request_frame(api_url)
+    return frame, time.perf_counter() - start
+
+
+def _fetch_chunked(api_urls: List[str]) -> pd.DataFrame:
+    """Fetch variable chunks concurrently and join them on the geography columns."""
+    with ThreadPoolExecutor(max_workers=min(len(api_urls), config.CHUNK_MAX_WORKERS)) as pool:
+        results = list(pool.map(with_current_priority(_timed_request), api_urls))
+
+    timings = []
+    indexed = []
+    for i, (frame, elapsed) in enumerate(results):
+        keys = [col for col in frame.columns if col in GEOGRAPHY_COLUMNS]
+        indexed.append(frame.set_index(keys))
+        timings.append({'chunk': i, 'variables': frame.shape[1] - len(keys),
+                        'rows': len(frame), 'seconds': round(elapsed, 3)})
+        print(f"Chunk {i}: {timings[-1]['variables']} variables, "
+              f"{len(frame)} rows in {elapsed:.2f}s")  # Debug print
+
+    merged = pd.concat(indexed, axis=1, join='outer').reset_index()
+    # Keep the API's layout: values first, geography columns last
+    keys = [col for col in merged.columns if col in GEOGRAPHY_COLUMNS]
+    merged = merged[[col for col in merged.columns if col not in keys] + keys]
+    merged.attrs['chunk_timings'] = timings
+    return merged
+
+
+def lookup_frame(year, acs_type: str, table: str, variables: List[str],
+                 geography: str) -> Optional[pd.DataFrame]:
+    """
+    Answer a query without calling the API: from the local store when it
+    covers the query, otherwise from the response cache.
+
+    Returns:
+        pd.DataFrame: The result, or None if neither holds it
+    """
+    if local_store is not None and local_store.covers(year, acs_type, table, variables, geography):
+        return local_store.fetch(year, acs_type, table, variables, geography)
+    return response_cache.get(query_fingerprint(year, acs_type, table, variables, geography))
+
+
+def fetch_frame(year, acs_type: str, table: str, variables: List[str],
+                geography: str, api_key: Optional[str] = None) -> pd.DataFrame:
+    """
+    Fetch a query result as a DataFrame, using the response cache when possible.
+
+    Variable lists over the API's per-call limit are split into chunks that
+    are fetched concurrently and joined on the geography columns; per-chunk
+    timings are left in frame.attrs['chunk_timings']. Concurrent callers
+    missing the cache for the same query wait on a single upstream fetch.
+    Queries the local store covers are answered from it without the API.
+
+    Args:
+        year: Year of data
+        acs_type: ACS survey type
+        table: Table name
+        variables: Variable codes; empty requests the whole table group
+        geography: Geography clause passed to for=
+        api_key: Optional Census API key (not part of the cache key)
+
+    Returns:
+        pd.DataFrame: One row per geography, columns as returned by the API
+
+    Raises:
+        CensusAPIError: If the API request fails or returns no data
+    """
+    frame = lookup_frame(year, acs_type, table, variables, geography)
+    if frame is not None:
+        return frame
+    return fetch_uncached(year, acs_type, table, variables, geography, api_key)
+
+
+def fetch_uncached(year, acs_type: str, table: str, variables: List[str],
+                    geography: str, api_key: Optional[str] = None) -> pd.DataFrame:
+    """Fetch a query lookup_frame missed from the API and cache the result."""
+    fingerprint = query_fingerprint(year, acs_type, table, variables, geography)
+
+    def load():
+        api_urls = build_api_urls(year, acs_type, table, variables, geography, api_key)
+        if len(api_urls) == 1:
+            result = _request_frame(api_urls[0])
+        else:
+            result = _fetch_chunked(api_urls)
+        response_cache.put(fingerprint, result)
+        return result
+
+    # Concurrent identical queries share one upstream request
+    return data_flights.do(fingerprint, load)
+
+
+def _fetch_year_metadata(year, acs_type: str, table: str) -> Dict[str, Dict]:
+    """Fetch the variable metadata index for one year, returning {} on failure."""
+    try:
+        return metadata_cache.get(year, acs_type, get_table_type(table))
+    except Exception as e:
+        print(f"Error fetching variable metadata for {year}: {str(e)}")  # Debug print
+        return {}
+
+
+def _align_columns(frame: pd.DataFrame, mapping: Dict[str, Optional[str]]) -> pd.DataFrame:
+    """
+    Rename one year's columns to their base-year codes.
+
+    A column named like a base-year code but not equivalent to it (the code
+    was reused for a different row) is dropped so it cannot be mistaken for
+    the base-year series.
+    """
+    pairs = dict(mapping)
+    for base, code in mapping.items():
+        if base.endswith(('E', 'M')):
+            pairs[f'{base}A'] = f'{code}A' if code else None
+    inverse = {code: base for base, code in pairs.items() if code}
+    stale = [col for col in frame.columns if col in pairs and col not in inverse]
+    return frame.drop(columns=stale).rename(columns=inverse)
+
+
+def fetch_years(years: Iterable, acs_type: str, table: str, variables: List[str],
+                geography: str, api_key: Optional[str] = None,
+                max_workers: Optional[int] = None, base_year=None
+                ) -> Tuple[pd.DataFrame, Dict[str, str], Dict[str, str], Dict[str, Dict]]:
+    """
+    Fetch the same query for several years concurrently and merge the results.
+
+    Variable codes are given as of the base year and resolved for every other
+    year through the cross-year crosswalk, so renumbered variables line up
+    and variables whose definition changed are left out for that year rather
+    than merged with a different series. If the crosswalk cannot be built,
+    codes are requested as given for every year.
+
+    Each year's data is fetched in a bounded thread pool, so the wall-clock
+    time is close to the slowest single year.
+
+    Args:
+        years: Years to fetch
+        acs_type: ACS survey type
+        table: Table name
+        variables: Base-year variable codes; empty requests the whole table group
+        geography: Geography clause passed to for=
+        api_key: Optional Census API key
+        max_workers: Thread pool size (defaults to config.MULTIYEAR_MAX_WORKERS)
+        base_year: Year the variable codes refer to (defaults to the first of years)
+
+    Returns:
+        tuple: (long-format DataFrame keyed on geography plus 'Year' with
+                base-year column codes,
+                variable code -> title,
+                year -> error message for years that failed,
+                year -> {'renamed': {base code: code used}, 'missing': [base codes
+                not comparable that year]} for years that differ from the base year)
+
+    Raises:
+        CensusAPIError: If every year fails
+        CrosswalkNotReady: If the crosswalk is still being built
+    """
+    years = [str(year) for year in years]
+    base_year = str(base_year or years[0])
+    years = sorted(set(years))
+    max_workers = max_workers or config.MULTIYEAR_MAX_WORKERS
+
+    crosswalk = None
+    try:
+        crosswalk = crosswalks.get(acs_type, get_table_type(table))
+        resolved = crosswalk.resolve(table, variables, base_year, years)
+    except CrosswalkNotReady:
+        raise
+    except Exception as e:
+        print(f"Crosswalk unavailable, requesting codes as given: {str(e)}")  # Debug print
+        resolved = dict.fromkeys(years)
+
+    errors = {}
+    report = {}
+    plans = {}
+    for year in years:
+        mapping = resolved[year]
+        if mapping is None:
+            plans[year] = (variables, {})
+            continue
+        year_variables = [mapping[var] for var in variables if mapping.get(var)]
+        if variables and not year_variables:
+            errors[year] = f"None of the requested variables are comparable in {year}"
+            continue
+        plans[year] = (year_variables, mapping)
+        renamed = {base: code for base, code in mapping.items() if code and code != base}
+        missing = sorted(base for base, code in mapping.items() if not code)
+        if renamed or missing:
+            report[year] = {'renamed': renamed, 'missing': missing}
+
+    fetch_year = with_current_priority(fetch_frame)
+    fetch_metadata = with_current_priority(_fetch_year_metadata)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        data_futures = {year: pool.submit(fetch_year, year, acs_type, table,
+                                          year_variables, geography, api_key)
+                        for year, (year_variables, _) in plans.items()}
+        metadata_future = (pool.submit(fetch_metadata, base_year, acs_type, table)
+                           if crosswalk is None or resolved.get(base_year) is None else None)
+
+        frames = []
+        for year, future in data_futures.items():
+            try:
+                frame = _align_columns(future.result(), plans[year][1])
+                frames.append(frame.assign(Year=year))
+            except Exception as e:
+                errors[year] = str(e)
+
+    if not frames:
+        raise CensusAPIError(f"No data received for any requested year: {errors}")
+
+    merged = pd.concat(frames, ignore_index=True, sort=False)
+    # Years missing a variable would otherwise push its column after 'Year'
+    merged = merged[[col for col in merged.columns if col != 'Year'] + ['Year']]
+    value_columns = [col for col in merged.columns
+                     if col not in GEOGRAPHY_COLUMNS and col not in ('NAME', 'GEO_ID', 'Year')]
+    if metadata_future is not None:
+        entries = metadata_future.result()
+        titles = {col: entries[col]['title'] for col in value_columns if col in entries}
+    else:
+        titles = crosswalk.titles(base_year, value_columns)
+    keys = [col for col in merged.columns if col in GEOGRAPHY_COLUMNS] + ['Year']
+    merged = merged.sort_values(keys, kind='stable', ignore_index=True)
+    return merged, titles, errors, report
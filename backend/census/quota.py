@@ -0,0 +1,268 @@
+"""
+Census API quota manager shared by every worker process on the host.
+
+Each API key gets a token bucket, and all keyless traffic shares one bucket
+sized to the Census Bureau's daily keyless allowance (the limit is per
+calling IP, so every worker draws from the same budget). Buckets and the
+queue of waiting requests live in a SQLite file, so gunicorn workers see the
+same budget; updates run in IMMEDIATE transactions.
+
+A request over budget is queued rather than failed: waiters are served in
+priority order (interactive page loads before background jobs before batch
+replays), then first come first served. Only a request whose expected wait
+exceeds the configured maximum fails, with a QuotaExceeded error (a
+CensusAPIError) saying when budget returns. Keys are stored as hashes,
+never in the clear.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+
+import config
+from census.errors import CensusAPIError
+from telemetry.metrics import registry
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_BATCH = 2
+
+KEYLESS_BUCKET = 'keyless'
+
+_priority: ContextVar[int] = ContextVar('census_priority', default=PRIORITY_INTERACTIVE)
+
+QUOTA_WAIT_SECONDS = registry.histogram(
+    'acs_census_quota_wait_seconds', 'Time Census requests spent queued for quota', ('bucket',))
+QUOTA_REJECTIONS = registry.counter(
+    'acs_census_quota_rejections_total', 'Census requests refused for exhausted quota', ('bucket',))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS waiters (
+    ticket TEXT PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    enqueued REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS waiters_queue ON waiters (bucket, priority, enqueued);
+"""
+
+
+class QuotaExceeded(CensusAPIError):
+    """
+    Raised when a request would have to wait longer than allowed for quota.
+
+    A CensusAPIError, so every handler of failed Census requests also
+    reports quota exhaustion; routes that can answer 429 catch it first.
+    """
+
+
+@contextmanager
+def priority(level: int):
+    """Run the enclosed Census requests at the given priority."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def with_current_priority(fn):
+    """Wrap fn so a worker thread runs it at the priority of the thread that wrapped it."""
+    level = _priority.get()
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with priority(level):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+class QuotaManager:
+    """Token buckets per API key, shared across processes through SQLite."""
+
+    def __init__(self, db_path: str, keyless_daily_limit: int = 500,
+                 keyed_rate: float = 10.0, keyed_burst: int = 50,
+                 max_wait: float = 300.0, poll_interval: float = 0.25,
+                 stale_after: float = 30.0):
+        """
+        Initialize the quota manager.
+
+        Args:
+            db_path: SQLite file holding buckets and the wait queue
+            keyless_daily_limit: Requests per day for calls without an API key
+            keyed_rate: Sustained requests per second for each API key
+            keyed_burst: Requests an idle API key may send at once
+            max_wait: Longest a request may queue before QuotaExceeded is raised
+            poll_interval: Longest sleep between checks while queued
+            stale_after: Seconds without a heartbeat after which a queued
+                request (e.g. from a killed worker) is dropped from the queue
+        """
+        self.db_path = db_path
+        self.keyless_daily_limit = keyless_daily_limit
+        self.keyed_rate = keyed_rate
+        self.keyed_burst = keyed_burst
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def bucket_for(self, api_key: Optional[str]) -> Tuple[str, float, float]:
+        """Return (bucket id, capacity, refill rate per second) for an API key."""
+        if not api_key:
+            return KEYLESS_BUCKET, float(self.keyless_daily_limit), self.keyless_daily_limit / 86400
+        digest = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+        return f'key:{digest}', float(self.keyed_burst), self.keyed_rate
+
+    def _tokens(self, conn, bucket: str, capacity: float, rate: float, now: float) -> float:
+        row = conn.execute('SELECT tokens, updated FROM buckets WHERE bucket = ?',
+                           (bucket,)).fetchone()
+        if row is None:
+            conn.execute('INSERT INTO buckets (bucket, tokens, updated) VALUES (?, ?, ?)',
+                         (bucket, capacity, now))
+            return capacity
+        tokens, updated = row
+        return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+    def acquire(self, api_key: Optional[str] = None, level: Optional[int] = None) -> float:
+        """
+        Take one request's worth of quota, queueing until it is available.
+
+        Args:
+            api_key: Census API key of the request (None for keyless calls)
+            level: Priority (defaults to the priority set with priority())
+
+        Returns:
+            float: Seconds spent queued
+
+        Raises:
+            QuotaExceeded: If the request would wait longer than max_wait
+        """
+        bucket, capacity, rate = self.bucket_for(api_key)
+        level = _priority.get() if level is None else level
+        ticket = uuid.uuid4().hex
+        start = time.time()
+        with self._transaction() as conn:
+            # Fast path: budget available and nobody of equal or higher priority queued
+            queued = conn.execute('SELECT COUNT(*) FROM waiters WHERE bucket = ? AND priority <= ? '
+                                  'AND heartbeat >= ?',
+                                  (bucket, level, start - self.stale_after)).fetchone()[0]
+            tokens = self._tokens(conn, bucket, capacity, rate, start)
+            if queued == 0 and tokens >= 1:
+                conn.execute('UPDATE buckets SET tokens = ?, updated = ? WHERE bucket = ?',
+                             (tokens - 1, start, bucket))
+                QUOTA_WAIT_SECONDS.observe(0.0, bucket=bucket.split(':')[0])
+                return 0.0
+            conn.execute('INSERT INTO waiters (ticket, bucket, priority, enqueued, heartbeat) '
+                         'VALUES (?, ?, ?, ?, ?)', (ticket, bucket, level, start, start))
+        granted = False
+        try:
+            while True:
+                now = time.time()
+                with self._transaction() as conn:
+                    conn.execute('DELETE FROM waiters WHERE heartbeat < ?', (now - self.stale_after,))
+                    conn.execute('UPDATE waiters SET heartbeat = ? WHERE ticket = ?', (now, ticket))
+                    ahead = conn.execute(
+                        'SELECT COUNT(*) FROM waiters WHERE bucket = ? AND '
+                        '(priority < ? OR (priority = ? AND enqueued < ?) OR '
+                        '(priority = ? AND enqueued = ? AND ticket < ?))',
+                        (bucket, level, level, start, level, start, ticket)).fetchone()[0]
+                    tokens = self._tokens(conn, bucket, capacity, rate, now)
+                    if ahead == 0 and tokens >= 1:
+                        conn.execute('UPDATE buckets SET tokens = ?, updated = ? WHERE bucket = ?',
+                                     (tokens - 1, now, bucket))
+                        conn.execute('DELETE FROM waiters WHERE ticket = ?', (ticket,))
+                        granted = True
+                        waited = now - start
+                        QUOTA_WAIT_SECONDS.observe(waited, bucket=bucket.split(':')[0])
+                        return waited
+
+                # Time until enough tokens exist for this request and everyone ahead of it
+                needed = (ahead + 1 - tokens) / rate
+                if now - start + needed > self.max_wait:
+                    QUOTA_REJECTIONS.inc(bucket=bucket.split(':')[0])
+                    kind = 'keyless requests' if bucket == KEYLESS_BUCKET else 'this API key'
+                    raise QuotaExceeded(
+                        f"Census API quota for {kind} is exhausted; budget for this request "
+                        f"returns in about {int(needed // 60) + 1} minutes"
+                        + (". Add a Census API key for a larger quota" if not api_key else ''))
+                time.sleep(min(self.poll_interval, needed) if ahead == 0 else self.poll_interval)
+        finally:
+            if not granted:
+                with self._transaction() as conn:
+                    conn.execute('DELETE FROM waiters WHERE ticket = ?', (ticket,))
+
+    def penalize(self, api_key: Optional[str], retry_after: float) -> None:
+        """Empty a bucket after the API answered 429, so it refills only after retry_after seconds."""
+        bucket, _, rate = self.bucket_for(api_key)
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute('INSERT INTO buckets (bucket, tokens, updated) VALUES (?, ?, ?) '
+                         'ON CONFLICT (bucket) DO UPDATE SET tokens = excluded.tokens, '
+                         'updated = excluded.updated', (bucket, -rate * retry_after, now))
+
+    def status(self, api_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Report the remaining budget for an API key (or for keyless calls).
+
+        Returns:
+            dict: bucket type, limit, remaining requests, refill rate, seconds
+                until the bucket is full again and requests currently queued
+        """
+        bucket, capacity, rate = self.bucket_for(api_key)
+        now = time.time()
+        with self._transaction() as conn:
+            tokens = self._tokens(conn, bucket, capacity, rate, now)
+            queued = conn.execute('SELECT COUNT(*) FROM waiters WHERE bucket = ? AND heartbeat >= ?',
+                                  (bucket, now - self.stale_after)).fetchone()[0]
+        return {
+            'bucket': 'keyless' if bucket == KEYLESS_BUCKET else 'api_key',
+            'limit': int(capacity),
+            'remaining': max(0, int(tokens)),
+            'refill_per_second': rate,
+            'full_in_seconds': round(max(0.0, capacity - tokens) / rate, 1),
+            'queued': queued,
+        }
+
+
+census_quota = (QuotaManager(config.CENSUS_QUOTA_DB,
+                             keyless_daily_limit=config.CENSUS_KEYLESS_DAILY_LIMIT,
+                             keyed_rate=config.CENSUS_KEYED_RATE_PER_SECOND,
+                             keyed_burst=config.CENSUS_KEYED_BURST,
+                             max_wait=config.CENSUS_QUOTA_MAX_WAIT)
+                if config.CENSUS_QUOTA_ENABLED else None)
@@ -0,0 +1,134 @@
+"""
+Cache of rendered saved-search pages.
+
+A saved search's inputs never change, so the page rendered for it can be
+reused until the search itself or its data does. Pages are keyed by
+search_id and stored with the vintage they were rendered from (a hash of the
+search row, which covers its year, survey, variables and derived
+definitions, plus when its data was fetched into the response cache), so
+an edited search or a refetched result misses instead of serving a stale
+page.
+
+Each entry keeps the body together with gzip and (when the brotli package
+is installed) brotli encodings compressed once at store time, plus a
+strong ETag for conditional requests. The cache is an LRU bounded by the
+total size of the stored bodies.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bump when the rendered page layout changes so old entries stop matching
+RENDER_FORMAT_VERSION = 1
+
+
+def search_vintage(search: Dict[str, Any], fetched_at: Optional[float] = None) -> str:
+    """
+    Hash of everything that affects a search's rendered page.
+
+    Args:
+        search: searches row
+        fetched_at: When the search's data was written to the response cache
+            (None when it is not cached there, e.g. served from the local store)
+    """
+    fields = {key: value for key, value in search.items() if key != 'search_timestamp'}
+    payload = json.dumps([RENDER_FORMAT_VERSION, fields, fetched_at], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class RenderedPage:
+    """A rendered page with its pre-compressed encodings and ETag."""
+
+    def __init__(self, vintage: str, body: bytes):
+        self.vintage = vintage
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(body)
+
+    @property
+    def size(self) -> int:
+        return sum(len(body) for body in self.bodies.values())
+
+    def etag_for(self, encoding: str) -> str:
+        """Strong ETag of one encoding (each byte representation gets its own tag)."""
+        return f'"{self.etag}"' if encoding == 'identity' else f'"{self.etag}-{encoding}"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header names any representation of this page."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        tags = {tag.strip() for tag in if_none_match.split(',')}
+        return any(self.etag_for(encoding) in tags for encoding in self.bodies)
+
+    def choose_encoding(self, accept_encoding: Optional[str]) -> str:
+        """Pick the smallest stored encoding the client accepts."""
+        accepted = set()
+        for part in (accept_encoding or '').split(','):
+            name, _, params = part.strip().partition(';')
+            if name and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                accepted.add(name.lower())
+        for encoding in ('br', 'gzip'):
+            if encoding in self.bodies and (encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
+
+
+class RenderCache:
+    """Size-bounded LRU of rendered pages keyed by search."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, RenderedPage]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key: Hashable, vintage: str) -> Optional[RenderedPage]:
+        """Return the page for key if it was rendered from this vintage."""
+        with self._lock:
+            page = self._entries.get(key)
+            if page is None or page.vintage != vintage:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return page
+
+    def put(self, key: Hashable, vintage: str, body: str) -> RenderedPage:
+        """Compress and store a rendered page, evicting least recently used pages as needed."""
+        page = RenderedPage(vintage, body.encode('utf-8'))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if page.size <= self.max_bytes:
+                self._entries[key] = page
+                self._bytes += page.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats['evictions'] += 1
+        return page
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            page = self._entries.pop(key, None)
+            if page is not None:
+                self._bytes -= page.size
+
+
+render_cache = RenderCache(config.RENDER_CACHE_MAX_BYTES)
@@ -0,0 +1,112 @@
+"""
+Batch replay of saved searches.
+
+Searches that share (year, acs_type, table, geography) are collapsed into a
+single query covering the union of their variables. A whole-table search
+absorbs the rest of its group. The collapsed queries run concurrently, and
+each search then gets its own slice of the shared result.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+import config
+from census.query import GEOGRAPHY_COLUMNS
+from census.quota import with_current_priority
+from census.response_cache import normalize_geography
+
+
+def plan_replay(searches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Collapse searches into the smallest set of distinct queries.
+
+    Args:
+        searches: Rows from the searches table
+
+    Returns:
+        list: One dict per query with year, acs_type, table, geography,
+            variables (empty for a whole-table request) and search_ids
+    """
+    plan = {}
+    for search in searches:
+        key = (str(search['year']), search['acs_type'], search['table_name'],
+               normalize_geography(search['geography']))
+        query = plan.setdefault(key, {
+            'year': search['year'], 'acs_type': search['acs_type'],
+            'table': search['table_name'], 'geography': search['geography'],
+            'variables': [], 'whole_table': False, 'search_ids': [],
+        })
+        query['search_ids'].append(search['search_id'])
+        variables = [v.strip() for v in (search['variables'] or []) if v.strip()]
+        if not variables:
+            query['whole_table'] = True
+        for var in variables:
+            if var not in query['variables']:
+                query['variables'].append(var)
+
+    for query in plan.values():
+        if query.pop('whole_table'):
+            query['variables'] = []
+    return list(plan.values())
+
+
+def subset_for_search(frame: pd.DataFrame, variables: Optional[List[str]]) -> pd.DataFrame:
+    """Slice a shared query result down to one search's columns."""
+    variables = [v.strip() for v in (variables or []) if v.strip()]
+    if not variables:
+        return frame
+    keep = (['NAME'] + [v for v in variables if v in frame.columns]
+            + [col for col in frame.columns if col in GEOGRAPHY_COLUMNS])
+    return frame[keep]
+
+
+def replay_searches(searches: List[Dict[str, Any]],
+                    fetch: Callable[[Dict[str, Any]], pd.DataFrame],
+                    deliver: Callable[[Dict[str, Any], pd.DataFrame], None],
+                    max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Replay searches with deduplicated, concurrent queries.
+
+    Args:
+        searches: Rows from the searches table
+        fetch: Callable running one planned query and returning its frame
+        deliver: Callable receiving (search, frame slice) for each search
+        max_workers: Concurrent queries (defaults to config.REPLAY_MAX_WORKERS)
+
+    Returns:
+        dict: Per-search status plus counts of queries run and saved
+    """
+    plan = plan_replay(searches)
+    by_id = {search['search_id']: search for search in searches}
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or config.REPLAY_MAX_WORKERS) as pool:
+        fetch = with_current_priority(fetch)
+        futures = [pool.submit(fetch, query) for query in plan]
+        for future, query in zip(futures, plan):
+            try:
+                frame = future.result()
+            except Exception as e:
+                for search_id in query['search_ids']:
+                    results[search_id] = {'status': 'error', 'error': str(e)}
+                continue
+
+            for search_id in query['search_ids']:
+                search = by_id[search_id]
+                try:
+                    subset = subset_for_search(frame, search['variables'])
+                    deliver(search, subset)
+                    results[search_id] = {'status': 'success', 'rows': len(subset),
+                                          'columns': subset.shape[1]}
+                except Exception as e:
+                    results[search_id] = {'status': 'error', 'error': str(e)}
+
+    return {
+        'searches': results,
+        'total_searches': len(searches),
+        'queries_run': len(plan),
+        'api_calls_saved': len(searches) - len(plan),
+        'failed': sum(1 for r in results.values() if r['status'] != 'success'),
+    }
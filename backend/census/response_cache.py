@@ -0,0 +1,153 @@
+"""
+On-disk cache of parsed Census API responses.
+
+Results are stored as Parquet files named after a normalized query
+fingerprint, so a hit loads straight into a DataFrame without re-parsing
+JSON. Variable order and the API key do not affect the fingerprint.
+Entries expire after a TTL, and the cache is kept under a total size cap
+by evicting the least recently used files. A file's mtime records when it
+was written and its atime records its last use.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+
+
+def normalize_geography(geography: str) -> str:
+    """Normalize a for=/in= geography clause so equivalent spellings match."""
+    clauses = [part.replace(' ', '') for part in geography.split('&') if part.strip()]
+    return '&'.join(clauses[:1] + sorted(clauses[1:]))
+
+
+def query_fingerprint(year, acs_type: str, table: str,
+                      variables: Iterable[str], geography: str) -> str:
+    """
+    Build a stable fingerprint for a Census data query.
+
+    Args:
+        year: Year of data
+        acs_type: ACS survey type
+        table: Table name (e.g. 'DP02')
+        variables: Requested variable codes; empty means the whole table group
+        geography: Geography clause as passed to for=
+
+    Returns:
+        str: Hex digest identifying the query
+    """
+    codes = sorted({v.strip() for v in variables if v.strip()} - {'NAME'})
+    key = json.dumps([str(year), acs_type, table, codes, normalize_geography(geography)],
+                     separators=(',', ':'))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+class ResponseCache:
+    """TTL and size-bounded Parquet cache for query results."""
+
+    def __init__(self, cache_dir: str, ttl_seconds: int, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cached Parquet files
+            ttl_seconds: Age after which an entry is treated as a miss
+            max_bytes: Total size the cache directory is kept under
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f'{fingerprint}.parquet')
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, fingerprint: str) -> Optional[pd.DataFrame]:
+        """Return the cached frame for a fingerprint, or None on a miss."""
+        path = self._path(fingerprint)
+        try:
+            written_at = os.stat(path).st_mtime
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+
+        if time.time() - written_at > self.ttl_seconds:
+            self._count('expired')
+            self._count('misses')
+            self._remove(path)
+            return None
+
+        try:
+            frame = pq.read_table(path).to_pandas()
+        except (OSError, pa.ArrowInvalid):
+            # Partially written or corrupt entry: drop it and refetch
+            self._count('misses')
+            self._remove(path)
+            return None
+
+        os.utime(path, (time.time(), written_at))
+        self._count('hits')
+        return frame
+
+    def fetched_at(self, fingerprint: str) -> Optional[float]:
+        """When the live entry for a fingerprint was written, or None if it is missing or expired."""
+        try:
+            written_at = os.stat(self._path(fingerprint)).st_mtime
+        except FileNotFoundError:
+            return None
+        return written_at if time.time() - written_at <= self.ttl_seconds else None
+
+    def put(self, fingerprint: str, frame: pd.DataFrame) -> None:
+        """Store a frame under a fingerprint and enforce the size cap."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(fingerprint)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        # Per-request attrs (e.g. chunk timings) are not part of the cached result
+        stored = frame.copy(deep=False)
+        stored.attrs = {}
+        pq.write_table(pa.Table.from_pandas(stored, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits under max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.parquet'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self._count('evictions')
+
+
+response_cache = ResponseCache(config.RESPONSE_CACHE_DIR,
+                               config.RESPONSE_CACHE_TTL_SECONDS,
+                               config.RESPONSE_CACHE_MAX_BYTES)
@@ -0,0 +1,118 @@
+"""
+Typed conversion of Census API results.
+
+The API returns every value as a string. This stage casts estimate and
+margin-of-error columns to compact numeric dtypes using the predicateType
+recorded in variables.json, and turns the geography code columns into
+categoricals.
+
+Jam values (the negative sentinels the Census Bureau uses for suppressed or
+unavailable figures) become missing values in the numeric column. The reason
+is kept in a categorical annotation column named after the Census convention
+(B01001_001E -> B01001_001EA, B01001_001M -> B01001_001MA).
+"""
+
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from census.metadata_cache import get_table_type, metadata_cache
+
+# Columns the API appends to identify a geography
+GEOGRAPHY_COLUMNS = ('us', 'region', 'division', 'state', 'county', 'county subdivision',
+                     'place', 'tract', 'block group', 'zip code tabulation area')
+
+# Jam values and the annotation symbol shown for each in data.census.gov tables
+ANNOTATION_VALUES = {
+    -999999999: 'N',       # Too few sample cases to display the estimate or MOE
+    -888888888: '(X)',     # Not applicable or not available
+    -666666666: '-',       # Too few sample observations to compute the estimate
+    -555555555: '*****',   # Estimate is controlled; no sampling error
+    -333333333: '***',     # Median in an open-ended interval; MOE not computable
+    -222222222: '**',      # Too few sample observations to compute the MOE
+}
+
+NUMERIC_PREDICATE_TYPES = ('int', 'float')
+
+_SYMBOLS = list(ANNOTATION_VALUES.values())
+_INT32 = np.iinfo(np.int32)
+
+
+def _annotation_column(values: np.ndarray) -> Optional[pd.Categorical]:
+    """Categorical of annotation symbols for the jam values in values, or None if there are none."""
+    codes = np.full(values.shape, -1, dtype=np.int8)
+    for position, sentinel in enumerate(ANNOTATION_VALUES):
+        codes[values == sentinel] = position
+    if not (codes >= 0).any():
+        return None
+    return pd.Categorical.from_codes(codes, categories=_SYMBOLS)
+
+
+def _cast_numeric(values: np.ndarray, missing: np.ndarray, predicate_type: str):
+    """Cast float64 values to the smallest lossless dtype for their predicateType."""
+    present = values[~missing]
+    if predicate_type == 'int' and np.array_equal(present, np.floor(present)):
+        if present.size == 0 or (present.min() >= _INT32.min and present.max() <= _INT32.max):
+            dtype = np.int32
+        else:
+            dtype = np.int64
+        data = np.where(missing, 0, values).astype(dtype)
+        if missing.any():
+            return pd.arrays.IntegerArray(data, missing)
+        return data
+
+    values = np.where(missing, np.nan, values)
+    compact = values.astype(np.float32)
+    if np.array_equal(compact[~missing].astype(np.float64), present):
+        return compact
+    return values
+
+
+def typed_columns(columns: Iterable[Tuple[str, object]], metadata: Dict[str, Dict],
+                  existing: Optional[set] = None) -> Iterator[Tuple[str, object]]:
+    """
+    Convert raw columns one at a time.
+
+    Args:
+        columns: (name, values) pairs; values are Series or arrays of strings
+        metadata: Variable code -> metadata dict with a 'predicateType' entry
+        existing: Column names already present, so annotation columns the API
+            sent itself are not generated a second time
+
+    Yields:
+        (name, values) for each converted column, followed directly by its
+        annotation column when jam values were found
+    """
+    existing = existing or set()
+    for name, column in columns:
+        predicate_type = metadata.get(name, {}).get('predicateType')
+
+        if name in GEOGRAPHY_COLUMNS:
+            yield name, pd.Categorical(column)
+            continue
+        if (predicate_type not in NUMERIC_PREDICATE_TYPES
+                or getattr(column, 'dtype', np.dtype(object)).kind in 'iuf'):
+            yield name, column
+            continue
+
+        values = pd.to_numeric(column, errors='coerce')
+        values = np.asarray(values, dtype=np.float64)
+        annotations = _annotation_column(values)
+        missing = np.isnan(values)
+        if annotations is not None:
+            missing |= annotations.codes >= 0
+        yield name, _cast_numeric(values, missing, predicate_type)
+
+        annotation_name = f'{name}A'
+        if annotations is not None and annotation_name not in existing:
+            yield annotation_name, annotations
+
+
+def table_metadata(year, acs_type: str, table: str) -> Dict[str, Dict]:
+    """Return the cached metadata for a year and table, or {} if it cannot be loaded."""
+    try:
+        return metadata_cache.get(year, acs_type, get_table_type(table))
+    except Exception as e:
+        print(f"Variable metadata unavailable, leaving values as text: {str(e)}")  # Debug print
+        return {}
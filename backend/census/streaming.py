@@ -0,0 +1,174 @@
+"""
+Constant-memory streaming of Census API responses to CSV.
+
+The API returns a JSON array of rows. iter_json_rows decodes those rows one
+at a time from the response body as it downloads, so rows can be written to
+the output file, a batch at a time, without holding the whole response in
+memory.
+"""
+
+import codecs
+import csv
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from census.client import census_client
+from census.frames import build_frame, output_columns
+from census.query import CensusAPIError
+
+# Bytes read from the socket per iteration
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Decoded rows typed and written to the CSV at a time
+STREAM_BATCH_ROWS = 10000
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_rows(chunks: Iterable[bytes]) -> Iterator[list]:
+    """
+    Incrementally decode a JSON array of arrays.
+
+    Args:
+        chunks: Raw response body in pieces (e.g. response.iter_content())
+
+    Yields:
+        list: Each inner array, in order
+
+    Raises:
+        ValueError: If the body is not a JSON array of values
+    """
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+    pos = 0
+    started = False
+    exhausted = False
+    # Separator state: a row was just read / a comma was just read
+    after_row = False
+    expect_row = False
+
+    def read_more() -> bool:
+        nonlocal buffer, pos, exhausted
+        if exhausted:
+            return False
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            exhausted = True
+            buffer = buffer[pos:] + text_decoder.decode(b'', final=True)
+            pos = 0
+            return False
+        # Drop consumed text so the buffer only ever holds about one chunk
+        buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buffer):
+            if read_more():
+                continue
+            raise ValueError('Unexpected end of response')
+
+        char = buffer[pos]
+        if not started:
+            if char != '[':
+                raise ValueError('Response is not a JSON array')
+            started = True
+            pos += 1
+            continue
+        if char == ']' and not expect_row:
+            return
+        if after_row:
+            # Rows must be separated by exactly one comma
+            if char != ',':
+                raise ValueError(f'Expected , or ] after row, found {char!r}')
+            pos += 1
+            after_row, expect_row = False, True
+            continue
+        if char != '[':
+            raise ValueError(f'Expected a row array, found {char!r}')
+
+        try:
+            row, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Row is split across chunks; fetch more and retry
+            if read_more():
+                continue
+            raise
+        pos = end
+        after_row, expect_row = True, False
+        yield row
+
+
+def stream_to_csv(api_url: str, csv_file: TextIO, year,
+                  title_row_for: Callable[[List[str]], List[str]],
+                  metadata: Optional[Dict[str, Dict]] = None,
+                  chunk_size: int = STREAM_CHUNK_SIZE,
+                  batch_rows: int = STREAM_BATCH_ROWS) -> int:
+    """
+    Stream a Census API response straight into a CSV file.
+
+    Writes the header row, the title row and then the data rows with a Year
+    column appended. Rows are typed in batches as they are decoded, with
+    the same frame builder and column layout (see census.frames) as a CSV
+    written from a fully fetched result, so memory is bounded by the batch.
+
+    Args:
+        api_url: Census API URL
+        csv_file: Open text file to write to
+        year: Year value appended to each row
+        title_row_for: Callable building the title row from the data columns
+        metadata: Variable metadata for typing; None leaves values as text
+        chunk_size: Bytes read per iteration
+        batch_rows: Rows typed and written at a time
+
+    Returns:
+        int: Number of data rows written
+
+    Raises:
+        CensusAPIError: If the request fails or the response has no data rows
+    """
+    print(f"Streaming URL: {api_url}")  # Debug print
+    response = census_client.get(api_url, stream=True)
+    try:
+        if response.status_code != 200:
+            raise CensusAPIError(f"API request failed with status code {response.status_code}. "
+                                 f"Response: {response.text}")
+
+        rows = iter_json_rows(response.iter_content(chunk_size=chunk_size))
+        try:
+            header: Optional[List[str]] = next(rows, None)
+            if header is None:
+                raise CensusAPIError("No data received from the API")
+            columns = output_columns(header, metadata) + ['Year']
+            writer = csv.writer(csv_file)
+            writer.writerow(columns)
+            writer.writerow(title_row_for(columns[:-1]) + ['Year'])
+
+            def write(batch):
+                frame = build_frame([header] + batch, metadata, constants={'Year': year})
+                frame.reindex(columns=columns).to_csv(csv_file, header=False, index=False)
+
+            count = 0
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == batch_rows:
+                    write(batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                write(batch)
+                count += len(batch)
+        except ValueError as e:
+            raise CensusAPIError(f"Failed to parse API response: {str(e)}")
+
+        if count == 0:
+            raise CensusAPIError("No data received from the API")
+        return count
+    finally:
+        response.close()
@@ -0,0 +1,314 @@
+"""
+Search index over Census variable metadata for autocomplete.
+
+One index file is built per (year, acs_type) from the cached variables.json
+metadata of the detailed and data profile tables. The file is a flat binary
+layout that is memory-mapped at query time, so lookups never parse JSON or
+touch the network:
+
+    magic | header length | JSON header | 8-byte aligned arrays
+
+The arrays hold:
+    codes        variable codes in sorted order (UTF-8 blob + offsets)
+    records      code, label, concept and group of every variable (UTF-8 blob + offsets)
+    tokens       sorted distinct lowercase tokens (blob + offsets); a token
+                 prefix maps to one contiguous range, so the sorted array
+                 acts as a flattened prefix trie searched by bisection
+    postings     ascending variable ids per token (inverted index)
+
+Building one downloads the vintage's metadata, too slow for an autocomplete
+request: a lookup of a vintage with no index file starts the build on a
+background thread and gets VariableIndexNotReady until the file exists. A
+failed build is retried after VARIABLE_INDEX_RETRY_SECONDS; until then
+lookups get VariableIndexUnavailable. Build ahead of time with:
+
+    python -m census.variable_index 2022 acs5 [2021 acs1 ...]
+"""
+
+import bisect
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import config
+from census.metadata_cache import metadata_cache
+from census.quota import PRIORITY_BACKGROUND, priority
+
+INDEX_FORMAT_VERSION = 1
+MAGIC = b'ACSVIDX1'
+TABLE_TYPES = ('', '/profile')
+RECORD_FIELDS = ('code', 'label', 'concept', 'group')
+
+_TOKEN = re.compile(r'[a-z0-9_]+')
+_SEPARATOR = '\x1f'
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search tokens; variable codes stay whole."""
+    return _TOKEN.findall(text.lower().replace('!!', ' '))
+
+
+def _pack_strings(strings: List[str]):
+    """Concatenate strings into a UTF-8 blob plus an offsets array."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def build_index(year, acs_type: str, path: str) -> int:
+    """
+    Build the index file for a year and survey from the metadata cache.
+
+    Args:
+        year: Year of data
+        acs_type: ACS survey type
+        path: Output file
+
+    Returns:
+        int: Number of variables indexed
+    """
+    variables = {}
+    for table_type in TABLE_TYPES:
+        for code, info in metadata_cache.get(year, acs_type, table_type).items():
+            # Annotation variables (EA/MA) only duplicate their estimate's label
+            if info.get('label', '').startswith('Annotation of'):
+                continue
+            variables[code] = info
+    codes = sorted(variables)
+
+    records = []
+    postings = defaultdict(set)
+    for var_id, code in enumerate(codes):
+        info = variables[code]
+        fields = [code, info.get('label', ''), info.get('concept', ''), info.get('group', '')]
+        records.append(_SEPARATOR.join(fields))
+        for token in set(tokenize(' '.join(fields))):
+            postings[token].add(var_id)
+
+    tokens = sorted(postings)
+    posting_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum([len(postings[t]) for t in tokens], out=posting_offsets[1:])
+    code_blob, code_offsets = _pack_strings(codes)
+    record_blob, record_offsets = _pack_strings(records)
+    token_blob, token_offsets = _pack_strings(tokens)
+    arrays = {
+        'code_blob': code_blob,
+        'code_offsets': code_offsets,
+        'record_blob': record_blob,
+        'record_offsets': record_offsets,
+        'token_blob': token_blob,
+        'token_offsets': token_offsets,
+        'posting_offsets': posting_offsets,
+        'postings': np.fromiter((i for t in tokens for i in sorted(postings[t])),
+                                dtype=np.int32, count=int(posting_offsets[-1])),
+    }
+
+    # Header records each array's dtype, offset and length relative to the data start
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        layout[name] = [array.dtype.str, position, len(array)]
+        position += -(-array.nbytes // 8) * 8
+    header = json.dumps({'version': INDEX_FORMAT_VERSION, 'year': str(year),
+                         'acs_type': acs_type, 'arrays': layout}).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 8 + len(header)) % 8)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for array in arrays.values():
+            f.write(array.tobytes())
+            f.write(b'\0' * (-array.nbytes % 8))
+    os.replace(tmp_path, path)
+    return len(codes)
+
+
+class _Strings:
+    """Sequence view over a blob + offsets pair, decoded on access."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+
+class VariableIndex:
+    """Read-only, memory-mapped view of one index file."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a variable index file")
+            header_length = struct.unpack('<Q', f.read(8))[0]
+            header = json.loads(f.read(header_length))
+        if header['version'] != INDEX_FORMAT_VERSION:
+            raise ValueError(f"{path} has index format {header['version']}")
+
+        mapped = np.memmap(path, dtype=np.uint8, mode='r')
+        start = len(MAGIC) + 8 + header_length
+        arrays = {}
+        for name, (dtype, offset, length) in header['arrays'].items():
+            dtype = np.dtype(dtype)
+            arrays[name] = mapped[start + offset:start + offset + length * dtype.itemsize].view(dtype)
+
+        self.codes = _Strings(arrays['code_blob'], arrays['code_offsets'])
+        self.records = _Strings(arrays['record_blob'], arrays['record_offsets'])
+        self.tokens = _Strings(arrays['token_blob'], arrays['token_offsets'])
+        self.posting_offsets = arrays['posting_offsets']
+        self.postings = arrays['postings']
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @staticmethod
+    def _prefix_range(strings: _Strings, prefix: str):
+        """Index range of the sorted strings that start with prefix."""
+        lo = bisect.bisect_left(strings, prefix)
+        return lo, bisect.bisect_left(strings, prefix + '\uffff', lo)
+
+    def _prefix_matches(self, prefix: str) -> np.ndarray:
+        """Variable ids having any token that starts with prefix."""
+        lo, hi = self._prefix_range(self.tokens, prefix)
+        if lo == hi:
+            return np.empty(0, dtype=np.int32)
+        if hi - lo == 1:
+            return self.postings[self.posting_offsets[lo]:self.posting_offsets[lo + 1]]
+        return np.unique(self.postings[self.posting_offsets[lo]:self.posting_offsets[hi]])
+
+    def record(self, var_id: int) -> Dict[str, str]:
+        return dict(zip(RECORD_FIELDS, self.records[int(var_id)].split(_SEPARATOR)))
+
+    def search(self, query: str, limit: int = 20, table: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Find variables matching every term of the query as a prefix.
+
+        Args:
+            query: Free text, a code or a code prefix (e.g. 'B01001_0', 'median income')
+            limit: Maximum number of results
+            table: Only return variables of this table/group, if given
+
+        Returns:
+            list: Records (code, label, concept, group), codes starting with
+                the query first, then in code order
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        matches = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            ids = self._prefix_matches(term)
+            matches = ids if matches is None else np.intersect1d(matches, ids, assume_unique=True)
+            if not len(matches):
+                return []
+
+        # Ids are assigned in code order, so a code prefix is an id range
+        if table:
+            lo, hi = self._prefix_range(self.codes, f'{table.upper()}_')
+            matches = matches[(matches >= lo) & (matches < hi)]
+        lo, hi = self._prefix_range(self.codes, query.strip().upper())
+        code_hits = (matches >= lo) & (matches < hi)
+        ranked = np.concatenate([matches[code_hits], matches[~code_hits]])
+        return [self.record(var_id) for var_id in ranked[:limit]]
+
+
+class VariableIndexNotReady(Exception):
+    """Raised while a requested index is still being built in the background."""
+
+
+class VariableIndexUnavailable(Exception):
+    """Raised when the last build of an index failed and its retry is not yet due."""
+
+
+class VariableIndexStore:
+    """Locates, builds in the background and keeps open the per-vintage index files."""
+
+    def __init__(self, index_dir: str, max_open: int = 8,
+                 retry_seconds: float = config.VARIABLE_INDEX_RETRY_SECONDS):
+        self.index_dir = os.path.join(index_dir, f'v{INDEX_FORMAT_VERSION}')
+        self.max_open = max_open
+        self.retry_seconds = retry_seconds
+        self._open = OrderedDict()
+        self._building = set()
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    def path(self, year, acs_type: str) -> str:
+        return os.path.join(self.index_dir, f'{year}_{acs_type}.idx')
+
+    def _build_in_background(self, year: str, acs_type: str) -> None:
+        try:
+            with priority(PRIORITY_BACKGROUND):
+                build_index(year, acs_type, self.path(year, acs_type))
+        except Exception as e:
+            print(f"Variable index build for {year} {acs_type} failed: {str(e)}")  # Debug print
+            with self._lock:
+                self._failed[(year, acs_type)] = (time.time(), str(e))
+        finally:
+            with self._lock:
+                self._building.discard((year, acs_type))
+
+    def get(self, year, acs_type: str) -> VariableIndex:
+        """
+        Return the open index for a year and survey.
+
+        Raises:
+            VariableIndexNotReady: If the index file does not exist yet; its
+                build is started in the background (once per process)
+            VariableIndexUnavailable: If the last build failed less than
+                retry_seconds ago
+        """
+        key = (str(year), acs_type)
+        with self._lock:
+            index = self._open.get(key)
+            if index is not None:
+                self._open.move_to_end(key)
+                return index
+
+            path = self.path(*key)
+            if os.path.exists(path):
+                index = self._open[key] = VariableIndex(path)
+                while len(self._open) > self.max_open:
+                    self._open.popitem(last=False)
+                return index
+
+            failed = self._failed.get(key)
+            if failed is not None and time.time() - failed[0] < self.retry_seconds:
+                raise VariableIndexUnavailable(f"The variable index for {year} {acs_type} could "
+                                               f"not be built: {failed[1]}")
+            if key not in self._building:
+                self._failed.pop(key, None)
+                self._building.add(key)
+                threading.Thread(target=self._build_in_background, args=key, daemon=True,
+                                 name=f'acs-variable-index-{year}').start()
+        raise VariableIndexNotReady(f"The variable index for {year} {acs_type} is still being "
+                                    f"built; try again shortly")
+
+    def search(self, year, acs_type: str, query: str, limit: int = 20,
+               table: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.get(year, acs_type).search(query, limit=limit, table=table)
+
+
+variable_index = VariableIndexStore(config.VARIABLE_INDEX_DIR)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if not args or len(args) % 2:
+        sys.exit('usage: python -m census.variable_index YEAR ACS_TYPE [YEAR ACS_TYPE ...]')
+    for year, acs_type in zip(args[::2], args[1::2]):
+        count = build_index(year, acs_type, variable_index.path(year, acs_type))
+        print(f"Indexed {count} variables for {year} {acs_type}")
@@ -0,0 +1,89 @@
+"""
+Configuration settings for the ACS Data Application.
+Values are read from environment variables (see .env) with sensible defaults.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Database connection pool
+DB_POOL_MIN_CONNECTIONS = int(os.getenv('DB_POOL_MIN_CONNECTIONS', '1'))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv('DB_POOL_MAX_CONNECTIONS', '10'))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '30'))
+
+# Background jobs for /api/submit
+JOB_MAX_WORKERS = int(os.getenv('JOB_MAX_WORKERS', '4'))
+JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', '3600'))
+# Job state shared by all worker processes (SQLite file)
+JOB_DB = os.getenv('JOB_DB', 'cache/jobs.sqlite3')
+
+# Census API
+CENSUS_API_BASE = os.getenv('CENSUS_API_BASE', 'https://api.census.gov/data')
+CENSUS_MAX_CONNECTIONS_PER_HOST = int(os.getenv('CENSUS_MAX_CONNECTIONS_PER_HOST', '10'))
+CENSUS_CONNECT_TIMEOUT = float(os.getenv('CENSUS_CONNECT_TIMEOUT', '5'))
+CENSUS_READ_TIMEOUT = float(os.getenv('CENSUS_READ_TIMEOUT', '60'))
+CENSUS_MAX_RETRIES = int(os.getenv('CENSUS_MAX_RETRIES', '3'))
+CENSUS_BACKOFF_BASE = float(os.getenv('CENSUS_BACKOFF_BASE', '0.5'))
+
+# Concurrent fan-out
+MULTIYEAR_MAX_WORKERS = int(os.getenv('MULTIYEAR_MAX_WORKERS', '8'))
+CHUNK_MAX_WORKERS = int(os.getenv('CHUNK_MAX_WORKERS', '4'))
+GEOGRAPHY_MAX_WORKERS = int(os.getenv('GEOGRAPHY_MAX_WORKERS', '6'))
+REPLAY_MAX_WORKERS = int(os.getenv('REPLAY_MAX_WORKERS', '4'))
+# Worker processes of the batch extraction CLI (python -m batch.extract)
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '4'))
+
+# Stream single-request downloads straight to CSV instead of building a DataFrame
+STREAMING_OUTPUT = os.getenv('STREAMING_OUTPUT', 'false').lower() in ('1', 'true', 'yes')
+
+# Variable metadata cache (variables.json)
+METADATA_CACHE_DIR = os.getenv('METADATA_CACHE_DIR', 'cache/metadata')
+METADATA_CACHE_MEMORY_ENTRIES = int(os.getenv('METADATA_CACHE_MEMORY_ENTRIES', '16'))
+
+# Census API response cache (Parquet files keyed by query fingerprint)
+RESPONSE_CACHE_DIR = os.getenv('RESPONSE_CACHE_DIR', 'cache/responses')
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(1024 ** 3)))
+
+# Server-side DataTables endpoint
+DATATABLE_CACHE_ENTRIES = int(os.getenv('DATATABLE_CACHE_ENTRIES', '32'))
+DATATABLE_DEFAULT_PAGE_LENGTH = 25
+DATATABLE_MAX_PAGE_LENGTH = int(os.getenv('DATATABLE_MAX_PAGE_LENGTH', '1000'))
+
+# Rendered saved-search pages, kept with pre-compressed bodies
+RENDER_CACHE_MAX_BYTES = int(os.getenv('RENDER_CACHE_MAX_BYTES', str(64 * 1024 ** 2)))
+
+# Output written by fetch_and_save_data: 'csv' files or the partitioned 'parquet' dataset
+OUTPUT_FORMAT = os.getenv('OUTPUT_FORMAT', 'csv').lower()
+DATASET_DIR = os.getenv('DATASET_DIR', 'census_data/dataset')
+
+# Variable search index for autocomplete (built from the metadata cache)
+VARIABLE_INDEX_DIR = os.getenv('VARIABLE_INDEX_DIR', 'cache/variable_index')
+# Seconds before a failed background index build is retried
+VARIABLE_INDEX_RETRY_SECONDS = int(os.getenv('VARIABLE_INDEX_RETRY_SECONDS', '900'))
+
+# Cross-year variable crosswalk (built from the metadata cache)
+CROSSWALK_DIR = os.getenv('CROSSWALK_DIR', 'cache/crosswalk')
+CROSSWALK_FIRST_YEAR = int(os.getenv('CROSSWALK_FIRST_YEAR', '2009'))
+CROSSWALK_LAST_YEAR = int(os.getenv('CROSSWALK_LAST_YEAR', '2022'))
+# Seconds before a failed background crosswalk build is retried
+CROSSWALK_RETRY_SECONDS = int(os.getenv('CROSSWALK_RETRY_SECONDS', '900'))
+
+# Local store of bulk-loaded Census data (database URL; unset to always use the API)
+LOCAL_STORE_URL = os.getenv('LOCAL_STORE_URL')
+LOCAL_STORE_COVERAGE_TTL = float(os.getenv('LOCAL_STORE_COVERAGE_TTL', '300'))
+
+# Opt-in request profiling: requests with ?profile=1 are run under cProfile
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'cache/profiles')
+
+# Census API quota shared by all worker processes (token buckets in a SQLite file)
+CENSUS_QUOTA_ENABLED = os.getenv('CENSUS_QUOTA_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CENSUS_QUOTA_DB = os.getenv('CENSUS_QUOTA_DB', 'cache/census_quota.sqlite3')
+CENSUS_KEYLESS_DAILY_LIMIT = int(os.getenv('CENSUS_KEYLESS_DAILY_LIMIT', '500'))
+CENSUS_KEYED_RATE_PER_SECOND = float(os.getenv('CENSUS_KEYED_RATE_PER_SECOND', '10'))
+CENSUS_KEYED_BURST = int(os.getenv('CENSUS_KEYED_BURST', '50'))
+CENSUS_QUOTA_MAX_WAIT = float(os.getenv('CENSUS_QUOTA_MAX_WAIT', '300'))
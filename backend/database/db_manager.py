@@ -1,23 +1,110 @@
 """
 Database helper functions for the ACS Data Application.
 Provides an interface for common database operations.
+
+Search and project listings are keyset-paginated: each page ends with an
+opaque cursor encoding the (timestamp, id) of its last row, and the next
+page continues strictly after it, so every page costs one index range scan
+however deep the user pages.
 """
 
+import base64
 import psycopg2
-from psycopg2.extras import DictCursor
+from psycopg2.extras import DictCursor, Json
 from datetime import datetime
 import bcrypt
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+
+from database.pool import ConnectionPool
+from telemetry.metrics import timed
+
+# Hot queries run as server-side prepared statements ($n placeholders)
+SQL_SAVE_SEARCH = """
+    INSERT INTO searches
+    (user_id, project_id, table_name, year, acs_type, geography, variables)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+    RETURNING search_id
+"""
+
+# Prepared statements list their columns: a plan cached for s.* fails once a
+# migration adds a column
+SQL_GET_SEARCH = """
+    SELECT s.search_id, s.user_id, s.project_id, s.table_name, s.year, s.acs_type,
+        s.geography, s.variables, s.derived_variables, s.search_timestamp, s.is_saved,
+        p.project_name
+    FROM searches s
+    LEFT JOIN projects p ON s.project_id = p.project_id
+    WHERE s.search_id = $1
+"""
+
+# Search counts come from one aggregate over the (project_id, ...) index instead
+# of a correlated COUNT(*) per project
+SQL_GET_USER_PROJECTS = """
+    SELECT p.project_id, p.project_name, p.description, p.created_at, p.updated_at,
+        COALESCE(c.search_count, 0) AS search_count
+    FROM projects p
+    LEFT JOIN (
+        SELECT project_id, COUNT(*) AS search_count
+        FROM searches
+        WHERE project_id IN (SELECT project_id FROM projects WHERE user_id = $1)
+        GROUP BY project_id
+    ) c ON c.project_id = p.project_id
+    WHERE p.user_id = $1
+    ORDER BY p.updated_at DESC, p.project_id DESC
+"""
+
+# Listing columns only, so the query is answered from the covering listing indexes
+SEARCH_LISTING_COLUMNS = """
+    s.search_id, s.user_id, s.project_id, s.table_name, s.year, s.acs_type,
+    s.geography, s.is_saved, s.search_timestamp, p.project_name
+"""
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the row a page ended on."""
+    raw = f'{timestamp.isoformat()}|{row_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor from encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
 
 class DatabaseManager:
-    def __init__(self, database_url: str):
-        """Initialize database connection."""
+    def __init__(self, database_url: str, min_connections: int = 1,
+                 max_connections: int = 10, checkout_timeout: float = 30.0):
+        """Initialize the database connection pool (connections open lazily)."""
         self.database_url = database_url
+        self.pool = ConnectionPool(database_url, min_connections=min_connections,
+                                   max_connections=max_connections,
+                                   checkout_timeout=checkout_timeout)
         
     def get_connection(self):
-        """Create and return a new database connection."""
-        return psycopg2.connect(self.database_url)
+        """
+        Check out a pooled connection for use in a with-block.
+
+        The transaction is committed when the block exits normally, rolled
+        back on an exception, and the connection is returned to the pool.
+        """
+        return self.pool.connection()
 
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool saturation and wait-time statistics."""
+        return self.pool.stats()
+
+    @timed('db.create_user')
     def create_user(self, username: str, email: str, password: str) -> Optional[int]:
         """Create a new user in the database."""
         try:
@@ -53,6 +140,7 @@ class DatabaseManager:
             conn.rollback() if 'conn' in locals() else None
             return None
 
+    @timed('db.verify_user')
     def verify_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """
         Verify user credentials and update last login timestamp.
@@ -83,6 +171,7 @@ class DatabaseManager:
                     return dict(user)
                 return None
 
+    @timed('db.create_project')
     def create_project(self, user_id: int, project_name: str, 
                       description: Optional[str] = None) -> Optional[int]:
         """Create a new project for a user."""
@@ -99,6 +188,7 @@ class DatabaseManager:
                     conn.rollback()
                     return None
 
+    @timed('db.save_search')
     def save_search(self, user_id: int, project_id: int, table_name: str,
                    year: int, acs_type: str, geography: str, 
                    variables: List[str]) -> Optional[int]:
@@ -106,19 +196,15 @@ class DatabaseManager:
         with self.get_connection() as conn:
             with conn.cursor() as cur:
                 try:
-                    cur.execute("""
-                        INSERT INTO searches 
-                        (user_id, project_id, table_name, year, acs_type, 
-                         geography, variables)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        RETURNING search_id
-                    """, (user_id, project_id, table_name, year, acs_type,
-                          geography, variables))
+                    self.pool.execute_prepared(cur, 'save_search', SQL_SAVE_SEARCH,
+                                               (user_id, project_id, table_name, year,
+                                                acs_type, geography, variables))
                     return cur.fetchone()[0]
                 except psycopg2.Error:
                     conn.rollback()
                     return None
 
+    @timed('db.save_ai_interaction')
     def save_ai_interaction(self, project_id: int, user_id: int,
                           query_text: str, response_text: str) -> Optional[int]:
         """Save an AI interaction to the database."""
@@ -136,19 +222,68 @@ class DatabaseManager:
                     conn.rollback()
                     return None
 
-    def get_user_searches(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get all searches for a user."""
+    @timed('db.list_searches')
+    def list_searches(self, user_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                      cursor: Optional[str] = None, is_saved: Optional[bool] = None,
+                      project_id: Optional[int] = None, table_name: Optional[str] = None,
+                      year: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of a user's searches, newest first.
+
+        Args:
+            user_id: Owner of the searches
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            cursor: next_cursor of the previous page, or None for the first page
+            is_saved: Only saved (True) or unsaved (False) searches
+            project_id: Only searches in this project
+            table_name: Only searches of this table
+            year: Only searches for this year
+
+        Returns:
+            tuple: (searches, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        conditions = ['s.user_id = %s']
+        params: List[Any] = [user_id]
+        if project_id is not None:
+            conditions.append('s.project_id = %s')
+            params.append(project_id)
+        if is_saved is not None:
+            conditions.append('s.is_saved = %s')
+            params.append(is_saved)
+        if table_name:
+            conditions.append('s.table_name = %s')
+            params.append(table_name)
+        if year is not None:
+            conditions.append('s.year = %s')
+            params.append(year)
+        if cursor:
+            conditions.append('(s.search_timestamp, s.search_id) < (%s, %s)')
+            params.extend(decode_cursor(cursor))
+
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("""
-                    SELECT s.*, p.project_name
+                # One extra row tells whether another page follows
+                cur.execute(f"""
+                    SELECT {SEARCH_LISTING_COLUMNS}
                     FROM searches s
                     LEFT JOIN projects p ON s.project_id = p.project_id
-                    WHERE s.user_id = %s
-                    ORDER BY s.search_timestamp DESC
-                """, (user_id,))
-                return [dict(row) for row in cur.fetchall()]
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY s.search_timestamp DESC, s.search_id DESC
+                    LIMIT %s
+                """, (*params, limit + 1))
+                rows = [dict(row) for row in cur.fetchall()]
 
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['search_timestamp'], rows[-1]['search_id'])
+        return rows, next_cursor
+
+    @timed('db.get_project_searches')
     def get_project_searches(self, project_id: int) -> List[Dict[str, Any]]:
         """Get all searches for a project."""
         with self.get_connection() as conn:
@@ -162,19 +297,16 @@ class DatabaseManager:
                 return [dict(row) for row in cur.fetchall()]
             
     
+    @timed('db.get_search')
     def get_search(self, search_id: int) -> Optional[Dict[str, Any]]:
         """Get a single search by ID."""
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("""
-                    SELECT s.*, p.project_name
-                    FROM searches s
-                    LEFT JOIN projects p ON s.project_id = p.project_id
-                    WHERE s.search_id = %s
-                """, (search_id,))
+                self.pool.execute_prepared(cur, 'get_search', SQL_GET_SEARCH, (search_id,))
                 result = cur.fetchone()
                 return dict(result) if result else None
 
+    @timed('db.update_search_saved_status')
     def update_search_saved_status(self, search_id: int, is_saved: bool) -> bool:
         """Update the saved status of a search."""
         with self.get_connection() as conn:
@@ -191,6 +323,25 @@ class DatabaseManager:
                     conn.rollback()
                     return False
 
+    @timed('db.update_search_derived')
+    def update_search_derived(self, search_id: int, definitions: List[Dict[str, Any]]) -> bool:
+        """Replace the derived-variable definitions of a search."""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                try:
+                    cur.execute("""
+                        UPDATE searches
+                        SET derived_variables = %s
+                        WHERE search_id = %s
+                        RETURNING search_id
+                    """, (Json(definitions), search_id))
+                    return cur.fetchone() is not None
+                except psycopg2.Error as e:
+                    print(f"Error saving derived variables: {str(e)}")  # Debug print
+                    conn.rollback()
+                    return False
+
+    @timed('db.delete_search')
     def delete_search(self, search_id: int) -> bool:
         """Delete a search."""
         with self.get_connection() as conn:
@@ -207,19 +358,68 @@ class DatabaseManager:
                     return False
 
 
+    @timed('db.get_user_projects')
     def get_user_projects(self, user_id: int) -> List[Dict[str, Any]]:
         """Get all projects for a user."""
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("""
-                    SELECT project_id, project_name, description, created_at, updated_at,
-                        (SELECT COUNT(*) FROM searches WHERE searches.project_id = projects.project_id) as search_count
-                    FROM projects
-                    WHERE user_id = %s
-                    ORDER BY updated_at DESC
-                """, (user_id,))
+                self.pool.execute_prepared(cur, 'get_user_projects',
+                                           SQL_GET_USER_PROJECTS, (user_id,))
                 return [dict(row) for row in cur.fetchall()]
 
+    @timed('db.list_projects')
+    def list_projects(self, user_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                      cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of a user's projects with their search counts, most recently updated first.
+
+        Args:
+            user_id: Owner of the projects
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            cursor: next_cursor of the previous page, or None for the first page
+
+        Returns:
+            tuple: (projects, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        keyset = ''
+        params: List[Any] = [user_id]
+        if cursor:
+            keyset = 'AND (updated_at, project_id) < (%s, %s)'
+            params.extend(decode_cursor(cursor))
+
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=DictCursor) as cur:
+                cur.execute(f"""
+                    WITH page AS (
+                        SELECT project_id, project_name, description, created_at, updated_at
+                        FROM projects
+                        WHERE user_id = %s {keyset}
+                        ORDER BY updated_at DESC, project_id DESC
+                        LIMIT %s
+                    )
+                    SELECT page.*, COALESCE(c.search_count, 0) AS search_count
+                    FROM page
+                    LEFT JOIN (
+                        SELECT project_id, COUNT(*) AS search_count
+                        FROM searches
+                        WHERE project_id IN (SELECT project_id FROM page)
+                        GROUP BY project_id
+                    ) c ON c.project_id = page.project_id
+                    ORDER BY page.updated_at DESC, page.project_id DESC
+                """, (*params, limit + 1))
+                rows = [dict(row) for row in cur.fetchall()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['updated_at'], rows[-1]['project_id'])
+        return rows, next_cursor
+
+    @timed('db.delete_project')
     def delete_project(self, project_id: int) -> bool:
         """Delete a project and all associated searches."""
         with self.get_connection() as conn:
@@ -0,0 +1,271 @@
+"""
+Local store of ACS estimates loaded from Census bulk files.
+
+Census table-based summary files (pipe-delimited, one file per table, e.g.
+acsdt5y2022-b01001.dat) are bulk-loaded with COPY into the acs_estimates
+table, one row per geography. The data layer answers queries from the
+store when it has the requested table, year, survey, geography level and
+variables, and goes to the live API otherwise.
+
+Ingest with:
+
+    python -m database.local_store FILE --table B01001 --year 2022 --acs-type acs5 [--geos Geos20225YR.txt]
+"""
+
+import argparse
+import csv
+import json
+import re
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+import config
+from census.geography import parse_geography
+from database.pool import ConnectionPool
+
+# Summary level (first three digits of GEO_ID) -> geography columns the API returns
+SUMMARY_LEVELS = {
+    '010': ('us',),
+    '020': ('region',),
+    '030': ('division',),
+    '040': ('state',),
+    '050': ('state', 'county'),
+    '060': ('state', 'county', 'county subdivision'),
+    '140': ('state', 'county', 'tract'),
+    '150': ('state', 'county', 'tract', 'block group'),
+    '160': ('state', 'place'),
+    '860': ('zip code tabulation area',),
+}
+
+# Width of each geography code inside GEO_ID
+CODE_WIDTHS = {'region': 1, 'division': 1, 'state': 2, 'county': 3, 'county subdivision': 5,
+               'tract': 6, 'block group': 1, 'place': 5, 'zip code tabulation area': 5}
+
+LEVEL_COLUMNS = {columns[-1]: columns for columns in SUMMARY_LEVELS.values()}
+
+# Summary-file column names (B01001_E001) -> API variable codes (B01001_001E)
+_SUMMARY_FILE_COLUMN = re.compile(r'^([A-Z0-9]+)_([EM])(\d+)$')
+
+SQL_COVERAGE = """
+    SELECT table_name, year, acs_type, geo_level, variables FROM acs_store_coverage
+"""
+
+
+def api_variable_code(column: str) -> str:
+    """Convert a summary-file column name to its API variable code."""
+    match = _SUMMARY_FILE_COLUMN.match(column)
+    return f'{match.group(1)}_{match.group(3)}{match.group(2)}' if match else column
+
+
+def parse_geo_id(geo_id: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    Split a GEO_ID into its geography level and codes.
+
+    Args:
+        geo_id: Census GEO_ID (e.g. '0500000US06001')
+
+    Returns:
+        tuple: (level, {column: code}), e.g. ('county', {'state': '06', 'county': '001'}),
+            or None for summary levels and components the store does not handle
+    """
+    prefix, _, codes = geo_id.partition('US')
+    columns = SUMMARY_LEVELS.get(prefix[:3])
+    # Geographic components (urban/rural parts etc.) have a non-zero suffix
+    if columns is None or prefix[3:] != '0000':
+        return None
+    if columns == ('us',):
+        return 'us', {'us': '1'}
+    result, position = {}, 0
+    for column in columns:
+        width = CODE_WIDTHS[column]
+        result[column] = codes[position:position + width]
+        position += width
+    return columns[-1], result
+
+
+def _read_names(geos_path: Optional[str]) -> Dict[str, str]:
+    """Read GEO_ID -> NAME from a summary-file geography file."""
+    if not geos_path:
+        return {}
+    with open(geos_path, newline='', encoding='latin-1') as f:
+        return {row['GEO_ID']: row['NAME'] for row in csv.DictReader(f, delimiter='|')}
+
+
+class LocalStore:
+    """Reads and loads the acs_estimates store through a connection pool."""
+
+    def __init__(self, pool: ConnectionPool, coverage_ttl: float = 300.0):
+        """
+        Initialize the store.
+
+        Args:
+            pool: Connection pool for the database holding acs_estimates
+            coverage_ttl: Seconds the loaded-coverage list is cached in memory
+        """
+        self.pool = pool
+        self.coverage_ttl = coverage_ttl
+        self._coverage = None
+        self._coverage_loaded = 0.0
+        self._lock = threading.Lock()
+
+    def _coverage_map(self) -> Dict[Tuple[str, str, str, str], Set[str]]:
+        with self._lock:
+            if self._coverage is None or time.monotonic() - self._coverage_loaded > self.coverage_ttl:
+                with self.pool.connection() as conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_COVERAGE)
+                        rows = cur.fetchall()
+                self._coverage = {(table, str(year), acs_type, level): set(variables)
+                                  for table, year, acs_type, level, variables in rows}
+                self._coverage_loaded = time.monotonic()
+            return self._coverage
+
+    def covers(self, year, acs_type: str, table: str, variables: List[str], geography: str) -> bool:
+        """Whether the store holds every variable of a query at its geography level."""
+        level = parse_geography(geography)[0]
+        try:
+            loaded = self._coverage_map().get((table, str(year), acs_type, level))
+        except Exception as e:
+            print(f"Local store unavailable: {str(e)}")  # Debug print
+            return False
+        if loaded is None:
+            return False
+        return all(var.strip() in loaded for var in variables if var.strip() and var != 'NAME')
+
+    def fetch(self, year, acs_type: str, table: str, variables: List[str],
+              geography: str) -> pd.DataFrame:
+        """
+        Answer a query from the store, shaped like the API's response.
+
+        Args:
+            year: Year of data
+            acs_type: ACS survey type
+            table: Table name
+            variables: Variable codes; empty returns every loaded variable plus GEO_ID
+            geography: Geography clause (level:code, optionally with in= constraints)
+
+        Returns:
+            pd.DataFrame: NAME, the variables and the geography columns, as strings
+        """
+        level, code, parents = parse_geography(geography)
+        variables = [var.strip() for var in variables if var.strip() and var != 'NAME']
+        sql = ["SELECT geo_id, name, geo_codes,",
+               "estimates" if not variables else
+               "jsonb_build_array(" + ', '.join(['estimates->>%s'] * len(variables)) + ")",
+               "FROM acs_estimates WHERE table_name = %s AND year = %s AND acs_type = %s",
+               "AND geo_level = %s"]
+        params = list(variables) + [table, int(year), acs_type, level]
+        for column, value in [(level, code)] + list(parents.items()):
+            if value and value != '*':
+                sql.append("AND geo_codes->>%s = ANY(%s)")
+                params += [column, value.split(',')]
+        sql.append("ORDER BY geo_id")
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(' '.join(sql), params)
+                rows = cur.fetchall()
+
+        geo_columns = list(LEVEL_COLUMNS.get(level, (level,)))
+        if not variables:
+            variables = sorted({var for row in rows for var in row[3]})
+            columns = ['GEO_ID', 'NAME'] + variables + geo_columns
+            data = [[geo_id, name] + [estimates.get(var) for var in variables]
+                    + [geo_codes.get(col) for col in geo_columns]
+                    for geo_id, name, geo_codes, estimates in rows]
+        else:
+            columns = ['NAME'] + variables + geo_columns
+            data = [[name] + list(values) + [geo_codes.get(col) for col in geo_columns]
+                    for geo_id, name, geo_codes, values in rows]
+        return pd.DataFrame(data, columns=columns)
+
+    def ingest(self, data_path: str, table: str, year, acs_type: str,
+               geos_path: Optional[str] = None) -> Dict[str, int]:
+        """
+        Bulk-load one table-based summary file, replacing earlier loads of it.
+
+        Args:
+            data_path: Pipe-delimited data file with a GEO_ID column followed by
+                estimate/MOE columns (summary-file or API naming)
+            table: Table name the file holds
+            year: Year of data
+            acs_type: ACS survey type
+            geos_path: Optional geography file supplying NAME for each GEO_ID
+
+        Returns:
+            dict: Geography level -> rows loaded
+        """
+        names = _read_names(geos_path)
+        counts: Dict[str, int] = {}
+        variables: Dict[str, List[str]] = {}
+
+        with open(data_path, newline='', encoding='latin-1') as source, \
+                tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024, mode='w+',
+                                              newline='') as buffer:
+            reader = csv.reader(source, delimiter='|')
+            header = next(reader)
+            geo_index = header.index('GEO_ID')
+            codes = [(i, api_variable_code(column)) for i, column in enumerate(header)
+                     if i != geo_index and column.upper() != 'NAME']
+            writer = csv.writer(buffer)
+            for row in reader:
+                parsed = parse_geo_id(row[geo_index])
+                if parsed is None:
+                    continue
+                level, geo_codes = parsed
+                estimates = {code: row[i] for i, code in codes if row[i] != ''}
+                writer.writerow([table, int(year), acs_type, level, row[geo_index],
+                                 names.get(row[geo_index], ''),
+                                 json.dumps(geo_codes, separators=(',', ':')),
+                                 json.dumps(estimates, separators=(',', ':'))])
+                counts[level] = counts.get(level, 0) + 1
+                variables.setdefault(level, [code for _, code in codes])
+
+            buffer.seek(0)
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("DELETE FROM acs_estimates WHERE table_name = %s AND year = %s "
+                                "AND acs_type = %s AND geo_level = ANY(%s)",
+                                (table, int(year), acs_type, list(counts)))
+                    cur.copy_expert("COPY acs_estimates (table_name, year, acs_type, geo_level, "
+                                    "geo_id, name, geo_codes, estimates) FROM STDIN WITH (FORMAT csv)",
+                                    buffer)
+                    for level, row_count in counts.items():
+                        cur.execute("""
+                            INSERT INTO acs_store_coverage
+                                (table_name, year, acs_type, geo_level, variables, row_count)
+                            VALUES (%s, %s, %s, %s, %s, %s)
+                            ON CONFLICT (table_name, year, acs_type, geo_level) DO UPDATE
+                            SET variables = EXCLUDED.variables, row_count = EXCLUDED.row_count,
+                                loaded_at = CURRENT_TIMESTAMP
+                        """, (table, int(year), acs_type, level, variables[level], row_count))
+
+        with self._lock:
+            self._coverage = None
+        return counts
+
+
+local_store = (LocalStore(ConnectionPool(config.LOCAL_STORE_URL,
+                                         max_connections=config.DB_POOL_MAX_CONNECTIONS),
+                          config.LOCAL_STORE_COVERAGE_TTL)
+               if config.LOCAL_STORE_URL else None)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load a Census table-based summary file into the local store.')
+    parser.add_argument('data_file')
+    parser.add_argument('--table', required=True)
+    parser.add_argument('--year', required=True)
+    parser.add_argument('--acs-type', required=True, choices=['acs1', 'acs5'])
+    parser.add_argument('--geos', help='Geography file providing NAME for each GEO_ID')
+    args = parser.parse_args()
+    if local_store is None:
+        sys.exit('Set LOCAL_STORE_URL to the database holding acs_estimates')
+    loaded = local_store.ingest(args.data_file, args.table.upper(), args.year, args.acs_type, args.geos)
+    for level, rows in sorted(loaded.items()):
+        print(f"Loaded {rows} {level} rows for {args.table.upper()} {args.year} {args.acs_type}")
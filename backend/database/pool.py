@@ -0,0 +1,218 @@
+"""
+Thread-safe PostgreSQL connection pool for the ACS Data Application.
+Keeps up to max_connections open connections with blocking checkout, health
+checks, per-connection prepared statements and usage statistics.
+
+Returned connections stay open on an idle list (psycopg2's own pools close
+every connection returned beyond minconn, which turns a burst of requests
+into a connect/disconnect per request). Per-connection state is keyed on the
+connection object, so a connection opened after another was closed never
+inherits its prepared statements.
+"""
+
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+import psycopg2
+import psycopg2.errors
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes free within the checkout timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, database_url: str, min_connections: int = 1,
+                 max_connections: int = 10, checkout_timeout: float = 30.0,
+                 health_check_interval: float = 30.0):
+        """
+        Initialize the pool. Connections are opened lazily on first use.
+
+        Args:
+            database_url: PostgreSQL connection string
+            min_connections: Connections opened together on first use
+            max_connections: Upper bound on open connections
+            checkout_timeout: Seconds to wait for a free connection before giving up
+            health_check_interval: Idle seconds after which a connection is pinged
+                before being handed out
+        """
+        self.database_url = database_url
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        self._started = False
+        self._idle: List = []
+        self._idle_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._last_used = weakref.WeakKeyDictionary()
+        self._prepared = weakref.WeakKeyDictionary()
+        self._in_use = 0
+        self._stats = {'checkouts': 0, 'waits': 0, 'wait_seconds_total': 0.0,
+                       'wait_seconds_max': 0.0, 'timeouts': 0, 'discarded': 0, 'opened': 0}
+
+    def _connect(self):
+        conn = psycopg2.connect(self.database_url)
+        with self._stats_lock:
+            self._stats['opened'] += 1
+        return conn
+
+    def _take_idle(self):
+        """Most recently returned idle connection, or a new one (opening min_connections on first use)."""
+        with self._idle_lock:
+            if not self._started:
+                self._started = True
+                self._idle.extend(self._connect() for _ in range(max(0, self.min_connections - 1)))
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _forget(self, conn) -> None:
+        self._last_used.pop(conn, None)
+        self._prepared.pop(conn, None)
+
+    def _is_healthy(self, conn) -> bool:
+        """Check a connection before handing it out."""
+        if conn.closed:
+            return False
+        idle = time.monotonic() - self._last_used.get(conn, 0.0)
+        if idle < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn) -> None:
+        self._forget(conn)
+        if not conn.closed:
+            conn.close()
+        with self._stats_lock:
+            self._stats['discarded'] += 1
+
+    def checkout(self):
+        """Take a healthy connection from the pool, waiting if all are in use."""
+        start = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            if not self._slots.acquire(timeout=self.checkout_timeout):
+                with self._stats_lock:
+                    self._stats['timeouts'] += 1
+                raise PoolTimeoutError(
+                    f"No database connection available after {self.checkout_timeout}s")
+            waited = time.monotonic() - start
+            with self._stats_lock:
+                self._stats['waits'] += 1
+                self._stats['wait_seconds_total'] += waited
+                self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], waited)
+
+        try:
+            conn = self._take_idle()
+            while not self._is_healthy(conn):
+                self._discard(conn)
+                conn = self._take_idle()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._stats_lock:
+            self._stats['checkouts'] += 1
+            self._in_use += 1
+        return conn
+
+    def release(self, conn) -> None:
+        """Return a connection to the idle list, closing it if it is broken."""
+        try:
+            if conn.closed:
+                self._discard(conn)
+            else:
+                self._last_used[conn] = time.monotonic()
+                with self._idle_lock:
+                    self._idle.append(conn)
+        finally:
+            with self._stats_lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for one transaction: commit on success, roll back on error."""
+        conn = self.checkout()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def execute_prepared(self, cur, name: str, sql: str, params: tuple) -> None:
+        """
+        Run a statement as a server-side prepared statement.
+
+        The statement is PREPAREd once per connection and EXECUTEd afterwards.
+        If the server rejects the cached plan because a table it reads changed
+        shape (a migration added a column), the statement is deallocated and
+        prepared again once. That rolls back the failed transaction, so a
+        prepared statement must be the first statement of its transaction.
+
+        Args:
+            cur: Cursor on a pooled connection
+            name: Statement name
+            sql: Statement text using $1, $2, ... placeholders
+            params: Parameter values
+        """
+        prepared = self._prepared.setdefault(cur.connection, set())
+        placeholders = ', '.join(['%s'] * len(params))
+        execute = f'EXECUTE {name} ({placeholders})' if params else f'EXECUTE {name}'
+        if name not in prepared:
+            cur.execute(f'PREPARE {name} AS {sql}')
+            prepared.add(name)
+        try:
+            cur.execute(execute, params)
+        except psycopg2.errors.FeatureNotSupported as e:
+            if 'cached plan must not change result type' not in str(e):
+                raise
+            cur.connection.rollback()
+            prepared.discard(name)
+            cur.execute(f'DEALLOCATE {name}')
+            cur.execute(f'PREPARE {name} AS {sql}')
+            prepared.add(name)
+            cur.execute(execute, params)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size, saturation and wait-time statistics."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            in_use = self._in_use
+        with self._idle_lock:
+            idle = len(self._idle)
+        stats.update({
+            'min_connections': self.min_connections,
+            'max_connections': self.max_connections,
+            'in_use': in_use,
+            'idle': idle,
+            'saturation': in_use / self.max_connections,
+            'wait_seconds_avg': (stats['wait_seconds_total'] / stats['waits']
+                                 if stats['waits'] else 0.0),
+        })
+        return stats
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+            self._started = False
+        for conn in idle:
+            self._forget(conn)
+            if not conn.closed:
+                conn.close()
@@ -0,0 +1,275 @@
+"""
+Background job queue for data submissions.
+
+Jobs run on a local thread pool so long Census pulls do not tie up a request
+worker. Each job records per-stage progress (metadata, fetch, write), can be
+cancelled, and keeps its result until it expires.
+
+Job state lives in a SQLite file shared by every worker process on the host,
+so a status poll, result fetch or cancel request can land on any gunicorn
+worker, not only the one running the job. Cancellation is a flag in the
+table that the running job checks at each progress update. The process
+running a job heartbeats it; a job whose heartbeat stops (its worker was
+restarted or killed) is reported as failed instead of staying queued forever.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+STAGES = ('metadata', 'fetch', 'write')
+FINISHED = ('succeeded', 'failed', 'cancelled')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    search_id INTEGER,
+    status TEXT NOT NULL,
+    stages TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner TEXT NOT NULL,
+    heartbeat REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_search ON jobs (search_id, created_at);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+"""
+
+COLUMNS = ('job_id', 'user_id', 'search_id', 'status', 'stages', 'result', 'error',
+           'created_at', 'started_at', 'finished_at', 'cancel_requested')
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when cancellation has been requested."""
+
+
+class Job:
+    """Snapshot of a job's stored state."""
+
+    def __init__(self, job_id: str, user_id: int, search_id: Optional[int], status: str,
+                 stages: Dict[str, Dict], result: Optional[Dict] = None, error: Optional[str] = None,
+                 created_at: Optional[float] = None, started_at: Optional[float] = None,
+                 finished_at: Optional[float] = None, cancel_requested: bool = False):
+        self.job_id = job_id
+        self.user_id = user_id
+        self.search_id = search_id
+        self.status = status
+        self.stages = stages
+        self.result = result
+        self.error = error
+        self.created_at = created_at
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.cancel_requested = bool(cancel_requested)
+
+    @classmethod
+    def from_row(cls, row) -> 'Job':
+        values = dict(zip(COLUMNS, row))
+        values['stages'] = json.loads(values['stages'])
+        values['result'] = json.loads(values['result']) if values['result'] else None
+        return cls(**values)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'search_id': self.search_id,
+            'status': self.status,
+            'stages': self.stages,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobManager:
+    def __init__(self, db_path: str, max_workers: int = 4, retention_seconds: int = 3600,
+                 heartbeat_interval: float = 10.0, stale_after: float = 60.0):
+        """
+        Initialize the job queue.
+
+        Args:
+            db_path: SQLite file holding job state for every worker process
+            max_workers: Jobs run concurrently; further jobs wait in the queue
+            retention_seconds: How long finished jobs (and their results) are kept
+            heartbeat_interval: Seconds between heartbeats for this process's jobs
+            stale_after: Seconds without a heartbeat after which an unfinished
+                job is reported as failed
+        """
+        self.db_path = db_path
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='acs-job')
+        self.retention_seconds = retention_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._heartbeat_thread = None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _update(self, job_id: str, **fields) -> None:
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        self._connection().execute(f'UPDATE jobs SET {assignments} WHERE job_id = ?',
+                                   (*fields.values(), job_id))
+
+    def _start_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat_thread is not None:
+                return
+            self._heartbeat_thread = threading.Thread(target=self._heartbeat, daemon=True,
+                                                      name='acs-job-heartbeat')
+            self._heartbeat_thread.start()
+
+    def _heartbeat(self) -> None:
+        """Keep this process's unfinished jobs marked alive."""
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                self._connection().execute(
+                    f"UPDATE jobs SET heartbeat = ? WHERE owner = ? "
+                    f"AND status NOT IN ({', '.join('?' * len(FINISHED))})",
+                    (time.time(), self.owner, *FINISHED))
+            except sqlite3.Error as e:
+                print(f"Job heartbeat failed: {str(e)}")  # Debug print
+
+    def submit(self, user_id: int, search_id: Optional[int],
+               work: Callable[[Callable[..., None]], Dict[str, Any]]) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            user_id: Owner of the job
+            search_id: searches row the job belongs to
+            work: Callable taking a progress(stage, status, **detail) callback
+                and returning the job result dict (an 'error' key marks failure)
+
+        Returns:
+            Job: The queued job
+        """
+        self._expire()
+        self._start_heartbeat()
+        now = time.time()
+        job = Job(uuid.uuid4().hex, user_id, search_id, 'queued',
+                  {stage: {'status': 'pending'} for stage in STAGES}, created_at=now)
+        self._connection().execute(
+            'INSERT INTO jobs (job_id, user_id, search_id, status, stages, created_at, owner, heartbeat) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job.job_id, user_id, search_id, job.status, json.dumps(job.stages), now, self.owner, now))
+        future = self.executor.submit(self._run, job, work)
+        with self._lock:
+            self._futures[job.job_id] = future
+        future.add_done_callback(lambda _: self._forget_future(job.job_id))
+        return job
+
+    def _forget_future(self, job_id: str) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        row = self._connection().execute('SELECT cancel_requested FROM jobs WHERE job_id = ?',
+                                         (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def _run(self, job: Job, work) -> None:
+        if self._cancel_requested(job.job_id):
+            self._finish(job.job_id, 'cancelled')
+            return
+        self._update(job.job_id, status='running', started_at=time.time())
+        stages = dict(job.stages)
+
+        def progress(stage: str, status: str, **detail) -> None:
+            if self._cancel_requested(job.job_id):
+                raise JobCancelled()
+            stages[stage] = {'status': status, **detail}
+            self._update(job.job_id, stages=json.dumps(stages))
+
+        try:
+            result = work(progress)
+        except JobCancelled:
+            self._finish(job.job_id, 'cancelled')
+            return
+        except Exception as e:
+            self._finish(job.job_id, 'failed', error=str(e))
+            return
+
+        if result.get('error'):
+            self._finish(job.job_id, 'failed', error=result['error'], result=result)
+        else:
+            self._finish(job.job_id, 'succeeded', result=result)
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None,
+                result: Optional[Dict] = None) -> None:
+        self._update(job_id, status=status, finished_at=time.time(), error=error,
+                     result=json.dumps(result, default=str) if result is not None else None)
+
+    def _load(self, where: str, params: tuple) -> Optional[Job]:
+        row = self._connection().execute(
+            f"SELECT {', '.join(COLUMNS)}, heartbeat FROM jobs WHERE {where}", params).fetchone()
+        if row is None:
+            return None
+        job = Job.from_row(row[:-1])
+        if not job.finished and row[-1] < time.time() - self.stale_after:
+            # The worker running it went away; the job will never finish
+            job.status, job.finished_at = 'failed', time.time()
+            job.error = 'Job was lost when its worker stopped; resubmit it'
+            self._update(job.job_id, status=job.status, error=job.error, finished_at=job.finished_at)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._load('job_id = ?', (job_id,))
+
+    def for_search(self, search_id: int) -> Optional[Job]:
+        """Return the latest job for a searches row, if it is still retained."""
+        return self._load('search_id = ? ORDER BY created_at DESC LIMIT 1', (search_id,))
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation. Queued jobs never start; running jobs stop at the
+        next progress update.
+
+        Returns:
+            bool: False if the job is unknown or already finished
+        """
+        cursor = self._connection().execute(
+            f"UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? "
+            f"AND status NOT IN ({', '.join('?' * len(FINISHED))})", (job_id, *FINISHED))
+        if cursor.rowcount == 0:
+            return False
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self._finish(job_id, 'cancelled')
+        return True
+
+    def _expire(self) -> None:
+        """Drop finished jobs older than the retention window."""
+        cutoff = time.time() - self.retention_seconds
+        self._connection().execute('DELETE FROM jobs WHERE finished_at < ?', (cutoff,))
@@ -28,6 +28,7 @@ CREATE TABLE searches (
     acs_type VARCHAR(10) NOT NULL,
     geography VARCHAR(50) NOT NULL,
     variables TEXT[], -- Array of selected variable codes
+    derived_variables JSONB NOT NULL DEFAULT '[]', -- Derived-estimate definitions (see census/derived.py)
     search_timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     is_saved BOOLEAN DEFAULT false
 );
@@ -56,9 +57,13 @@ CREATE TABLE ai_interactions (
 -- Create indexes for frequently accessed columns
 CREATE INDEX idx_users_username ON users(username);
 CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_projects_user_id ON projects(user_id);
-CREATE INDEX idx_searches_user_id ON searches(user_id);
-CREATE INDEX idx_searches_project_id ON searches(project_id);
+-- Listing indexes match the keyset order of the paginated listings and carry
+-- the listed columns, so a page is read from the index alone
+CREATE INDEX idx_projects_user_listing ON projects(user_id, updated_at DESC, project_id DESC);
+CREATE INDEX idx_searches_user_listing ON searches(user_id, search_timestamp DESC, search_id DESC)
+    INCLUDE (project_id, table_name, year, acs_type, geography, is_saved);
+CREATE INDEX idx_searches_project_listing ON searches(project_id, search_timestamp DESC, search_id DESC)
+    INCLUDE (user_id, table_name, year, acs_type, geography, is_saved);
 CREATE INDEX idx_ai_interactions_project_id ON ai_interactions(project_id);
 CREATE INDEX idx_ai_interactions_user_id ON ai_interactions(user_id);
 
@@ -75,3 +80,31 @@ CREATE TRIGGER update_projects_updated_at
     BEFORE UPDATE ON projects
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
+
+-- Local store of ACS estimates bulk-loaded from Census table-based summary files
+-- (one row per geography, estimates keyed by API variable code)
+CREATE TABLE acs_estimates (
+    table_name VARCHAR(50) NOT NULL,
+    year INTEGER NOT NULL,
+    acs_type VARCHAR(10) NOT NULL,
+    geo_level VARCHAR(40) NOT NULL,
+    geo_id VARCHAR(60) NOT NULL,
+    name TEXT,
+    geo_codes JSONB NOT NULL, -- e.g. {"state": "06", "county": "001"}
+    estimates JSONB NOT NULL, -- e.g. {"B01001_001E": "39356104", ...}
+    PRIMARY KEY (table_name, year, acs_type, geo_level, geo_id)
+);
+
+-- Which table/year/survey/geography level combinations have been loaded
+CREATE TABLE acs_store_coverage (
+    table_name VARCHAR(50) NOT NULL,
+    year INTEGER NOT NULL,
+    acs_type VARCHAR(10) NOT NULL,
+    geo_level VARCHAR(40) NOT NULL,
+    variables TEXT[] NOT NULL,
+    row_count INTEGER NOT NULL,
+    loaded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, year, acs_type, geo_level)
+);
+
+CREATE INDEX idx_acs_estimates_state ON acs_estimates(table_name, year, acs_type, geo_level, (geo_codes->>'state'));
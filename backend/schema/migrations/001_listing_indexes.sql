@@ -0,0 +1,23 @@
+-- Keyset-paginated search and project listings (existing databases).
+-- New databases get these indexes from init_db.sql.
+--
+-- Apply with:  psql -U postgres -d acs_db -f backend/schema/migrations/001_listing_indexes.sql
+-- CONCURRENTLY keeps the tables writable while the indexes build, so this
+-- file must not run inside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_projects_user_listing
+    ON projects(user_id, updated_at DESC, project_id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_searches_user_listing
+    ON searches(user_id, search_timestamp DESC, search_id DESC)
+    INCLUDE (project_id, table_name, year, acs_type, geography, is_saved);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_searches_project_listing
+    ON searches(project_id, search_timestamp DESC, search_id DESC)
+    INCLUDE (user_id, table_name, year, acs_type, geography, is_saved);
+
+-- Superseded: every query they served is a prefix of a listing index
+DROP INDEX CONCURRENTLY IF EXISTS idx_projects_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_searches_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_searches_project_id;
+
+ANALYZE projects;
+ANALYZE searches;
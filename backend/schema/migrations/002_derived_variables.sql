@@ -0,0 +1,6 @@
+-- Derived-estimate definitions on saved searches (existing databases).
+-- New databases get this column from init_db.sql.
+--
+-- Apply with:  psql -U postgres -d acs_db -f backend/schema/migrations/002_derived_variables.sql
+
+ALTER TABLE searches ADD COLUMN IF NOT EXISTS derived_variables JSONB NOT NULL DEFAULT '[]';
@@ -0,0 +1,30 @@
+-- Local store of ACS estimates bulk-loaded from Census summary files (existing databases).
+-- New databases get these tables from init_db.sql.
+--
+-- Apply with:  psql -U postgres -d acs_db -f backend/schema/migrations/003_local_store.sql
+
+CREATE TABLE IF NOT EXISTS acs_estimates (
+    table_name VARCHAR(50) NOT NULL,
+    year INTEGER NOT NULL,
+    acs_type VARCHAR(10) NOT NULL,
+    geo_level VARCHAR(40) NOT NULL,
+    geo_id VARCHAR(60) NOT NULL,
+    name TEXT,
+    geo_codes JSONB NOT NULL,
+    estimates JSONB NOT NULL,
+    PRIMARY KEY (table_name, year, acs_type, geo_level, geo_id)
+);
+
+CREATE TABLE IF NOT EXISTS acs_store_coverage (
+    table_name VARCHAR(50) NOT NULL,
+    year INTEGER NOT NULL,
+    acs_type VARCHAR(10) NOT NULL,
+    geo_level VARCHAR(40) NOT NULL,
+    variables TEXT[] NOT NULL,
+    row_count INTEGER NOT NULL,
+    loaded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, year, acs_type, geo_level)
+);
+
+CREATE INDEX IF NOT EXISTS idx_acs_estimates_state
+    ON acs_estimates(table_name, year, acs_type, geo_level, (geo_codes->>'state'));
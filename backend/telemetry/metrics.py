@@ -0,0 +1,247 @@
+"""
+Per-request timing spans and Prometheus-format metrics.
+
+span(stage) times a block of work. Every span is observed in the
+acs_stage_seconds histogram, and spans opened while a request is being
+handled are also kept on that request's span list so app.py can log one
+structured timing line per request (and send it as a Server-Timing header).
+
+Counters and histograms live in a process-wide registry that render()
+writes out in the Prometheus text exposition format for /metrics. Statistics
+that other components already keep (cache hit counts, pool saturation) are
+exposed through collectors evaluated at scrape time instead of being
+duplicated here.
+
+Profiling is opt-in: with PROFILING_ENABLED set, a request carrying
+?profile=1 runs under cProfile and its stats are dumped into PROFILE_DIR.
+"""
+
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import config
+
+# Seconds; covers sub-millisecond cache hits up to multi-minute fan-out pulls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Spans of the request handled by the current thread (None outside a request)
+_request_spans: ContextVar[Optional[List[Dict]]] = ContextVar('request_spans', default=None)
+
+# (metric name, type, help, [(labels, value), ...]) produced by a collector
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self) -> float:
+        """Sum of the count across all label values."""
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f'{self.name}{_format_labels(dict(zip(self.labelnames, key)))} '
+                         f'{_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values, optionally split by labels."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def total_count(self) -> int:
+        """Number of observations across all label values."""
+        with self._lock:
+            return sum(count for _, _, count in self._series.values())
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, [list(counts), total, count])
+                            for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in series:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, 'le': _format_value(bound)})
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return lines
+
+
+class Registry:
+    """Process-wide set of metrics and scrape-time collectors."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Register a callable returning samples to include in every scrape."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, metric_type, help_text, samples in collector():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'acs_stage_seconds', 'Time spent in each instrumented stage', ('stage',))
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'acs_http_request_seconds', 'Flask request handling time', ('endpoint', 'status'))
+UPSTREAM_SECONDS = registry.histogram(
+    'acs_census_request_seconds', 'Census API request latency per attempt', ('status',))
+UPSTREAM_BYTES = registry.counter(
+    'acs_census_downloaded_bytes_total', 'Bytes downloaded from the Census API')
+ROWS_RENDERED = registry.counter(
+    'acs_rows_rendered_total', 'Data rows rendered into HTML tables or pages', ('endpoint',))
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as a named stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append({'stage': stage, 'ms': round(elapsed * 1000, 2)})
+
+
+def timed(stage: str):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_request():
+    """Begin collecting spans for the current request; returns a token for finish_request."""
+    return _request_spans.set([])
+
+
+def finish_request(token) -> List[Dict]:
+    """Stop collecting spans for the current request and return them."""
+    spans = _request_spans.get() or []
+    _request_spans.reset(token)
+    return spans
+
+
+def server_timing(spans: List[Dict]) -> str:
+    """Format spans as a Server-Timing header value (repeated stages are summed)."""
+    totals: Dict[str, float] = {}
+    for entry in spans:
+        totals[entry['stage']] = totals.get(entry['stage'], 0.0) + entry['ms']
+    return ', '.join(f"{stage.replace('.', '-')};dur={ms:.2f}" for stage, ms in totals.items())
+
+
+def start_profile() -> cProfile.Profile:
+    """Start profiling the current thread."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profile(profiler: cProfile.Profile, name: str) -> str:
+    """Stop a profiler and dump its stats into PROFILE_DIR; returns the .prof path."""
+    profiler.disable()
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+    path = os.path.join(config.PROFILE_DIR, f'{time.strftime("%Y%m%d-%H%M%S")}_{safe_name}.prof')
+    profiler.dump_stats(path)
+    return path
@@ -0,0 +1,104 @@
+"""Retries, Retry-After and error surfacing in the shared Census HTTP client."""
+
+import json
+
+import pytest
+
+from census import client as client_module
+from census import query
+from census.client import CensusClient
+from census.query import CensusAPIError
+
+ROWS = [['NAME', 'B01001_001E', 'state'], ['Alabama', '5074296', '01']]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode() if body is not None else b''
+        self.headers = dict(headers or {})
+        self.closed = False
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        self.calls.append(url)
+        return self.responses.pop(0)
+
+
+class FakeQuota:
+    def __init__(self):
+        self.acquired = []
+        self.penalties = []
+
+    def acquire(self, api_key):
+        self.acquired.append(api_key)
+
+    def penalize(self, api_key, seconds):
+        self.penalties.append((api_key, seconds))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(client_module.time, 'sleep', delays.append)
+    return delays
+
+
+def make_client(responses, **kwargs):
+    client = CensusClient(**kwargs)
+    client.session = FakeSession(responses)
+    return client
+
+
+def test_429_then_success_is_retried(sleeps):
+    quota = FakeQuota()
+    throttled = FakeResponse(429)
+    client = make_client([throttled, FakeResponse(200, ROWS)], quota=quota)
+    response = client.get('https://api.census.gov/data?get=NAME&key=abc')
+    assert response.status_code == 200
+    assert len(client.session.calls) == 2
+    assert len(sleeps) == 1
+    assert throttled.closed
+    assert quota.acquired == ['abc', 'abc']
+    assert quota.penalties == [('abc', sleeps[0])]
+
+
+def test_retry_after_is_honoured_and_capped(sleeps):
+    client = make_client([FakeResponse(429, headers={'Retry-After': '7'}),
+                          FakeResponse(503, headers={'Retry-After': '120'}),
+                          FakeResponse(200, ROWS)], backoff_max=30.0)
+    assert client.get('https://api.census.gov/data').status_code == 200
+    assert sleeps == [7.0, 30.0]
+
+
+def test_exhausted_retries_surface_as_census_api_error(monkeypatch, sleeps):
+    client = make_client([FakeResponse(503) for _ in range(3)], max_retries=2)
+    monkeypatch.setattr(query, 'census_client', client)
+    with pytest.raises(CensusAPIError, match='status code 503'):
+        query._request_frame('https://api.census.gov/data')
+    assert len(client.session.calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_client_errors_are_not_retried(monkeypatch, sleeps):
+    client = make_client([FakeResponse(400), FakeResponse(200, ROWS)])
+    monkeypatch.setattr(query, 'census_client', client)
+    with pytest.raises(CensusAPIError, match='status code 400'):
+        query._request_frame('https://api.census.gov/data')
+    assert len(client.session.calls) == 1
+    assert sleeps == []
@@ -0,0 +1,89 @@
+"""Background crosswalk builds in CrosswalkStore."""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import census.crosswalk as crosswalk_module
+import census.query as query
+from census.crosswalk import CrosswalkNotReady, CrosswalkStore, CrosswalkUnavailable
+
+
+def frame():
+    return pd.DataFrame({'year': ['2021', '2022'], 'group': ['B01001', 'B01001'],
+                         'code': ['B01001_001E', 'B01001_001E'], 'key': [0, 0],
+                         'label': ['Estimate!!Total:', 'Estimate!!Total']})
+
+
+def wait_for(condition):
+    deadline = time.time() + 5
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_missing_crosswalk_is_built_in_background(tmp_path, monkeypatch):
+    release = threading.Event()
+    builds = []
+
+    def slow_build(acs_type, table_type, years):
+        builds.append((acs_type, table_type))
+        assert release.wait(5)
+        return frame()
+
+    monkeypatch.setattr(crosswalk_module, 'build_crosswalk', slow_build)
+    store = CrosswalkStore(str(tmp_path), [2021, 2022])
+    for _ in range(3):
+        with pytest.raises(CrosswalkNotReady):
+            store.get('acs5', '')
+    release.set()
+    wait_for(lambda: not store._building)
+
+    assert builds == [('acs5', '')]
+    assert store.get('acs5', '').resolve('B01001', ['B01001_001E'], 2022, [2021]) == \
+        {'2021': {'B01001_001E': 'B01001_001E'}}
+    # A fresh store (another worker) loads the persisted file without building
+    assert CrosswalkStore(str(tmp_path), [2021, 2022]).get('acs5', '').years == {'2021', '2022'}
+
+
+def test_failed_build_is_retried_after_backoff(tmp_path, monkeypatch):
+    results = [pd.DataFrame(columns=['year', 'group', 'code', 'key', 'label']), frame()]
+    monkeypatch.setattr(crosswalk_module, 'build_crosswalk',
+                        lambda acs_type, table_type, years: results.pop(0))
+    store = CrosswalkStore(str(tmp_path), [2021, 2022], retry_seconds=60)
+    with pytest.raises(CrosswalkNotReady):
+        store.get('acs1', '/profile')
+    wait_for(lambda: not store._building)
+
+    # Until the retry is due, callers are told to fall back and no build starts
+    for _ in range(3):
+        with pytest.raises(CrosswalkUnavailable, match='No variable metadata'):
+            store.get('acs1', '/profile')
+    assert not store._building and len(results) == 1
+
+    failed_at, error = store._failed[('acs1', '/profile')]
+    store._failed[('acs1', '/profile')] = (failed_at - 61, error)
+    with pytest.raises(CrosswalkNotReady):
+        store.get('acs1', '/profile')
+    wait_for(lambda: not store._building)
+    assert store.get('acs1', '/profile').years == {'2021', '2022'}
+
+
+def test_fetch_years_requests_codes_as_given_when_build_failed(tmp_path, monkeypatch):
+    store = CrosswalkStore(str(tmp_path), [2021, 2022], retry_seconds=60)
+    store._failed[('acs5', '')] = (time.time(), 'metadata download failed')
+    requested = []
+
+    def fetch_year(year, acs_type, table, variables, geography, api_key=None):
+        requested.append((year, tuple(variables)))
+        return pd.DataFrame({'NAME': ['Alabama'], 'B01001_001E': ['1'], 'state': ['01']})
+
+    monkeypatch.setattr(query, 'crosswalks', store)
+    monkeypatch.setattr(query, 'fetch_frame', fetch_year)
+    monkeypatch.setattr(query, '_fetch_year_metadata', lambda year, acs_type, table: {})
+    merged, _, errors, _ = query.fetch_years([2021, 2022], 'acs5', 'B01001', ['B01001_001E'],
+                                             'state:*')
+    assert sorted(requested) == [('2021', ('B01001_001E',)), ('2022', ('B01001_001E',))]
+    assert errors == {} and list(merged['Year']) == ['2021', '2022']
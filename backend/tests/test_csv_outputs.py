@@ -0,0 +1,99 @@
+"""Every CSV output path writes the same typed schema."""
+
+import csv
+import io
+import json
+
+import pandas as pd
+
+import census.geography as geography
+import census.streaming as streaming
+from census.frames import build_frame, output_columns
+
+METADATA = {
+    'B01001_001E': {'predicateType': 'int', 'title': 'Total'},
+    'B01001_001M': {'predicateType': 'int', 'title': 'Total MOE'},
+    'NAME': {'predicateType': 'string', 'title': 'Geographic Area Name'},
+}
+HEADER = ['NAME', 'B01001_001E', 'B01001_001M', 'state', 'county']
+UNITS = {
+    'county:*&in=state:01': [['Autauga County, Alabama', '58805', '-555555555', '01', '001']],
+    'county:*&in=state:72': [['Adjuntas Municipio, Puerto Rico', '-666666666', '-222222222', '72', '001']],
+}
+
+
+def title_row_for(columns):
+    return ['NAME'] + [METADATA.get(code, {}).get('title', code) for code in columns[1:]]
+
+
+def read(text):
+    rows = list(csv.reader(io.StringIO(text)))
+    return rows[0], rows[1], sorted(rows[2:])
+
+
+def single_request_csv(rows):
+    """The non-streaming layout written by fetch_and_save_data."""
+    raw = pd.DataFrame(rows[1:], columns=rows[0])
+    columns = output_columns(list(raw.columns), METADATA) + ['Year']
+    frame = build_frame(raw, METADATA, constants={'Year': '2022'}).reindex(columns=columns)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(list(frame.columns))
+    writer.writerow(title_row_for(list(frame.columns)[:-1]) + ['Year'])
+    frame.to_csv(out, header=False, index=False)
+    return out.getvalue()
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        return (self.body[i:i + chunk_size] for i in range(0, len(self.body), chunk_size))
+
+    def close(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, url, stream=False):
+        return FakeResponse(self.body)
+
+
+def all_rows():
+    return [HEADER] + [row for rows in UNITS.values() for row in rows]
+
+
+def test_streamed_csv_matches_single_request(monkeypatch):
+    monkeypatch.setattr(streaming, 'census_client',
+                        FakeClient(json.dumps(all_rows()).encode('utf-8')))
+    out = io.StringIO()
+    count = streaming.stream_to_csv('https://example.test', out, '2022', title_row_for,
+                                    METADATA, chunk_size=7, batch_rows=1)
+    assert count == 2
+    assert read(out.getvalue()) == read(single_request_csv(all_rows()))
+
+
+def test_fanout_csv_matches_single_request(tmp_path, monkeypatch):
+    def fetch_unit(year, acs_type, table, variables, unit, api_key=None):
+        return pd.DataFrame(UNITS[unit], columns=HEADER)
+
+    monkeypatch.setattr(geography, 'fetch_frame', fetch_unit)
+    path = str(tmp_path / 'fanout.csv')
+    summary = geography.fetch_fanout_to_csv('2022', 'acs5', 'B01001', [], list(UNITS), path,
+                                            title_row_for, metadata=METADATA)
+    assert summary['rows'] == 2 and not summary['failed']
+    with open(path, newline='') as f:
+        written = read(f.read())
+
+    header, titles, rows = written
+    assert written == read(single_request_csv(all_rows()))
+    assert header == ['NAME', 'B01001_001E', 'B01001_001EA', 'B01001_001M', 'B01001_001MA',
+                      'state', 'county', 'Year']
+    assert rows[1] == ['Autauga County, Alabama', '58805', '', '', '*****', '01', '001', '2022']
+    assert rows[0][1:5] == ['', '-', '', '**']
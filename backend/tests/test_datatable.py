@@ -0,0 +1,82 @@
+"""DataTables server-side paging, search and ordering."""
+
+import pandas as pd
+
+import config
+from census.datatable import FrameCache, SearchFrame, query_page
+
+FRAME = pd.DataFrame({
+    'NAME': ['Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California'],
+    'B01001_001E': pd.array([5074296, 733583, 7359197, None, 39029342], dtype='Int64'),
+    'state': ['01', '02', '04', '05', '06'],
+})
+
+
+def request(params):
+    return query_page(SearchFrame(FRAME), {key: str(value) for key, value in params.items()})
+
+
+def names(response):
+    return [row[0] for row in response['data']]
+
+
+def test_paging_and_counts():
+    response = request({'draw': 3, 'start': 1, 'length': 2})
+    assert response['draw'] == 3
+    assert response['recordsTotal'] == 5 and response['recordsFiltered'] == 5
+    assert names(response) == ['Alaska', 'Arizona']
+
+
+def test_cells_are_strings_and_missing_values_null():
+    response = request({'start': 3, 'length': 1})
+    assert response['data'] == [['Arkansas', None, '05']]
+
+
+def test_global_search_is_case_insensitive_and_respects_searchable():
+    assert names(request({'search[value]': 'ALA'})) == ['Alabama', 'Alaska']
+    response = request({'search[value]': '0', 'columns[1][searchable]': 'false',
+                        'columns[2][searchable]': 'false'})
+    assert response['recordsFiltered'] == 0
+    assert response['recordsTotal'] == 5
+
+
+def test_column_search():
+    assert names(request({'columns[0][search][value]': 'ar'})) == ['Arizona', 'Arkansas']
+
+
+def test_numeric_ordering_with_missing_values():
+    response = request({'order[0][column]': 1, 'order[0][dir]': 'desc'})
+    assert names(response)[:3] == ['California', 'Arizona', 'Alabama']
+
+
+def test_multi_column_ordering_first_column_wins():
+    frame = pd.DataFrame({'a': ['x', 'y', 'x', 'y'], 'b': [1, 2, 3, 4]})
+    response = query_page(SearchFrame(frame), {'order[0][column]': '0', 'order[0][dir]': 'asc',
+                                               'order[1][column]': '1', 'order[1][dir]': 'desc'})
+    assert response['data'] == [['x', '3'], ['x', '1'], ['y', '4'], ['y', '2']]
+
+
+def test_length_is_capped_and_minus_one_means_max(monkeypatch):
+    monkeypatch.setattr(config, 'DATATABLE_MAX_PAGE_LENGTH', 2)
+    assert len(request({'length': 100})['data']) == 2
+    assert len(request({'length': -1})['data']) == 2
+
+
+def test_out_of_range_order_column_is_ignored():
+    assert names(request({'order[0][column]': 99})) == list(FRAME['NAME'])
+
+
+def test_frame_cache_evicts_least_recently_used():
+    cache = FrameCache(2)
+    loads = []
+
+    def loader(key):
+        return lambda: loads.append(key) or FRAME
+
+    cache.get_or_load('a', loader('a'))
+    cache.get_or_load('b', loader('b'))
+    cache.get_or_load('a', loader('a'))
+    cache.get_or_load('c', loader('c'))
+    cache.get_or_load('a', loader('a'))
+    cache.get_or_load('b', loader('b'))
+    assert loads == ['a', 'b', 'c', 'b']
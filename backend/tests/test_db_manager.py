@@ -0,0 +1,104 @@
+"""Keyset cursors and search listing pagination."""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.db_manager import DatabaseManager, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.db.statements.append((' '.join(sql.split()), params))
+
+    def fetchall(self):
+        limit = self.db.statements[-1][1][-1]
+        return self.db.rows[:limit]
+
+
+class FakePool:
+    """Stands in for ConnectionPool, returning the newest rows first like the query."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+
+def manager(rows):
+    db = DatabaseManager.__new__(DatabaseManager)
+    db.pool = FakePool(rows)
+    return db
+
+
+START = datetime(2024, 5, 1, 12, 0, 0, 123456)
+ROWS = [{'search_id': 10 - i, 'search_timestamp': START - timedelta(minutes=i)} for i in range(5)]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(START, 42)
+    assert decode_cursor(cursor) == (START, 42)
+    assert '|' not in cursor and '/' not in cursor
+
+
+@pytest.mark.parametrize('cursor', ['', 'not base64!', encode_cursor(START, 1)[:-4],
+                                    'MjAyNC0wNS0wMQ==', 'bm90IGEgZGF0ZXwx'])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor)
+
+
+def test_next_cursor_points_at_last_row_of_page():
+    db = manager(ROWS)
+    rows, next_cursor = db.list_searches(7, limit=2)
+    assert [row['search_id'] for row in rows] == [10, 9]
+    assert decode_cursor(next_cursor) == (ROWS[1]['search_timestamp'], 9)
+    sql, params = db.pool.statements[-1]
+    assert params == (7, 3)
+    assert 'ORDER BY s.search_timestamp DESC, s.search_id DESC' in sql
+
+
+def test_last_page_has_no_cursor():
+    rows, next_cursor = manager(ROWS).list_searches(7, limit=5)
+    assert len(rows) == 5
+    assert next_cursor is None
+
+
+def test_cursor_continues_strictly_after_previous_page():
+    db = manager(ROWS)
+    _, next_cursor = db.list_searches(7, limit=2, is_saved=True)
+    db.list_searches(7, limit=2, cursor=next_cursor, is_saved=True)
+    sql, params = db.pool.statements[-1]
+    assert '(s.search_timestamp, s.search_id) < (%s, %s)' in sql
+    assert params == (7, True, ROWS[1]['search_timestamp'], 9, 3)
+
+
+def test_limit_is_clamped():
+    db = manager(ROWS)
+    db.list_searches(7, limit=10 ** 6)
+    assert db.pool.statements[-1][1][-1] == MAX_PAGE_SIZE + 1
+    db.list_searches(7, limit=0)
+    assert db.pool.statements[-1][1][-1] == 2
+
+
+def test_malformed_cursor_fails_before_querying():
+    db = manager(ROWS)
+    with pytest.raises(ValueError):
+        db.list_searches(7, cursor='garbage')
+    assert db.pool.statements == []
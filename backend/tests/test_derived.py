@@ -0,0 +1,132 @@
+"""
+MOE approximations in census.derived, checked against examples worked by hand
+with the formulas in the ACS handbook ("Understanding and Using ACS Data",
+chapter 8).
+"""
+
+import math
+
+import pandas as pd
+import pytest
+
+from census.derived import apply_derived, compute, validate_definition
+
+
+def frame(**columns):
+    """One-row result frame; keyword X=(estimate, moe) gives columns XE and XM."""
+    data = {}
+    for code, (estimate, moe) in columns.items():
+        data[f'{code}E'] = [estimate]
+        data[f'{code}M'] = [moe]
+    return pd.DataFrame(data)
+
+
+def derive(df, **definition):
+    estimate, moe = compute(df, validate_definition({'name': 'derived', **definition}))
+    return estimate[0], moe[0]
+
+
+def test_sum_of_counts():
+    # 156,934 +/- 3,531 and 130,972 +/- 3,285
+    df = frame(A=(156934, 3531), B=(130972, 3285))
+    estimate, moe = derive(df, op='sum', terms=['AE', 'BE'])
+    assert estimate == 287906
+    assert round(moe) == 4823  # sqrt(3531^2 + 3285^2)
+
+
+def test_sum_counts_only_largest_moe_among_zero_estimates():
+    df = frame(A=(0, 89), B=(0, 120), C=(100, 30))
+    estimate, moe = derive(df, op='sum', terms=['AE', 'BE', 'CE'])
+    assert estimate == 100
+    assert moe == pytest.approx(math.sqrt(120 ** 2 + 30 ** 2))
+
+
+def test_difference_subtracts_estimates_and_adds_moes_in_quadrature():
+    df = frame(A=(5000, 300), B=(1200, 400))
+    estimate, moe = derive(df, op='difference', terms=['AE', 'BE'])
+    assert estimate == 3800
+    assert moe == pytest.approx(500)
+
+
+def test_proportion():
+    df = frame(X=(1200, 110), Y=(5000, 240))
+    estimate, moe = derive(df, op='proportion', numerator='XE', denominator='YE')
+    assert estimate == pytest.approx(0.24)
+    # sqrt(110^2 - 0.24^2 * 240^2) / 5000
+    assert moe == pytest.approx(0.018742, abs=1e-6)
+
+
+def test_proportion_falls_back_to_ratio_formula_for_negative_radicand():
+    df = frame(X=(50, 80), Y=(60, 120))
+    estimate, moe = derive(df, op='proportion', numerator='XE', denominator='YE')
+    p = 50 / 60
+    assert 80 ** 2 - p ** 2 * 120 ** 2 < 0
+    assert moe == pytest.approx(math.sqrt(80 ** 2 + p ** 2 * 120 ** 2) / 60)
+
+
+def test_percent_is_proportion_times_100():
+    df = frame(X=(1200, 110), Y=(5000, 240))
+    estimate, moe = derive(df, op='percent', numerator='XE', denominator='YE')
+    assert estimate == pytest.approx(24.0)
+    assert moe == pytest.approx(1.8742, abs=1e-4)
+
+
+def test_ratio():
+    df = frame(X=(24000, 1500), Y=(32000, 2000))
+    estimate, moe = derive(df, op='ratio', numerator='XE', denominator='YE')
+    assert estimate == pytest.approx(0.75)
+    # sqrt(1500^2 + 0.75^2 * 2000^2) / 32000
+    assert moe == pytest.approx(0.066291, abs=1e-6)
+
+
+def test_product():
+    df = frame(A=(10000, 500), B=(0.25, 0.02))
+    estimate, moe = derive(df, op='product', terms=['AE', 'BE'])
+    assert estimate == pytest.approx(2500)
+    # sqrt(10000^2 * 0.02^2 + 0.25^2 * 500^2)
+    assert moe == pytest.approx(235.85, abs=0.01)
+
+
+def test_controlled_estimate_has_no_sampling_error():
+    df = frame(A=(1000, 0), B=(500, 40))
+    df['AMA'] = ['*****']
+    df['AM'] = [-555555555]
+    _, moe = derive(df, op='sum', terms=['AE', 'BE'])
+    assert moe == pytest.approx(40)
+
+
+def test_missing_estimate_makes_derived_value_missing():
+    df = frame(A=(None, 10), B=(500, 40))
+    estimate, moe = derive(df, op='sum', terms=['AE', 'BE'])
+    assert math.isnan(estimate) and math.isnan(moe)
+
+
+def test_zero_denominator_is_missing():
+    df = frame(X=(10, 5), Y=(0, 5))
+    estimate, _ = derive(df, op='ratio', numerator='XE', denominator='YE')
+    assert math.isnan(estimate)
+
+
+def test_apply_derived_adds_estimate_and_moe_columns():
+    df = frame(A=(156934, 3531), B=(130972, 3285))
+    result = apply_derived(df, [{'name': 'total', 'op': 'sum', 'terms': 'AE,BE'}])
+    assert list(result.columns[-2:]) == ['total', 'total_MOE']
+    assert 'total' not in df.columns
+
+
+@pytest.mark.parametrize('definition', [
+    {'name': '1bad', 'op': 'sum', 'terms': ['AE', 'BE']},
+    {'name': 'x', 'op': 'median', 'terms': ['AE', 'BE']},
+    {'name': 'x', 'op': 'sum', 'terms': ['AE']},
+    {'name': 'x', 'op': 'product', 'terms': ['AE', 'BE', 'CE']},
+    {'name': 'x', 'op': 'ratio', 'numerator': 'AE'},
+])
+def test_invalid_definitions_are_rejected(definition):
+    with pytest.raises(ValueError):
+        validate_definition(definition)
+
+
+def test_missing_columns_are_reported():
+    df = frame(A=(1, 1))
+    with pytest.raises(ValueError, match='BE'):
+        derive(df, op='sum', terms=['AE', 'BE'])
@@ -0,0 +1,89 @@
+"""Fan-out planning and the lookups that come before it."""
+
+import pandas as pd
+import pytest
+
+import census.geography as geography
+import census.query as query
+from census.response_cache import ResponseCache, query_fingerprint
+
+BLOCK_GROUPS = 'block group:*&in=state:06'
+COUNTIES = [['NAME', 'GEO_ID', 'state', 'county'],
+            ['Alameda County, California', '0500000US06001', '06', '001'],
+            ['Autauga County, Alabama', '0500000US01001', '01', '001'],
+            ['Alpine County, California', '0500000US06003', '06', '003']]
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def json(self):
+        return self.rows
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        return FakeResponse(self.rows)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10 ** 6)
+    monkeypatch.setattr(query, 'response_cache', cache)
+    monkeypatch.setattr(geography, 'response_cache', cache)
+    monkeypatch.setattr(query, 'local_store', None)
+    return cache
+
+
+def no_planning(*args):
+    raise AssertionError('planned units for a query that needed no API call')
+
+
+def test_cached_query_is_answered_before_planning(cache, monkeypatch):
+    frame = pd.DataFrame({'B01001_001E': ['10'], 'state': ['06']})
+    cache.put(query_fingerprint(2022, 'acs5', 'B01001', ['B01001_001E'], BLOCK_GROUPS), frame)
+    monkeypatch.setattr(geography, 'plan_units', no_planning)
+    result = geography.fetch_geography_frame(2022, 'acs5', 'B01001', ['B01001_001E'], BLOCK_GROUPS)
+    assert result.equals(frame)
+
+
+def test_local_store_query_is_answered_before_planning(cache, monkeypatch):
+    class Store:
+        def covers(self, *args):
+            return True
+
+        def fetch(self, *args):
+            return pd.DataFrame({'NAME': ['Alameda'], 'state': ['06']})
+
+    monkeypatch.setattr(query, 'local_store', Store())
+    monkeypatch.setattr(geography, 'plan_units', no_planning)
+    result = geography.fetch_geography_frame(2022, 'acs5', 'B01001', [], BLOCK_GROUPS)
+    assert list(result['NAME']) == ['Alameda']
+
+
+def test_county_list_goes_through_the_response_cache(cache, monkeypatch):
+    client = FakeClient(COUNTIES)
+    monkeypatch.setattr(query, 'census_client', client)
+    for _ in range(2):
+        units = geography.plan_units(2022, 'acs5', 'B01001', BLOCK_GROUPS)
+        assert units == ['block group:*&in=state:06&in=county:001',
+                         'block group:*&in=state:06&in=county:003']
+    assert len(client.urls) == 1
+    assert 'get=NAME,GEO_ID&for=county:*' in client.urls[0]
+    # The county list does not collide with the whole-table county query
+    assert cache.fetched_at(query_fingerprint(2022, 'acs5', 'B01001', [], 'county:*')) is None
+
+
+def test_tracts_fan_out_per_state_without_requests(cache, monkeypatch):
+    monkeypatch.setattr(query, 'census_client', None)
+    assert geography.plan_units(2022, 'acs5', 'B01001', 'tract:*&in=state:06,72') == \
+        ['tract:*&in=state:06', 'tract:*&in=state:72']
+    assert geography.plan_units(2022, 'acs5', 'B01001', 'county:*') == ['county:*']
@@ -0,0 +1,76 @@
+"""Job state shared through SQLite across JobManager instances (one per worker process)."""
+
+import threading
+import time
+
+import pytest
+
+from jobs.job_manager import JobManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'jobs.sqlite3')
+
+
+def wait_for(manager, job_id, statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job.status in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job stayed {job.status}')
+
+
+def test_status_and_result_visible_from_another_worker(db_path):
+    runner, other = JobManager(db_path), JobManager(db_path)
+
+    def work(progress):
+        progress('fetch', 'done', rows=3)
+        return {'message': 'saved', 'rows': 3}
+
+    job = runner.submit(1, 42, work)
+    finished = wait_for(other, job.job_id, ('succeeded',))
+    assert finished.stages['fetch'] == {'status': 'done', 'rows': 3}
+    assert finished.result == {'message': 'saved', 'rows': 3}
+    assert other.for_search(42).job_id == job.job_id
+
+
+def test_cancel_from_another_worker_stops_running_job(db_path):
+    runner, other = JobManager(db_path), JobManager(db_path)
+    started = threading.Event()
+
+    def work(progress):
+        started.set()
+        while True:
+            progress('fetch', 'running')
+            time.sleep(0.01)
+
+    job = runner.submit(1, None, work)
+    assert started.wait(5)
+    assert other.cancel(job.job_id)
+    assert wait_for(other, job.job_id, ('cancelled',)).status == 'cancelled'
+    assert not other.cancel(job.job_id)
+
+
+def test_failed_result_marks_job_failed(db_path):
+    manager = JobManager(db_path)
+    job = manager.submit(1, None, lambda progress: {'error': 'no data'})
+    assert wait_for(manager, job.job_id, ('failed',)).error == 'no data'
+
+
+def test_job_of_a_dead_worker_is_reported_failed(db_path):
+    manager = JobManager(db_path, stale_after=0.05)
+    manager._connection().execute(
+        "INSERT INTO jobs (job_id, user_id, status, stages, created_at, owner, heartbeat) "
+        "VALUES ('lost', 1, 'running', '{}', ?, 'gone:1', ?)", (time.time(), time.time() - 1))
+    job = manager.get('lost')
+    assert job.status == 'failed'
+    assert manager.get('lost').status == 'failed'
+
+
+def test_unknown_job(db_path):
+    manager = JobManager(db_path)
+    assert manager.get('missing') is None
+    assert not manager.cancel('missing')
@@ -0,0 +1,195 @@
+"""
+Local store: summary-file parsing, the COPY load, coverage lookups, answering
+queries from the store and falling back to the live API.
+
+The end-to-end test loads the fixture extract into a real database and runs
+only when TEST_DATABASE_URL points at one (the schema is created from
+schema/migrations/003_local_store.sql).
+"""
+
+import csv
+import io
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+
+import census.query as query
+from database.local_store import LocalStore, api_variable_code, parse_geo_id
+from database.pool import ConnectionPool
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'local_store')
+DATA_FILE = os.path.join(FIXTURES, 'acsdt5y2022-b01001.dat')
+GEOS_FILE = os.path.join(FIXTURES, 'Geos20225YR.txt')
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                         'schema', 'migrations', '003_local_store.sql')
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.db.statements.append((' '.join(sql.split()), params))
+
+    def copy_expert(self, sql, source):
+        self.db.copied = list(csv.reader(io.StringIO(source.read())))
+
+    def fetchall(self):
+        return self.db.rows
+
+
+class FakePool:
+    """Stands in for ConnectionPool, recording statements and returning canned rows."""
+
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.statements = []
+        self.copied = None
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def test_api_variable_code():
+    assert api_variable_code('B01001_E001') == 'B01001_001E'
+    assert api_variable_code('B01001_M002') == 'B01001_002M'
+    assert api_variable_code('GEO_ID') == 'GEO_ID'
+
+
+def test_parse_geo_id():
+    assert parse_geo_id('0400000US06') == ('state', {'state': '06'})
+    assert parse_geo_id('0500000US06001') == ('county', {'state': '06', 'county': '001'})
+    assert parse_geo_id('1400000US06001400100') == (
+        'tract', {'state': '06', 'county': '001', 'tract': '400100'})
+    assert parse_geo_id('0100000US') == ('us', {'us': '1'})
+    # Geographic components and unhandled summary levels are skipped
+    assert parse_geo_id('0400001US06') is None
+    assert parse_geo_id('9700000US0600001') is None
+
+
+def test_ingest_copies_one_row_per_geography_and_records_coverage():
+    pool = FakePool()
+    counts = LocalStore(pool).ingest(DATA_FILE, 'B01001', 2022, 'acs5', GEOS_FILE)
+
+    assert counts == {'state': 2, 'county': 2}
+    by_geo_id = {row[4]: row for row in pool.copied}
+    assert set(by_geo_id) == {'0400000US06', '0400000US72', '0500000US06001', '0500000US06003'}
+    table, year, acs_type, level, geo_id, name, geo_codes, estimates = by_geo_id['0500000US06001']
+    assert (table, year, acs_type, level, name) == ('B01001', '2022', 'acs5', 'county',
+                                                   'Alameda County, California')
+    assert geo_codes == '{"state":"06","county":"001"}'
+    assert '"B01001_001E":"1663823"' in estimates and '"B01001_001M":"*****"' in estimates
+
+    coverage = [params for sql, params in pool.statements if 'acs_store_coverage' in sql]
+    assert sorted(params[3] for params in coverage) == ['county', 'state']
+    assert coverage[0][4] == ['B01001_001E', 'B01001_001M', 'B01001_002E', 'B01001_002M']
+
+
+def test_covers_checks_level_and_variables():
+    pool = FakePool(rows=[('B01001', 2022, 'acs5', 'county', ['B01001_001E', 'B01001_001M'])])
+    store = LocalStore(pool)
+    assert store.covers(2022, 'acs5', 'B01001', ['NAME', 'B01001_001E'], 'county:*')
+    assert not store.covers(2022, 'acs5', 'B01001', ['B01001_002E'], 'county:*')
+    assert not store.covers(2022, 'acs5', 'B01001', ['B01001_001E'], 'tract:*&in=state:06')
+    assert not store.covers(2021, 'acs5', 'B01001', ['B01001_001E'], 'county:*')
+
+
+def test_covers_is_false_when_the_store_is_unreachable():
+    class BrokenPool(FakePool):
+        @contextmanager
+        def connection(self):
+            raise ConnectionError('down')
+            yield
+
+    assert not LocalStore(BrokenPool()).covers(2022, 'acs5', 'B01001', [], 'state:*')
+
+
+def test_fetch_shapes_rows_like_the_api():
+    pool = FakePool(rows=[('0500000US06001', 'Alameda County, California',
+                           {'state': '06', 'county': '001'}, ['1663823'])])
+    frame = LocalStore(pool).fetch(2022, 'acs5', 'B01001', ['NAME', 'B01001_001E'],
+                                   'county:001&in=state:06')
+    assert list(frame.columns) == ['NAME', 'B01001_001E', 'state', 'county']
+    assert frame.iloc[0].tolist() == ['Alameda County, California', '1663823', '06', '001']
+    sql, params = pool.statements[-1]
+    assert params[-4:] == ['county', ['001'], 'state', ['06']]
+
+
+class StubStore:
+    def __init__(self, covered):
+        self.covered = covered
+        self.fetched = []
+
+    def covers(self, *query_args):
+        return self.covered
+
+    def fetch(self, *query_args):
+        self.fetched.append(query_args)
+        return pd.DataFrame({'NAME': ['from store']})
+
+
+@pytest.fixture
+def store_in_use():
+    def install(store):
+        query.use_local_store(store)
+        return store
+    yield install
+    query.use_local_store(None)
+
+
+def test_fetch_frame_answers_covered_queries_from_the_store(store_in_use, monkeypatch):
+    store = store_in_use(StubStore(covered=True))
+    monkeypatch.setattr(query.data_flights, 'do', lambda *a: pytest.fail('called the API'))
+    frame = query.fetch_frame(2022, 'acs5', 'B01001', ['B01001_001E'], 'state:*')
+    assert frame['NAME'].tolist() == ['from store']
+    assert len(store.fetched) == 1
+
+
+def test_fetch_frame_falls_back_to_the_api(store_in_use, monkeypatch):
+    store = store_in_use(StubStore(covered=False))
+    monkeypatch.setattr(query.response_cache, 'get', lambda fingerprint: None)
+    monkeypatch.setattr(query.data_flights, 'do',
+                        lambda fingerprint, load: pd.DataFrame({'NAME': ['from api']}))
+    frame = query.fetch_frame(2022, 'acs5', 'B01001', ['B01001_001E'], 'state:*')
+    assert frame['NAME'].tolist() == ['from api']
+    assert store.fetched == []
+
+
+@pytest.mark.skipif(not os.getenv('TEST_DATABASE_URL'), reason='TEST_DATABASE_URL not set')
+def test_load_fixture_and_answer_query_from_postgres():
+    pool = ConnectionPool(os.environ['TEST_DATABASE_URL'], max_connections=2)
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            with open(MIGRATION) as f:
+                cur.execute(f.read())
+    store = LocalStore(pool)
+    year = 1900  # Keeps the fixture clear of any real loads
+    try:
+        assert store.ingest(DATA_FILE, 'B01001', year, 'acs5', GEOS_FILE) == {'state': 2, 'county': 2}
+        assert store.covers(year, 'acs5', 'B01001', ['B01001_001E'], 'county:*&in=state:06')
+        frame = store.fetch(year, 'acs5', 'B01001', ['B01001_001E', 'B01001_002M'],
+                            'county:*&in=state:06')
+        assert frame.to_dict('records') == [
+            {'NAME': 'Alameda County, California', 'B01001_001E': '1663823',
+             'B01001_002M': '1136', 'state': '06', 'county': '001'},
+            {'NAME': 'Alpine County, California', 'B01001_001E': '1190',
+             'B01001_002M': '89', 'state': '06', 'county': '003'},
+        ]
+    finally:
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('DELETE FROM acs_estimates WHERE year = %s', (year,))
+                cur.execute('DELETE FROM acs_store_coverage WHERE year = %s', (year,))
+        pool.close()
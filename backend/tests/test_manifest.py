@@ -0,0 +1,42 @@
+"""Manifest expansion and API key selection."""
+
+import json
+
+import pytest
+
+from batch.manifest import PLACEHOLDER_API_KEY, load_manifest
+
+
+def write(tmp_path, document):
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps(document))
+    return str(path)
+
+
+def test_entries_expand_and_deduplicate(tmp_path):
+    manifest = load_manifest(write(tmp_path, {'extracts': [
+        {'tables': ['dp02', 'DP03'], 'years': [2021, 2022], 'geographies': 'state:*'},
+        {'tables': 'DP02', 'years': 2022, 'geographies': ['state:*']},
+    ]}))
+    assert [str(unit) for unit in manifest.units] == [
+        'DP02 2021 acs5 state:*', 'DP02 2022 acs5 state:*',
+        'DP03 2021 acs5 state:*', 'DP03 2022 acs5 state:*']
+
+
+@pytest.mark.parametrize('document_key, env_key, expected', [
+    ('manifest-key', 'env-key', 'manifest-key'),
+    (None, 'env-key', 'env-key'),
+    (None, PLACEHOLDER_API_KEY, None),
+    ('', '  ', None),
+    (PLACEHOLDER_API_KEY, '"env-key"', 'env-key'),
+    (None, None, None),
+])
+def test_api_key_falls_back_to_keyless(tmp_path, monkeypatch, document_key, env_key, expected):
+    if env_key is None:
+        monkeypatch.delenv('CENSUS_API_KEY', raising=False)
+    else:
+        monkeypatch.setenv('CENSUS_API_KEY', env_key)
+    document = {'extracts': [{'tables': ['B01001'], 'years': [2022], 'geographies': ['state:*']}]}
+    if document_key is not None:
+        document['api_key'] = document_key
+    assert load_manifest(write(tmp_path, document)).api_key == expected
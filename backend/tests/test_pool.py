@@ -0,0 +1,73 @@
+"""Prepared statements on pooled connections."""
+
+import psycopg2.errors
+import pytest
+
+from database.db_manager import SQL_GET_SEARCH
+from database.pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self, stale=()):
+        self.statements = []
+        self.rollbacks = 0
+        # Statement names whose cached plan the server rejects once
+        self.stale = set(stale)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=None):
+        conn = self.connection
+        conn.statements.append(sql.split(' AS ')[0])
+        name = sql.split()[1]
+        if sql.startswith('EXECUTE') and name in conn.stale:
+            conn.stale.discard(name)
+            raise psycopg2.errors.FeatureNotSupported('cached plan must not change result type')
+
+
+def pool():
+    return ConnectionPool('postgresql://unused')
+
+
+def test_statement_is_prepared_once_per_connection():
+    connection_pool, conn = pool(), FakeConnection()
+    for search_id in (1, 2):
+        connection_pool.execute_prepared(FakeCursor(conn), 'get_search', SQL_GET_SEARCH, (search_id,))
+    assert conn.statements == ['PREPARE get_search', 'EXECUTE get_search (%s)',
+                               'EXECUTE get_search (%s)']
+    other = FakeConnection()
+    connection_pool.execute_prepared(FakeCursor(other), 'get_search', SQL_GET_SEARCH, (1,))
+    assert other.statements[0] == 'PREPARE get_search'
+
+
+def test_stale_plan_is_reprepared_once():
+    connection_pool, conn = pool(), FakeConnection()
+    connection_pool.execute_prepared(FakeCursor(conn), 'get_search', SQL_GET_SEARCH, (1,))
+    conn.stale.add('get_search')
+    connection_pool.execute_prepared(FakeCursor(conn), 'get_search', SQL_GET_SEARCH, (2,))
+    assert conn.statements[2:] == ['EXECUTE get_search (%s)', 'DEALLOCATE get_search',
+                                   'PREPARE get_search', 'EXECUTE get_search (%s)']
+    assert conn.rollbacks == 1
+    # Later calls reuse the new plan
+    connection_pool.execute_prepared(FakeCursor(conn), 'get_search', SQL_GET_SEARCH, (3,))
+    assert conn.statements[-1] == 'EXECUTE get_search (%s)' and len(conn.statements) == 7
+
+
+def test_other_unsupported_features_are_raised():
+    class Failing(FakeCursor):
+        def execute(self, sql, params=None):
+            if sql.startswith('EXECUTE'):
+                raise psycopg2.errors.FeatureNotSupported('something else')
+
+    with pytest.raises(psycopg2.errors.FeatureNotSupported):
+        pool().execute_prepared(Failing(FakeConnection()), 'get_search', SQL_GET_SEARCH, (1,))
+
+
+def test_prepared_selects_list_their_columns():
+    assert '*' not in SQL_GET_SEARCH
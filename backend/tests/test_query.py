@@ -0,0 +1,45 @@
+"""Variable chunking for the API's per-call field limit."""
+
+from census.query import MAX_VARIABLES_PER_CALL, build_api_urls, chunk_variables
+
+
+def codes(n):
+    return [f'B01001_{i:03d}E' for i in range(1, n + 1)]
+
+
+def test_group_request_is_one_empty_chunk():
+    assert chunk_variables([]) == [[]]
+    assert chunk_variables(['NAME', ' ']) == [[]]
+
+
+def test_first_chunk_leaves_room_for_name():
+    chunks = chunk_variables(codes(49))
+    assert chunks == [codes(49)]
+    chunks = chunk_variables(codes(50))
+    assert [len(chunk) for chunk in chunks] == [49, 1]
+
+
+def test_chunks_respect_limit_and_keep_order():
+    variables = codes(200)
+    chunks = chunk_variables(variables)
+    assert [len(chunk) for chunk in chunks] == [49, 50, 50, 50, 1]
+    assert [code for chunk in chunks for code in chunk] == variables
+
+
+def test_duplicates_and_name_are_dropped():
+    chunks = chunk_variables(['NAME', 'B01001_001E', ' B01001_001E', 'B01001_002E'])
+    assert chunks == [['B01001_001E', 'B01001_002E']]
+
+
+def test_custom_limit():
+    assert chunk_variables(codes(7), limit=3) == [codes(7)[:2], codes(7)[2:5], codes(7)[5:]]
+
+
+def test_each_url_stays_within_the_limit_and_only_the_first_asks_for_name():
+    urls = build_api_urls(2022, 'acs5', 'B01001', codes(120), 'state:*')
+    fields = [url.split('get=')[1].split('&')[0].split(',') for url in urls]
+    assert all(len(f) <= MAX_VARIABLES_PER_CALL for f in fields)
+    assert fields[0][0] == 'NAME'
+    assert all('NAME' not in f for f in fields[1:])
+    assert build_api_urls(2022, 'acs5', 'B01001', [], 'state:*')[0].endswith(
+        '?get=group(B01001)&for=state:*')
@@ -0,0 +1,25 @@
+"""Quota exhaustion surfaces as a Census API error."""
+
+import pytest
+
+from census.query import CensusAPIError
+from census.quota import QuotaExceeded, QuotaManager
+
+
+def test_exhausted_quota_raises_census_api_error(tmp_path):
+    quota = QuotaManager(str(tmp_path / 'quota.sqlite3'), keyless_daily_limit=2, max_wait=1)
+    quota.acquire(None)
+    quota.acquire(None)
+    with pytest.raises(CensusAPIError, match='quota for keyless requests is exhausted') as info:
+        quota.acquire(None)
+    assert isinstance(info.value, QuotaExceeded)
+
+
+def test_api_keys_have_their_own_bucket(tmp_path):
+    quota = QuotaManager(str(tmp_path / 'quota.sqlite3'), keyless_daily_limit=1,
+                         keyed_rate=0.001, keyed_burst=1, max_wait=1)
+    quota.acquire(None)
+    quota.acquire('key-one')
+    with pytest.raises(QuotaExceeded):
+        quota.acquire('key-one')
+    quota.acquire('key-two')
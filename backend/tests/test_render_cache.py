@@ -0,0 +1,60 @@
+"""Render-cache vintages track the search row and when its data was fetched."""
+
+import os
+import time
+
+import pandas as pd
+
+import census.geography as geography
+import census.query as query
+from census.render_cache import search_vintage
+from census.response_cache import ResponseCache, query_fingerprint
+
+SEARCH = {'search_id': 1, 'year': 2022, 'acs_type': 'acs5', 'table_name': 'B01001',
+          'variables': ['B01001_001E'], 'geography': 'tract:*&in=state:06',
+          'derived_variables': [], 'search_timestamp': '2024-05-01T12:00:00'}
+
+
+def test_vintage_changes_with_search_and_fetch_time():
+    vintage = search_vintage(SEARCH, 1700000000.0)
+    assert search_vintage(dict(SEARCH, search_timestamp='2024-06-01'), 1700000000.0) == vintage
+    assert search_vintage(dict(SEARCH, variables=['B01001_002E']), 1700000000.0) != vintage
+    assert search_vintage(SEARCH, 1700003600.0) != vintage
+    assert search_vintage(SEARCH) != vintage
+
+
+def test_fetched_at_reports_live_entries_only(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10 ** 6)
+    assert cache.fetched_at('abc') is None
+    cache.put('abc', pd.DataFrame({'NAME': ['x']}))
+    written_at = cache.fetched_at('abc')
+    assert abs(written_at - time.time()) < 5
+    # Reading an entry does not change its fetch time
+    cache.get('abc')
+    assert cache.fetched_at('abc') == written_at
+    old = time.time() - 120
+    os.utime(cache._path('abc'), (old, old))
+    assert cache.fetched_at('abc') is None
+
+
+def test_fanned_out_result_is_cached_under_the_query_fingerprint(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10 ** 6)
+    units = ['tract:*&in=state:06&in=county:001', 'tract:*&in=state:06&in=county:003']
+    requests = []
+
+    def fetch_unit(year, acs_type, table, variables, unit, api_key=None):
+        requests.append(unit)
+        return pd.DataFrame({'B01001_001E': [str(len(requests))], 'county': [unit[-3:]]})
+
+    monkeypatch.setattr(geography, 'response_cache', cache)
+    monkeypatch.setattr(query, 'response_cache', cache)
+    monkeypatch.setattr(geography, 'plan_units', lambda *args: units)
+    monkeypatch.setattr(geography, 'fetch_frame', fetch_unit)
+    args = (SEARCH['year'], SEARCH['acs_type'], SEARCH['table_name'], SEARCH['variables'],
+            SEARCH['geography'])
+
+    first = geography.fetch_geography_frame(*args)
+    assert list(first['county']) == ['001', '003']
+    assert cache.fetched_at(query_fingerprint(*args)) is not None
+    assert geography.fetch_geography_frame(*args).equals(first)
+    assert len(requests) == 2
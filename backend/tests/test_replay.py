@@ -0,0 +1,64 @@
+"""Collapsing saved searches into shared replay queries."""
+
+import pandas as pd
+
+from census.replay import plan_replay, replay_searches
+
+
+def search(search_id, variables, geography='state:*', year=2022, table='B01001'):
+    return {'search_id': search_id, 'year': year, 'acs_type': 'acs5', 'table_name': table,
+            'geography': geography, 'variables': variables}
+
+
+def test_searches_sharing_a_query_collapse_to_the_union_of_variables():
+    plan = plan_replay([search(1, ['B01001_001E']),
+                        search(2, ['B01001_002E', ' B01001_001E']),
+                        search(3, ['B01001_003E'], year='2022')])
+    assert len(plan) == 1
+    assert plan[0]['variables'] == ['B01001_001E', 'B01001_002E', 'B01001_003E']
+    assert plan[0]['search_ids'] == [1, 2, 3]
+
+
+def test_whole_table_search_absorbs_its_group():
+    plan = plan_replay([search(1, ['B01001_001E']), search(2, []), search(3, None),
+                        search(4, ['B01001_001E'], table='B01002')])
+    assert [(q['table'], q['variables'], q['search_ids']) for q in plan] == [
+        ('B01001', [], [1, 2, 3]),
+        ('B01002', ['B01001_001E'], [4]),
+    ]
+    assert all('whole_table' not in q for q in plan)
+
+
+def test_differing_geographies_are_kept_apart():
+    plan = plan_replay([search(1, ['B01001_001E'], 'county:*&in=state:06'),
+                        search(2, ['B01001_001E'], 'county:*&in=state:36'),
+                        search(3, ['B01001_002E'], 'county:* & in=state:06'),
+                        search(4, ['B01001_001E'], 'tract:*&in=state:06&in=county:001'),
+                        search(5, ['B01001_001E'], 'tract:*&in=county:001&in=state:06')])
+    assert [q['search_ids'] for q in plan] == [[1, 3], [2], [4, 5]]
+
+
+def test_replay_counts_api_calls_saved_and_slices_each_search():
+    frame = pd.DataFrame({'NAME': ['Alabama'], 'B01001_001E': ['1'], 'B01001_002E': ['2'],
+                          'state': ['01']})
+    fetched = []
+    delivered = {}
+
+    def fetch(query):
+        fetched.append(query['geography'])
+        return frame
+
+    def deliver(item, subset):
+        delivered[item['search_id']] = list(subset.columns)
+
+    searches = [search(1, ['B01001_001E']), search(2, ['B01001_002E']), search(3, []),
+                search(4, ['B01001_001E'], 'county:*')]
+    result = replay_searches(searches, fetch, deliver, max_workers=2)
+    assert sorted(fetched) == ['county:*', 'state:*']
+    assert result['total_searches'] == 4
+    assert result['queries_run'] == 2
+    assert result['api_calls_saved'] == 2
+    assert result['failed'] == 0
+    assert delivered[1] == ['NAME', 'B01001_001E', 'state']
+    assert delivered[2] == ['NAME', 'B01001_002E', 'state']
+    assert delivered[3] == list(frame.columns)
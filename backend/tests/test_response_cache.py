@@ -0,0 +1,87 @@
+"""Response cache expiry, LRU eviction and query fingerprints."""
+
+import os
+import time
+
+import pandas as pd
+
+import census.query as query
+from census.response_cache import ResponseCache, query_fingerprint
+
+FRAME = pd.DataFrame({'NAME': ['Alabama', 'Alaska'], 'B01001_001E': ['5074296', '733583'],
+                      'state': ['01', '02']})
+
+
+def make_cache(tmp_path, ttl_seconds=60, max_bytes=10 ** 6):
+    return ResponseCache(str(tmp_path), ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+
+
+def test_hit_returns_the_stored_frame(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get('abc') is None
+    cache.put('abc', FRAME)
+    pd.testing.assert_frame_equal(cache.get('abc'), FRAME)
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+
+def test_entries_expire_by_mtime(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.put('abc', FRAME)
+    old = time.time() - 120
+    os.utime(cache._path('abc'), (time.time(), old))
+    assert cache.get('abc') is None
+    assert cache.stats['expired'] == 1
+    assert not os.path.exists(cache._path('abc'))
+
+
+def test_least_recently_used_entry_is_evicted_over_the_size_cap(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put('a', FRAME)
+    cache.put('b', FRAME)
+    size = os.path.getsize(cache._path('a'))
+    now = time.time()
+    # 'a' was used more recently than 'b', though it was written first
+    os.utime(cache._path('a'), (now, now - 10))
+    os.utime(cache._path('b'), (now - 5, now - 5))
+
+    cache.max_bytes = 2 * size + size // 2
+    cache.put('c', FRAME)
+    assert sorted(os.listdir(tmp_path)) == ['a.parquet', 'c.parquet']
+    assert cache.stats['evictions'] == 1
+
+
+def test_fingerprint_ignores_name_and_variable_order():
+    fingerprint = query_fingerprint(2022, 'acs5', 'B01001', ['B01001_001E', 'B01001_002E'], 'state:*')
+    assert query_fingerprint('2022', 'acs5', 'B01001',
+                             ['NAME', ' B01001_002E', 'B01001_001E', 'B01001_001E'],
+                             'state:*') == fingerprint
+    assert query_fingerprint(2022, 'acs5', 'B01001', ['B01001_001E'], 'state:*') != fingerprint
+    assert query_fingerprint(2021, 'acs5', 'B01001', ['B01001_001E', 'B01001_002E'],
+                             'state:*') != fingerprint
+
+
+def test_fingerprint_normalizes_geography():
+    fingerprint = query_fingerprint(2022, 'acs5', 'B01001', [], 'tract:*&in=state:06&in=county:001')
+    assert query_fingerprint(2022, 'acs5', 'B01001', [],
+                             'tract:*&in=county:001&in=state:06') == fingerprint
+    assert query_fingerprint(2022, 'acs5', 'B01001', [],
+                             'tract: *& in=state:06 &in=county:001') == fingerprint
+    assert query_fingerprint(2022, 'acs5', 'B01001', [],
+                             'tract:*&in=state:06&in=county:003') != fingerprint
+
+
+def test_api_key_is_not_part_of_the_cache_key(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path)
+    urls = []
+
+    def request_frame(api_url):
+        urls.append(api_url)
+        return FRAME
+
+    monkeypatch.setattr(query, 'response_cache', cache)
+    monkeypatch.setattr(query, 'local_store', None)
+    monkeypatch.setattr(query, '_request_frame', request_frame)
+    query.fetch_frame(2022, 'acs5', 'B01001', ['B01001_001E'], 'state:*', api_key='one')
+    frame = query.fetch_frame(2022, 'acs5', 'B01001', ['B01001_001E'], 'state:*', api_key='two')
+    assert len(urls) == 1 and 'key=one' in urls[0]
+    pd.testing.assert_frame_equal(frame, FRAME)
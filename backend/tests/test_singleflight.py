@@ -0,0 +1,71 @@
+"""Coalescing of concurrent identical calls."""
+
+import threading
+import time
+
+import pytest
+
+from census.singleflight import SingleFlight
+
+
+def run_concurrently(n, target):
+    barrier = threading.Barrier(n)
+    results, errors = [None] * n, [None] * n
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target(i)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'rows': 3}
+
+    results, errors = run_concurrently(8, lambda i: flights.do('q', slow))
+    assert calls == [1]
+    assert errors == [None] * 8
+    assert all(result is results[0] for result in results)
+    assert flights.stats == {'calls': 1, 'coalesced': 7}
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    def failing():
+        time.sleep(0.2)
+        raise ValueError('upstream failed')
+
+    _, errors = run_concurrently(4, lambda i: flights.do('q', failing))
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flights.stats['calls'] == 1
+
+
+def test_different_keys_run_independently():
+    flights = SingleFlight()
+    results, _ = run_concurrently(3, lambda i: flights.do(i, lambda: i * 10))
+    assert results == [0, 10, 20]
+    assert flights.stats == {'calls': 3, 'coalesced': 0}
+
+
+def test_results_are_not_kept_after_completion():
+    flights = SingleFlight()
+    assert flights.do('q', lambda: 1) == 1
+    assert flights.do('q', lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flights.do('q', lambda: {}['missing'])
+    assert flights.do('q', lambda: 3) == 3
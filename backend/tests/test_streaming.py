@@ -0,0 +1,53 @@
+"""Incremental decoding of Census JSON responses."""
+
+import json
+
+import pytest
+
+from census.streaming import iter_json_rows
+
+ROWS = [['NAME', 'B01001_001E', 'state'],
+        ['Alabama', '5074296', '01'],
+        ['Puerto Rico, "Estado Libre"', None, '72'],
+        ['São Tomé [test], ok', '-666666666', '99']]
+
+
+def split(body: bytes, size: int):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 10000])
+def test_rows_survive_any_chunking(size):
+    body = json.dumps(ROWS, ensure_ascii=False, indent=1).encode('utf-8')
+    assert list(iter_json_rows(split(body, size))) == ROWS
+
+
+def test_multibyte_characters_split_across_chunks():
+    body = json.dumps([['é€'], ['ü']], ensure_ascii=False).encode('utf-8')
+    assert list(iter_json_rows(split(body, 1))) == [['é€'], ['ü']]
+
+
+def test_empty_array_yields_nothing():
+    assert list(iter_json_rows([b' [ ] '])) == []
+
+
+def test_rows_are_yielded_before_the_body_ends():
+    def chunks():
+        yield b'[["NAME"],'
+        yield b'["Alabama"]'
+        raise AssertionError('read past the rows already yielded')
+
+    rows = iter_json_rows(chunks())
+    assert next(rows) == ['NAME']
+
+
+@pytest.mark.parametrize('body', [b'{"error": "bad"}', b'[["a"], ', b'[["a"] ["b"]]', b'error: unknown variable'])
+def test_malformed_bodies_raise_value_error(body):
+    with pytest.raises(ValueError):
+        list(iter_json_rows([body]))
+
+
+@pytest.mark.parametrize('body', [b'[,["a"]]', b'[["a"],,["b"]]', b'[["a"],]', b'["a", "b"]', b'[1]'])
+def test_bad_separators_and_non_array_rows_raise_value_error(body):
+    with pytest.raises(ValueError):
+        list(iter_json_rows([body]))
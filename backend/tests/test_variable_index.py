@@ -0,0 +1,96 @@
+"""Background per-vintage index builds in VariableIndexStore."""
+
+import threading
+import time
+
+import pytest
+
+import census.variable_index as variable_index
+from census.variable_index import (VariableIndexNotReady, VariableIndexStore,
+                                   VariableIndexUnavailable)
+
+
+class FakeIndex:
+    def __init__(self, path):
+        self.path = path
+
+
+def wait_for(condition):
+    deadline = time.time() + 5
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def touch(year, acs_type, path):
+    open(path, 'wb').close()
+    return 0
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(variable_index, 'VariableIndex', FakeIndex)
+    tmp_path.joinpath(f'v{variable_index.INDEX_FORMAT_VERSION}').mkdir()
+    return VariableIndexStore(str(tmp_path), max_open=2, retry_seconds=60)
+
+
+def test_missing_index_is_built_in_background(store, monkeypatch):
+    release = threading.Event()
+    builds = []
+
+    def slow_build(year, acs_type, path):
+        builds.append((year, acs_type))
+        assert release.wait(5)
+        return touch(year, acs_type, path)
+
+    monkeypatch.setattr(variable_index, 'build_index', slow_build)
+    open(store.path('2021', 'acs5'), 'wb').close()
+    ready = store.get(2021, 'acs5')
+
+    for _ in range(3):
+        with pytest.raises(VariableIndexNotReady):
+            store.get(2022, 'acs5')
+    # The build in progress does not hold up vintages already on disk
+    assert store.get('2021', 'acs5') is ready
+    release.set()
+    wait_for(lambda: not store._building)
+
+    assert builds == [('2022', 'acs5')]
+    assert store.get(2022, 'acs5').path == store.path('2022', 'acs5')
+
+
+def test_failed_build_is_retried_after_backoff(store, monkeypatch):
+    attempts = []
+
+    def failing_build(year, acs_type, path):
+        attempts.append(year)
+        if len(attempts) == 1:
+            raise OSError('metadata download failed')
+        return touch(year, acs_type, path)
+
+    monkeypatch.setattr(variable_index, 'build_index', failing_build)
+    with pytest.raises(VariableIndexNotReady):
+        store.get(2022, 'acs1')
+    wait_for(lambda: not store._building)
+    for _ in range(3):
+        with pytest.raises(VariableIndexUnavailable, match='metadata download failed'):
+            store.get(2022, 'acs1')
+    assert attempts == ['2022']
+
+    failed_at, error = store._failed[('2022', 'acs1')]
+    store._failed[('2022', 'acs1')] = (failed_at - 61, error)
+    with pytest.raises(VariableIndexNotReady):
+        store.get(2022, 'acs1')
+    wait_for(lambda: not store._building)
+    assert isinstance(store.get(2022, 'acs1'), FakeIndex)
+
+
+def test_least_recently_used_index_is_closed(store):
+    for year in (2020, 2021, 2022):
+        open(store.path(year, 'acs5'), 'wb').close()
+    first = store.get(2020, 'acs5')
+    store.get(2021, 'acs5')
+    store.get(2020, 'acs5')
+    store.get(2022, 'acs5')
+    assert list(store._open) == [('2020', 'acs5'), ('2022', 'acs5')]
+    assert store.get(2020, 'acs5') is first